@@ -0,0 +1 @@
+# Benchmarks for the crawler (run from script/: python -m bench.<name>)
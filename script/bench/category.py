@@ -0,0 +1,123 @@
+"""
+Category detection benchmark: the old nested `keyword in text` loop vs the
+compiled KeywordMatcher.
+
+The corpus is built from sentences of the real description in refer/job.html
+mixed with category keywords (with and without diacritics) and words that
+only contain a keyword as a substring ("digital", "tuition", "ít").
+
+Usage (from script/):
+  python -m bench.category                   # 20k descriptions
+  python -m bench.category --docs 100000
+  python -m bench.category --extra-keywords 50   # 50 more keywords per category
+"""
+import argparse
+import random
+import re
+import time
+from collections import Counter
+
+from crawler.config import CATEGORY_KEYWORDS, CATEGORY_MATCHER
+from crawler.matcher import KeywordMatcher, fold
+from crawler.parser import detect_category, parse_job_detail
+
+from .crawl import timed
+from .stub_server import REFER_DIR
+
+FILLER = [
+    'Làm việc từ thứ 2 đến thứ 6, nghỉ thứ 7 và chủ nhật',
+    'Lương tháng 13, thưởng theo hiệu quả công việc',
+    'Môi trường làm việc năng động, thân thiện, chuyên nghiệp',
+    'Đóng bảo hiểm xã hội đầy đủ theo quy định của pháp luật',
+    'Ưu tiên ứng viên có kinh nghiệm làm việc từ 1 năm trở lên',
+    'Có tinh thần trách nhiệm, chịu được áp lực công việc',
+    'Báo cáo kết quả công việc hằng tuần cho cấp trên',
+    'Phối hợp với các phòng ban khác để hoàn thành mục tiêu chung',
+    'Du lịch hằng năm cùng công ty, tham gia các hoạt động team building',
+    'Kỹ năng giao tiếp tốt, trung thực, cẩn thận',
+]
+TRAPS = ['digital', 'tuition', 'ít người', 'quit', 'build', 'chủ đề', 'suite', 'admission', 'bankrupt']
+
+
+def legacy_detect_category(title: str, description: str) -> str:
+    """detect_category as it was before KeywordMatcher, for comparison"""
+    text = (title + ' ' + description).lower()
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword.lower() in text:
+                return category
+    return 'Khác'
+
+
+def legacy_scores(title: str, description: str, keywords_map: dict = CATEGORY_KEYWORDS) -> dict[str, int]:
+    """Scores the old way: one substring count per keyword, whole text each time"""
+    text = (title + ' ' + description).lower()
+    scores = {}
+    for category, keywords in keywords_map.items():
+        hits = sum(text.count(keyword.lower()) for keyword in keywords)
+        if hits:
+            scores[category] = hits
+    return scores
+
+
+def corpus(n: int, seed: int = 42) -> list[tuple[str, str]]:
+    """n (title, description) pairs"""
+    job = parse_job_detail((REFER_DIR / 'job.html').read_text(encoding='utf-8'), 'https://www.topcv.vn/bench')
+    sentences = [s.strip() for s in re.split(r'[.\n]', job['description']) if len(s.strip()) > 20]
+    rng = random.Random(seed)
+    categories = list(CATEGORY_KEYWORDS)
+    docs = []
+    for _ in range(n):
+        keywords = CATEGORY_KEYWORDS[rng.choice(categories)]
+        title, mention = (k if rng.random() < 0.7 else fold(k) for k in rng.choices(keywords, k=2))
+        # Real descriptions run to a few KB
+        body = rng.choices(FILLER, k=rng.randint(10, 40)) + sentences
+        body += [f'Phụ trách mảng {mention}', ' '.join(rng.sample(TRAPS, 2))]
+        rng.shuffle(body)
+        docs.append((f'Nhân viên {title.title()} {rng.choice(TRAPS)}', '. '.join(body)))
+    return docs
+
+
+def extra_keywords(n: int, seed: int = 7) -> dict[str, list[str]]:
+    """CATEGORY_KEYWORDS plus n made-up two-syllable keywords per category"""
+    rng = random.Random(seed)
+    syllables = ['nguyên', 'vật', 'liệu', 'kho', 'vận', 'chuyển', 'phân', 'tích', 'dữ', 'khảo',
+                 'sát', 'thị', 'trường', 'hợp', 'đồng', 'pháp', 'lý', 'sản', 'xuất', 'chất', 'lượng']
+    return {category: keywords + [' '.join(rng.sample(syllables, 2)) + f' {i}' for i in range(n)]
+            for category, keywords in CATEGORY_KEYWORDS.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark category detection')
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--extra-keywords', type=int, default=0,
+                        help='Add N made-up keywords per category to show how each approach scales')
+    args = parser.parse_args()
+
+    docs = corpus(args.docs)
+    size = sum(len(t) + len(d) for t, d in docs)
+    keywords = extra_keywords(args.extra_keywords) if args.extra_keywords else CATEGORY_KEYWORDS
+    matcher = KeywordMatcher(keywords) if args.extra_keywords else CATEGORY_MATCHER
+    print(f"[BENCH] {len(docs)} descriptions, {size / 1e6:.1f} MB of text, "
+          f"{sum(map(len, keywords.values()))} keywords")
+
+    elapsed_old, old = timed(lambda: [legacy_detect_category(t, d) for t, d in docs])
+    elapsed_new, new = timed(lambda: [detect_category(t, d) for t, d in docs])
+    elapsed_old_scores, _ = timed(lambda: [legacy_scores(t, d, keywords) for t, d in docs])
+    elapsed_scores, _ = timed(lambda: [matcher.scores(t, d) for t, d in docs])
+    print("  first match (stops at the first keyword found anywhere):")
+    print(f"    legacy loop      {elapsed_old:7.2f}s  {len(docs) / elapsed_old:9.0f} docs/sec")
+    print(f"    KeywordMatcher   {elapsed_new:7.2f}s  {len(docs) / elapsed_new:9.0f} docs/sec")
+    print("  scores for every category:")
+    print(f"    legacy counts    {elapsed_old_scores:7.2f}s  {len(docs) / elapsed_old_scores:9.0f} docs/sec")
+    print(f"    KeywordMatcher   {elapsed_scores:7.2f}s  {len(docs) / elapsed_scores:9.0f} docs/sec  "
+          f"({elapsed_old_scores / elapsed_scores:.1f}x)")
+
+    changed = Counter((a, b) for a, b in zip(old, new) if a != b)
+    print(f"\n[DIFF] {sum(changed.values())} of {len(docs)} categories differ; most common (legacy -> new):")
+    for (a, b), count in changed.most_common(8):
+        print(f"  {count:6}  {a} -> {b}")
+
+
+if __name__ == '__main__':
+    main()
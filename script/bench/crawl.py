@@ -0,0 +1,49 @@
+"""
+Wall-clock benchmark: sequential crawl_jobs vs concurrent crawl mode,
+both against the local stub server.
+
+Usage (from script/):
+  python -m bench.crawl                       # 10 jobs, 200 ms latency
+  python -m bench.crawl --jobs 30 --latency 0.2 --concurrency 5 --rate 10
+"""
+import argparse
+import time
+
+from crawler import crawl_jobs, crawl_jobs_concurrent
+from crawler.logs import setup_logging
+
+from .stub_server import start_stub_server
+
+
+def timed(fn, *args, **kwargs) -> tuple[float, list]:
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sequential vs concurrent crawl')
+    parser.add_argument('--jobs', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--concurrency', type=int, default=5)
+    parser.add_argument('--rate', type=float, default=10.0)
+    args = parser.parse_args()
+    setup_logging('error')  # No per-page log lines while timing
+
+    server, base_url = start_stub_server(args.latency)
+    url = f'{base_url}/tim-viec-lam-nhan-vien-kinh-doanh'
+    print(f"[BENCH] {args.jobs} jobs, latency {args.latency}s, stub at {base_url}")
+
+    seq_time, seq_jobs = timed(crawl_jobs, url, args.jobs)
+    print(f"  sequential : {seq_time:7.2f}s  {len(seq_jobs)} jobs")
+
+    con_time, con_jobs = timed(crawl_jobs_concurrent, url, args.jobs, args.concurrency, args.rate)
+    print(f"  concurrent : {con_time:7.2f}s  {len(con_jobs)} jobs "
+          f"(concurrency={args.concurrency}, rate={args.rate}/s)")
+
+    print(f"  speedup    : {seq_time / con_time:7.2f}x")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
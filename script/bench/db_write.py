@@ -0,0 +1,134 @@
+"""
+Bulk insert benchmark: the old save_jobs_to_db vs JobWriter.
+
+Jobs arrive in chunks the way the crawler produces them (one chunk per
+category, or one job at a time in pipeline mode). The old function opened a
+connection, re-ran CREATE/ALTER and committed on every call; JobWriter keeps
+one connection and commits every `--batch` rows.
+
+Usage (from script/):
+  python -m bench.db_write                    # 100k synthetic jobs, chunks of 30
+  python -m bench.db_write --jobs 20000 --chunk 1 --batch 1000
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from crawler.config import CATEGORY_KEYWORDS, DB_BATCH_SIZE, DEFAULT_BACKGROUNDS
+from crawler.database import INSERT_JOB_SQL, JobWriter, connect, job_row
+from crawler.parser import make_job_id
+
+
+def synthetic_jobs(n: int, seed: int = 42):
+    """Yield n parsed-job dicts shaped like parse_job_detail output"""
+    rng = random.Random(seed)
+    categories = list(CATEGORY_KEYWORDS)
+    for i in range(n):
+        url = f'https://www.topcv.vn/viec-lam/synthetic-{i}/{1000000 + i}.html'
+        category = rng.choice(categories)
+        low = rng.randint(5, 40)
+        yield {
+            'id': make_job_id(url),
+            'title': f'{category} {rng.choice(CATEGORY_KEYWORDS[category])} #{i}',
+            'company': f'Công ty {rng.randint(1, 5000)}',
+            'salary': f'{low} - {low + rng.randint(2, 20)} triệu',
+            'location': rng.choice(['Hà Nội', 'Hồ Chí Minh', 'Đà Nẵng', 'Bình Dương']),
+            'experience': f'{rng.randint(0, 5)} năm',
+            'category': category,
+            'description': 'Mô tả công việc ' * rng.randint(5, 30),
+            'requirements': 'Yêu cầu ứng viên ' * rng.randint(3, 15),
+            'benefits': 'Quyền lợi ' * 10,
+            'tags': ['tag-a', 'tag-b'],
+            'logo': '',
+            'remote': rng.random() < 0.1,
+            'url': url,
+            'background_image': rng.choice(DEFAULT_BACKGROUNDS),
+            'source': 'topcv',
+            'created_at': datetime.now().isoformat(),
+        }
+
+
+def legacy_save_jobs_to_db(jobs: list[dict], db_file: str) -> int:
+    """save_jobs_to_db as it was before JobWriter, for comparison"""
+    conn = sqlite3.connect(db_file)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY, title TEXT NOT NULL, company TEXT NOT NULL, location TEXT,
+            salary TEXT, job_type TEXT, category TEXT, remote INTEGER DEFAULT 0, description TEXT,
+            requirements TEXT, url TEXT UNIQUE, source TEXT, background_image TEXT, created_at TEXT,
+            raw_data TEXT, crawled_at TEXT, fingerprint TEXT
+        )
+    ''')
+    try:
+        conn.execute('ALTER TABLE jobs ADD COLUMN category TEXT')
+    except:
+        pass
+    inserted = 0
+    for job in jobs:
+        try:
+            conn.execute(INSERT_JOB_SQL, job_row(job, datetime.now().isoformat()))
+            inserted += 1
+        except Exception as e:
+            print(f"  [DB ERROR] {e}")
+    conn.commit()
+    conn.close()
+    return inserted
+
+
+def chunks(jobs: list[dict], size: int):
+    for i in range(0, len(jobs), size):
+        yield jobs[i:i + size]
+
+
+def write_legacy(jobs: list[dict], chunk: int, db_file: str) -> int:
+    return sum(legacy_save_jobs_to_db(part, db_file) for part in chunks(jobs, chunk))
+
+
+def write_batched(jobs: list[dict], chunk: int, batch_size: int, db_file: str) -> int:
+    with JobWriter(db_file, batch_size) as writer:
+        for part in chunks(jobs, chunk):
+            if chunk == 1:
+                writer.add(part[0])  # pipeline sink: one job at a time
+            else:
+                writer.write(part)  # craw-all: one category at a time
+        writer.flush()
+        return writer.written
+
+
+def run(label: str, fn, *args) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'jobs.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            conn = connect(db_file)  # schema outside the timed region
+            conn.execute('PRAGMA journal_mode = DELETE')
+            conn.close()
+        start = time.perf_counter()
+        count = fn(*args, db_file)
+        elapsed = time.perf_counter() - start
+        rows = sqlite3.connect(db_file).execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+    print(f"  {label:28} {elapsed:7.2f}s  {count / elapsed:10.0f} rows/s  ({rows} rows)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk job inserts')
+    parser.add_argument('--jobs', type=int, default=100_000)
+    parser.add_argument('--chunk', type=int, default=30, help='Jobs per save call (30 = one category)')
+    parser.add_argument('--batch', type=int, default=DB_BATCH_SIZE, help='JobWriter rows per transaction')
+    args = parser.parse_args()
+
+    jobs = list(synthetic_jobs(args.jobs))
+    print(f"[BENCH] Inserting {args.jobs} synthetic jobs, {args.chunk} per call")
+    old = run('old save_jobs_to_db', write_legacy, jobs, args.chunk)
+    new = run(f'JobWriter (batch={args.batch})', write_batched, jobs, args.chunk, args.batch)
+    print(f"  {'speedup':28} {old / new:7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Fault-injection benchmark: jobs/min and jobs lost as the server's error rate
+grows, with the old fetch behaviour (a fixed rate, no retries) and with the
+adaptive one (AIMD rate, retries with backoff, circuit breaker).
+
+Every run crawls one stub category with a fresh stub server that serves at
+most --capacity requests/sec (429 with Retry-After above that) and fails
+--error-rates of the requests (503 / 500 / dropped connection).
+
+Usage (from script/):
+  python -m bench.faults                                # 40 jobs, error rates 0 0.05 0.1 0.2
+  python -m bench.faults --jobs 50 --error-rates 0 0.3 --capacity 5 --concurrency 8
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from crawler import crawl_jobs_concurrent, set_fetch_policy, TokenBucket, ADAPTIVE_MAX_RATE, FETCH_RETRIES, RATE_BURST
+from crawler.client import host_stats, reset_hosts
+from crawler.logs import setup_logging
+
+from .stub_server import start_stub_server
+
+# name -> (retries, adaptive, requests/sec cap)
+MODES = {
+    'fixed': (0, False, 1.0),
+    'adaptive': (FETCH_RETRIES, True, ADAPTIVE_MAX_RATE),
+}
+
+
+def run(mode: str, jobs: int, error_rate: float, args) -> dict:
+    retries, adaptive, rate = MODES[mode]
+    server, base_url = start_stub_server(args.latency, error_rate=error_rate, capacity=args.capacity,
+                                         seed=args.seed)
+    reset_hosts()
+    set_fetch_policy(retries, adaptive, rate)
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            crawled = crawl_jobs_concurrent(f'{base_url}/tim-viec-lam-nhan-vien-kinh-doanh', jobs,
+                                            args.concurrency, bucket=TokenBucket(rate, RATE_BURST))
+    finally:
+        set_fetch_policy(FETCH_RETRIES, True, ADAPTIVE_MAX_RATE)
+        server.shutdown()
+    elapsed = time.perf_counter() - start
+    stats = next(iter(host_stats().values()), {})
+    return {
+        'jobs': len(crawled),
+        'per_min': len(crawled) / elapsed * 60,
+        'elapsed': elapsed,
+        'requests': server.requests,
+        'faults': sum(n for kind, n in server.faults.items() if kind != 429),
+        'throttled': server.faults[429],
+        'retries': stats.get('retries', 0),
+        'rate': stats.get('rate') if adaptive else rate,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Jobs/min vs server error rate, fixed vs adaptive fetching')
+    parser.add_argument('--jobs', type=int, default=40)
+    parser.add_argument('--error-rates', type=float, nargs='+', default=[0.0, 0.05, 0.1, 0.2])
+    parser.add_argument('--capacity', type=float, default=8.0, help='Requests/sec the stub serves')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--concurrency', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the injected faults')
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    args = parser.parse_args()
+    setup_logging('error')  # Every lost job logs a warning
+
+    print(f"[BENCH] {args.jobs} jobs per run, stub capacity {args.capacity:g} req/s, latency {args.latency}s, "
+          f"concurrency {args.concurrency}")
+    print(f"  {'errors':>6} {'mode':9} {'jobs':>9} {'jobs/min':>9} {'time':>7} {'requests':>8} "
+          f"{'faults':>6} {'429s':>5} {'retries':>7} {'rate/s':>6}")
+    for error_rate in args.error_rates:
+        for mode in args.modes:
+            r = run(mode, args.jobs, error_rate, args)
+            print(f"  {error_rate:6.0%} {mode:9} {r['jobs']:>4}/{args.jobs:<4} {r['per_min']:9.1f} "
+                  f"{r['elapsed']:6.1f}s {r['requests']:8} {r['faults']:6} {r['throttled']:5} "
+                  f"{r['retries']:7} {r['rate']:6.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Shard merge benchmark: N shard databases of R synthetic jobs each, merged
+into an empty jobs.db by merge_shards (ATTACH + INSERT ... SELECT upserts),
+and optionally by the row-by-row way (read every shard row in Python,
+upsert it with INSERT_JOB_SQL, triggers on).
+
+--overlap of every shard's jobs are URLs of shard 0 crawled later, so the
+merge has conflicts to resolve; the newest copy must win.
+
+Usage (from script/):
+  python -m bench.merge                              # 10 shards x 100k jobs
+  python -m bench.merge --shards 4 --rows 20000 --compare
+  python -m bench.merge --search-index               # Also build jobs_fts once after the merge
+"""
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from crawler.database import INSERT_JOB_SQL, JOB_COLUMNS, bulk_load, connect, job_row
+from crawler.parser import make_job_id
+from crawler.shard import merge_shards
+
+from .db_write import synthetic_jobs
+
+ID, URL, CRAWLED_AT = (JOB_COLUMNS.index(c) for c in ('id', 'url', 'crawled_at'))
+
+
+def build_shards(tmp: str, shards: int, rows: int, overlap: float) -> list[str]:
+    """Shard k: `rows` jobs of its own, the first `overlap` of them replaced by shard 0's URLs"""
+    crawled = datetime(2026, 1, 1)
+    base = [job_row(job, crawled.isoformat()) for job in synthetic_jobs(rows)]
+    shared = int(rows * overlap)
+    paths = []
+    for k in range(shards):
+        path = os.path.join(tmp, f'jobs.shard-{k}-of-{shards}.db')
+        at = (crawled + timedelta(hours=k)).isoformat()
+        batch = []
+        for i, row in enumerate(base):
+            row = list(row)
+            if k and i >= shared:
+                row[URL] = row[URL].replace('.html', f'-s{k}.html')
+                row[ID] = make_job_id(row[URL])
+            row[CRAWLED_AT] = at
+            batch.append(row)
+        with contextlib.redirect_stdout(io.StringIO()):
+            conn = connect(path)
+        conn.execute('BEGIN')
+        with bulk_load(conn):
+            conn.executemany(f"INSERT INTO jobs ({', '.join(JOB_COLUMNS)}) VALUES ({', '.join('?' * len(JOB_COLUMNS))})",
+                             batch)
+        conn.execute('COMMIT')
+        conn.execute('PRAGMA journal_mode = DELETE')
+        conn.close()
+        paths.append(path)
+    return paths
+
+
+def merge_rows(shards: list[str], db_file: str) -> int:
+    """The row-by-row way: every shard row through Python and INSERT_JOB_SQL"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        conn = connect(db_file)
+    count = 0
+    for path in shards:
+        shard = sqlite3.connect(path)
+        rows = shard.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs")
+        conn.execute('BEGIN')
+        for row in rows:
+            conn.execute(INSERT_JOB_SQL, row)
+            count += 1
+        conn.execute('COMMIT')
+        shard.close()
+    conn.close()
+    return count
+
+
+def check(db_file: str, shards: int, rows: int, overlap: float):
+    """Row count, and every shared URL at the copy of the last shard"""
+    conn = sqlite3.connect(db_file)
+    total, newest = conn.execute('SELECT COUNT(*), MAX(crawled_at) FROM jobs').fetchone()
+    shared = int(rows * overlap) if shards > 1 else 0
+    expected = rows + (shards - 1) * (rows - shared)
+    latest = conn.execute("SELECT COUNT(*) FROM jobs WHERE url NOT LIKE '%-s%' AND crawled_at = ?",
+                          (newest,)).fetchone()[0] if shared else 0
+    conn.close()
+    ok = total == expected and latest == shared
+    print(f"  {'check':28} {total} rows (expected {expected}), {latest}/{shared} shared URLs at their newest copy"
+          f"  {'OK' if ok else 'MISMATCH'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark merging shard databases into jobs.db')
+    parser.add_argument('--shards', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=100_000, help='Jobs per shard')
+    parser.add_argument('--overlap', type=float, default=0.05, help='Fraction of every shard shared with shard 0')
+    parser.add_argument('--compare', action='store_true', help='Also merge row by row through Python')
+    parser.add_argument('--search-index', action='store_true', help='Build the search index after the merge')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        shards = build_shards(tmp, args.shards, args.rows, args.overlap)
+        size = sum(os.path.getsize(path) for path in shards)
+        print(f"[BENCH] {args.shards} shards x {args.rows} jobs ({size / 1024 / 1024:.0f} MB), "
+              f"{args.overlap:.0%} shared; built in {time.perf_counter() - start:.1f}s")
+
+        target = os.path.join(tmp, 'jobs.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = merge_shards(shards, target, search_index=args.search_index)
+        print(f"  {'merge_shards (SQL)':28} {result['seconds']:7.2f}s  "
+              f"{result['incoming'] / result['seconds']:10,.0f} rows/s  "
+              f"({result['inserted']} new, {result['updated']} updated, {result['skipped']} skipped)")
+        check(target, args.shards, args.rows, args.overlap)
+
+        if args.compare:
+            target = os.path.join(tmp, 'jobs-rows.db')
+            start = time.perf_counter()
+            count = merge_rows(shards, target)
+            elapsed = time.perf_counter() - start
+            print(f"  {'row by row (Python)':28} {elapsed:7.2f}s  {count / elapsed:10,.0f} rows/s")
+            print(f"  {'speedup':28} {elapsed / result['seconds']:7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
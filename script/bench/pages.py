@@ -0,0 +1,119 @@
+"""
+Page harness: how many database pages (and bytes) each query of the web app
+reads, i.e. what a range-request client such as sql.js-httpvfs downloads.
+
+Every query runs on a fresh read-only connection with memory mapping off and
+a page cache large enough to hold the whole file, so each page is read from
+disk at most once, the way the client fetches each page at most once. Bytes
+are measured with the process read counter in /proc/self/io (Linux only);
+the schema is read before the query and counted separately.
+
+Usage (from script/):
+  python -m bench.pages                                   # ../public/data/jobs.db
+  python -m bench.pages /tmp/a.db /tmp/b.db               # compare files
+  python -m bench.pages --rows 100000                     # synthetic working DB, published per page size
+  python -m bench.pages --rows 100000 --page-sizes 1024 4096 8192
+"""
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+
+from crawler.config import CHUNKED_PAGE_SIZE, PUBLISH_DB_FILE
+from crawler.database import JobWriter
+from crawler.publish import publish
+
+from .db_write import synthetic_jobs
+from .queries import APP_QUERIES, CATEGORY_QUERY
+
+# The statements src/services/database.js issues, plus the category filter
+QUERIES = [(name, sql, params) for name, _, sql, params in APP_QUERIES + [CATEGORY_QUERY]]
+
+
+def bytes_read() -> int:
+    with open('/proc/self/io') as f:
+        for line in f:
+            if line.startswith('rchar:'):
+                return int(line.split()[1])
+    raise RuntimeError('/proc/self/io has no rchar')
+
+
+def open_cold(db_file: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+    conn.execute('PRAGMA mmap_size = 0')
+    conn.execute(f'PRAGMA cache_size = -{os.path.getsize(db_file) // 1024 + 1024}')
+    return conn
+
+
+def measure(db_file: str, sql: str, params: tuple) -> tuple[int, int, int]:
+    """(schema bytes, query bytes, rows) for one query on a cold connection"""
+    before = bytes_read()
+    conn = open_cold(db_file)  # reads the header and the schema
+    try:
+        schema = bytes_read() - before
+        before = bytes_read()
+        rows = conn.execute(sql, params).fetchall()
+        return schema, bytes_read() - before, len(rows)
+    finally:
+        conn.close()
+
+
+def report(label: str, db_file: str):
+    conn = sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    size = os.path.getsize(db_file)
+    print(f"\n[PAGES] {label}: {size / 1024:,.0f} KB, page size {page_size}, {size // page_size} pages")
+    schema = None
+    for name, sql, params in QUERIES:
+        needs = 'jobs_fts' if 'jobs_fts' in sql else sql.split(' FROM ')[1].split()[0]
+        if needs not in tables:
+            print(f"  {name:21} (no {needs} table)")
+            continue
+        schema, read, rows = measure(db_file, sql, params)
+        print(f"  {name:21} {read // page_size:6} pages {read / 1024:9,.0f} KB "
+              f"{read / size * 100:6.1f}% of file  ({rows} rows)")
+    if schema is not None:
+        print(f"  {'schema (once)':21} {schema // page_size:6} pages {schema / 1024:9,.0f} KB")
+
+
+def synthetic_layouts(rows: int, page_sizes: list[int], tmp: str) -> list[tuple[str, str]]:
+    """A synthetic working DB with `rows` jobs, as is and published with each page size"""
+    work = os.path.join(tmp, 'work.db')
+    with contextlib.redirect_stdout(io.StringIO()), JobWriter(work, batch_size=5000) as writer:
+        for job in synthetic_jobs(rows):
+            writer.add(job)
+    conn = sqlite3.connect(work)
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+    layouts = [(f'working DB, {rows} rows', work)]
+    for page_size in page_sizes:
+        dest = os.path.join(tmp, str(page_size), 'jobs.db')
+        os.makedirs(os.path.dirname(dest))
+        publish(work, dest, [page_size])
+        layouts.append((f'published, page size {page_size}', dest))
+    return layouts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count the pages and bytes each of the app's queries reads")
+    parser.add_argument('dbs', nargs='*', help=f'Database files (default: {PUBLISH_DB_FILE})')
+    parser.add_argument('--rows', type=int, help='Build a synthetic working DB with this many jobs instead')
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[CHUNKED_PAGE_SIZE],
+                        help='Page sizes to publish the synthetic DB with')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.rows:
+            layouts = synthetic_layouts(args.rows, args.page_sizes, tmp)
+        else:
+            layouts = [(path, path) for path in args.dbs or [PUBLISH_DB_FILE]]
+        for label, db_file in layouts:
+            report(label, db_file)
+
+
+if __name__ == '__main__':
+    main()
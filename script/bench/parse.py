@@ -0,0 +1,71 @@
+"""
+Parser backend benchmark over refer/main.html and refer/job.html.
+
+Checks first that every installed backend returns exactly the same dicts as
+the html.parser reference, then reports pages/sec per backend.
+
+Usage (from script/):
+  python -m bench.parse
+  python -m bench.parse --seconds 3 --backends html.parser selectolax
+"""
+import argparse
+import sys
+import time
+
+from crawler.backends import available_backends
+from crawler.parser import parse_job_list, parse_job_detail
+
+from .stub_server import REFER_DIR
+
+DETAIL_URL = 'https://www.topcv.vn/viec-lam/bench/1.html'
+# Fields that are random or time-dependent by design
+VOLATILE = ('background_image', 'created_at')
+
+
+def stable(job: dict) -> dict:
+    return {k: v for k, v in job.items() if k not in VOLATILE}
+
+
+def check_parity(backends: list[str], listing: str, detail: str) -> bool:
+    ref_list = parse_job_list(listing, 'html.parser')
+    ref_detail = stable(parse_job_detail(detail, DETAIL_URL, 'html.parser'))
+    ok = True
+    for name in backends:
+        same_list = parse_job_list(listing, name) == ref_list
+        same_detail = stable(parse_job_detail(detail, DETAIL_URL, name)) == ref_detail
+        print(f"  [PARITY] {name:12} list={'ok' if same_list else 'MISMATCH'} "
+              f"detail={'ok' if same_detail else 'MISMATCH'}")
+        ok = ok and same_list and same_detail
+    return ok
+
+
+def pages_per_sec(fn, seconds: float) -> float:
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark HTML parser backends')
+    parser.add_argument('--seconds', type=float, default=2.0, help='Time budget per measurement')
+    parser.add_argument('--backends', nargs='+', default=available_backends())
+    args = parser.parse_args()
+
+    listing = (REFER_DIR / 'main.html').read_text(encoding='utf-8')
+    detail = (REFER_DIR / 'job.html').read_text(encoding='utf-8')
+
+    if not check_parity(args.backends, listing, detail):
+        sys.exit(1)
+
+    print(f"\n  {'backend':12} {'list pages/s':>13} {'detail pages/s':>15}")
+    for name in args.backends:
+        list_rate = pages_per_sec(lambda: parse_job_list(listing, name), args.seconds)
+        detail_rate = pages_per_sec(lambda: parse_job_detail(detail, DETAIL_URL, name), args.seconds)
+        print(f"  {name:12} {list_rate:13.1f} {detail_rate:15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""
+Query-plan profiler for the app's SQL (bench/queries.py) against a jobs.db.
+
+For every query: the EXPLAIN QUERY PLAN tree, the time of the first run
+and the median of --iterations runs, and flags for the plan steps that get
+slow as the tables grow:
+  FULL SCAN    every row of a table is read (SCAN t, no index)
+  TEMP B-TREE  rows are sorted or grouped after they are read
+
+A flagged query gets an index suggestion when an index can serve it: the
+columns it filters on with = first, then its ORDER BY columns. Queries that
+return every row, LIKE '%...%' filters and ORDER BY on expressions get a
+note instead. --apply creates the suggested indexes in the database, runs
+ANALYZE and measures the flagged queries again. The published jobs.db is
+rebuilt by every publish: an index worth keeping goes into PUBLISH_INDEXES
+(crawler/publish.py).
+
+Table and index sizes come from the dbstat virtual table.
+
+Usage (from script/):
+  python -m bench.plan                               # ../public/data/jobs.db
+  python -m bench.plan --db jobs-seed.db --iterations 5
+  python -m bench.plan --db /tmp/copy.db --apply      # create the suggested indexes, compare
+  python -m bench.plan --db jobs.db --only posts search_like
+"""
+import argparse
+import os
+import re
+import sqlite3
+import statistics
+import time
+
+from crawler.config import PUBLISH_DB_FILE
+
+from .queries import APP_QUERIES, CATEGORY_QUERY
+
+QUERIES = APP_QUERIES + [CATEGORY_QUERY]
+TABLE_REF = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|ORDER\b|LEFT\b|JOIN\b)(\w+))?', re.I)
+EQUALS = re.compile(r'(?:(\w+)\.)?(\w+)\s*=\s*[?$:@]', re.I)
+ORDER_BY = re.compile(r'ORDER\s+BY\s+(.+?)(?:\s+LIMIT\b|\s*$)', re.I | re.S)
+WHERE = re.compile(r'\bWHERE\s+(.+?)(?:\s+ORDER\s+BY\b|\s+GROUP\s+BY\b|\s+LIMIT\b|\s*$)', re.I | re.S)
+
+
+def query_tables(sql: str) -> dict[str, str]:
+    """alias (or name) -> table for the FROM/JOIN clauses of a statement"""
+    aliases = {}
+    for table, alias in TABLE_REF.findall(sql):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+def run(conn: sqlite3.Connection, sql: str, params, iterations: int) -> tuple[float, float, int]:
+    """(first run, median of the runs) in ms, and the row count"""
+    times = []
+    rows = 0
+    for _ in range(max(iterations, 1)):
+        start = time.perf_counter()
+        rows = len(conn.execute(sql, params).fetchall())
+        times.append((time.perf_counter() - start) * 1000)
+    return times[0], statistics.median(times), rows
+
+
+def plan(conn: sqlite3.Connection, sql: str, params) -> list[tuple[int, str]]:
+    """(depth, detail) of every EXPLAIN QUERY PLAN step"""
+    depth = {0: -1}
+    steps = []
+    for node, parent, _, detail in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params):
+        depth[node] = depth.get(parent, -1) + 1
+        steps.append((depth[node], detail))
+    return steps
+
+
+def flag(detail: str, tables: set[str], aliases: dict[str, str]) -> str | None:
+    if detail.startswith('USE TEMP B-TREE'):
+        return 'TEMP B-TREE'
+    words = detail.split()
+    # "SCAN t" with no index; a materialized subquery or a virtual table scan is not a table scan
+    if words[0] == 'SCAN' and len(words) == 2 and aliases.get(words[1], words[1]) in tables:
+        return 'FULL SCAN'
+    return None
+
+
+def indexed_columns(conn: sqlite3.Connection, table: str) -> dict[str, list[str]]:
+    return {name: [column for _, _, column in conn.execute(f'PRAGMA index_info("{name}")')]
+            for _, name, *_ in conn.execute(f'PRAGMA index_list("{table}")')}
+
+
+def rowid_column(conn: sqlite3.Connection, table: str) -> str | None:
+    """The INTEGER PRIMARY KEY column (an alias of rowid), if any"""
+    columns = [row for row in conn.execute(f'PRAGMA table_info("{table}")') if row[5]]
+    if len(columns) == 1 and columns[0][2].upper() == 'INTEGER':
+        return columns[0][1]
+    return None
+
+
+def _plain_columns(order_by: str, names: set[str]) -> list[str]:
+    """Columns of an ORDER BY list on the table known as `names`; [] if it sorts on anything else"""
+    columns = []
+    for item in order_by.split(','):
+        match = re.fullmatch(r'\s*(?:(\w+)\.)?(\w+)(?:\s+(?:ASC|DESC))?\s*', item, re.I)
+        if not match or (match.group(1) and match.group(1) not in names):
+            return []
+        columns.append(match.group(2))
+    return columns
+
+
+def suggest(conn: sqlite3.Connection, sql: str, steps: list[tuple[int, str]],
+            tables: set[str]) -> tuple[list[str], list[str]]:
+    """(CREATE INDEX statements, notes) for the flagged steps of one query"""
+    aliases = query_tables(sql)
+    flags = {flag(detail, tables, aliases) for _, detail in steps} - {None}
+    if not flags:
+        return [], []
+    # The outermost FROM: the table the WHERE and the last ORDER BY apply to
+    outer = sql.rsplit(') AS', 1)[-1] if ') AS' in sql else sql
+    refs = TABLE_REF.findall(outer)
+    if not refs or refs[0][0] not in tables:
+        return [], []
+    table, alias = refs[0]
+    names = {table, alias} - {''}
+    where = WHERE.search(outer)
+    where = where.group(1) if where else ''
+    order = ORDER_BY.findall(outer)
+    notes = []
+    if 'TEMP B-TREE' in flags and order and not _plain_columns(order[-1], names):
+        return [], ['sorts on an expression (e.g. a rank): no index serves it']
+    if re.search(r'\bLIKE\b', where, re.I):
+        notes.append("LIKE '%...%' cannot use an index: the jobs_fts search index serves this search")
+    equal = [column for qualifier, column in EQUALS.findall(where) if not qualifier or qualifier in names]
+    if re.search(r'\bOR\b', where, re.I):
+        equal = []  # One index cannot serve both sides of an OR
+    ordered = _plain_columns(order[-1], names) if order else []
+    if not where and 'LIMIT' not in outer.upper() and (not ordered or ordered == [rowid_column(conn, table)]):
+        notes.append(f'returns every row of {table}: a full scan is the cheapest plan')
+        return [], notes
+    columns = list(dict.fromkeys(equal + ordered))
+    if not columns or columns[0] == rowid_column(conn, table):
+        return [], notes
+    for name, existing in indexed_columns(conn, table).items():
+        if existing[:len(columns)] == columns:
+            notes.append(f'{name} covers ({", ".join(columns)}) but is not used: run ANALYZE')
+            return [], notes
+    return [f'CREATE INDEX idx_{table}_{"_".join(columns)} ON {table}({", ".join(columns)})'], notes
+
+
+def table_sizes(conn: sqlite3.Connection) -> list[tuple]:
+    """(name, table it belongs to, pages, bytes, payload bytes) from dbstat, largest first"""
+    owner = dict(conn.execute('SELECT name, tbl_name FROM sqlite_master'))
+    # FTS5 keeps its index in shadow tables named <table>_data, <table>_idx, ...
+    for (virtual,) in conn.execute("SELECT name FROM sqlite_master WHERE sql LIKE 'CREATE VIRTUAL TABLE%'"):
+        owner.update({name: virtual for name in owner if name.startswith(f'{virtual}_')})
+    return [(name, owner.get(name, name), pages, size, payload) for name, pages, size, payload in conn.execute('''
+        SELECT name, COUNT(*), SUM(pgsize), SUM(payload) FROM dbstat GROUP BY name ORDER BY SUM(pgsize) DESC
+    ''')]
+
+
+def profile(conn: sqlite3.Connection, queries: list, iterations: int) -> tuple[dict, dict]:
+    """Print plan and timing of every query; returns (suggested index -> query names, medians)"""
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    suggestions = {}
+    medians = {}
+    for name, function, sql, params in queries:
+        label = f'{name} ({function})' if function else name
+        try:
+            steps = plan(conn, sql, params)
+        except sqlite3.OperationalError as e:
+            print(f"\n  {label}: {e}")
+            continue
+        first, median, rows = run(conn, sql, params, iterations)
+        medians[name] = median
+        print(f"\n  {label:44} first {first:9.2f} ms  median {median:9.2f} ms  {rows:>7} rows")
+        aliases = query_tables(sql)
+        for depth, detail in steps:
+            mark = flag(detail, tables, aliases)
+            print(f"      {'  ' * depth}{detail}" + (f'   <- {mark}' if mark else ''))
+        indexes, notes = suggest(conn, sql, steps, tables)
+        for note in notes:
+            print(f"      note: {note}")
+        for index in indexes:
+            print(f"      suggest: {index}")
+            suggestions.setdefault(index, []).append(name)
+    return suggestions, medians
+
+
+def print_sizes(conn: sqlite3.Connection):
+    try:
+        sizes = table_sizes(conn)
+    except sqlite3.OperationalError:
+        print("\n[SIZES] dbstat is not compiled into this SQLite")
+        return
+    print(f"\n[SIZES] (dbstat)\n  {'name':38} {'of':20} {'pages':>8} {'KB':>10} {'payload':>8}")
+    for name, owner, pages, size, payload in sizes:
+        print(f"  {name:38} {owner if owner != name else '':20} {pages:8,} {size / 1024:10,.0f} "
+              f"{payload / size if size else 0:8.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN and time the app's queries; suggest missing indexes")
+    parser.add_argument('--db', default=PUBLISH_DB_FILE, help=f'Database (default: {PUBLISH_DB_FILE})')
+    parser.add_argument('--iterations', '-n', type=int, default=20, help='Runs per query; the median is reported')
+    parser.add_argument('--only', nargs='+', choices=[name for name, *_ in QUERIES], help='Queries to profile')
+    parser.add_argument('--apply', action='store_true', help='Create the suggested indexes, ANALYZE, measure again')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f'{args.db} does not exist')
+    conn = sqlite3.connect(args.db if args.apply else f'file:{args.db}?mode=ro', uri=not args.apply)
+    page_size, pages, free = (conn.execute(f'PRAGMA {pragma}').fetchone()[0]
+                              for pragma in ('page_size', 'page_count', 'freelist_count'))
+    queries = [q for q in QUERIES if not args.only or q[0] in args.only]
+    print(f"[PLAN] {args.db}: {pages * page_size / 1024:,.0f} KB, page size {page_size}, {pages:,} pages "
+          f"({free:,} free); {args.iterations} runs per query")
+    suggestions, before = profile(conn, queries, args.iterations)
+    print_sizes(conn)
+
+    if not suggestions:
+        print("\n[PLAN] No missing indexes found")
+    elif not args.apply:
+        print(f"\n[SUGGEST] {len(suggestions)} indexes (--apply creates them in {args.db}; for the published "
+              f"file add them to PUBLISH_INDEXES in crawler/publish.py):")
+        for index, names in suggestions.items():
+            print(f"  {index};  -- {', '.join(names)}")
+    else:
+        print(f"\n[APPLY] Creating {len(suggestions)} indexes")
+        for index in suggestions:
+            start = time.perf_counter()
+            conn.execute(index.replace('CREATE INDEX', 'CREATE INDEX IF NOT EXISTS'))
+            print(f"  {index} ({time.perf_counter() - start:.1f}s)")
+        conn.execute('ANALYZE')
+        conn.commit()
+        changed = {name for names in suggestions.values() for name in names}
+        _, after = profile(conn, [q for q in queries if q[0] in changed], args.iterations)
+        print("\n[APPLY] Median before -> after")
+        for name, *_ in queries:
+            if name in changed and name in after:
+                print(f"  {name:24} {before[name]:9.2f} ms -> {after[name]:9.2f} ms ({before[name] / max(after[name], 1e-9):.1f}x)")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+The SQL src/services/database.js runs against jobs.db, one entry per call
+site, with representative parameters. bench.pages and bench.plan measure
+these; keep the statements identical to database.js when it changes.
+"""
+from crawler.config import CATEGORY_KEYWORDS
+from crawler.database import SEARCH_WEIGHTS, fts_query
+
+FEED_SQL = 'SELECT * FROM jobs ORDER BY crawled_at DESC LIMIT ? OFFSET ?'
+SEARCH_SQL = f'''
+    SELECT jobs.* FROM (
+        SELECT rowid, bm25(jobs_fts, {', '.join(map(str, SEARCH_WEIGHTS))}) AS score
+        FROM jobs_fts WHERE jobs_fts MATCH ? ORDER BY score LIMIT 50
+    ) AS hit JOIN jobs ON jobs.rowid = hit.rowid
+    ORDER BY hit.score
+'''
+
+# (key, database.js function, sql, params); keys are what --only takes
+APP_QUERIES = [
+    ('feed', 'getJobs', FEED_SQL, (100, 0)),
+    ('feed_page11', 'getJobs', FEED_SQL, (100, 1000)),
+    ('salary_filter', 'getJobsBySalary', '''
+        SELECT * FROM jobs WHERE salary_max_vnd >= $min OR salary_min_vnd >= $min
+        ORDER BY crawled_at DESC LIMIT $limit
+    ''', {'min': 30_000_000, 'limit': 100}),
+    ('job_count', 'getJobCount', 'SELECT COUNT(*) as count FROM jobs', ()),
+    ('search', 'searchJobs', SEARCH_SQL, (fts_query('kế toán'),)),
+    # The fallback for a jobs.db without jobs_fts
+    ('search_like', 'searchJobs', '''
+        SELECT * FROM jobs
+        WHERE title LIKE ? OR company LIKE ? OR description LIKE ?
+        ORDER BY crawled_at DESC LIMIT 50
+    ''', ('%kế toán%',) * 3),
+    ('instructors', 'getInstructors', 'SELECT * FROM instructors ORDER BY id', ()),
+    ('stories', 'getStories', 'SELECT * FROM stories ORDER BY id', ()),
+    ('companies', 'getCompanies', 'SELECT * FROM companies ORDER BY id', ()),
+    ('posts', 'getPosts', '''
+        SELECT p.*, i.name as author_name, i.username as author_username,
+               i.avatar as author_avatar, i.category as author_category, i.verified as author_verified
+        FROM posts p
+        LEFT JOIN instructors i ON p.author_id = i.id
+        ORDER BY p.id
+    ''', ()),
+    ('practice_questions', 'getPracticeQuestions', 'SELECT * FROM practice_questions ORDER BY id', ()),
+]
+
+# Not in database.js yet: the category filter a lazy client pushes into SQL
+# instead of filtering every job in memory
+CATEGORY_QUERY = ('category_filter', None,
+                  'SELECT * FROM jobs WHERE category = ? ORDER BY crawled_at DESC LIMIT 100',
+                  (next(iter(CATEGORY_KEYWORDS)),))
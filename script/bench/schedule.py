@@ -0,0 +1,54 @@
+"""
+Scheduler benchmark: crawl N stub categories through the frontier (as
+craw-all.py does) with 1, 2, 4... worker threads and report wall-clock
+time for each pool size.
+
+Usage (from script/):
+  python -m bench.schedule --categories 8 --jobs 3 --latency 1.0
+"""
+import argparse
+import os
+import tempfile
+
+from crawler import crawl_frontier, prioritize, seed_categories, Frontier, TokenBucket
+from crawler.logs import setup_logging
+
+from .crawl import timed
+from .stub_server import start_stub_server
+
+
+def crawl(categories: list[dict], jobs: int, workers: int, state: str) -> list[dict]:
+    frontier = Frontier(state)
+    frontier.reset()
+    seed_categories(frontier, prioritize(categories, jobs))
+    crawled = []
+    try:
+        crawl_frontier(frontier, TokenBucket(rate=1000, burst=workers), workers, on_job=crawled.append)
+    finally:
+        frontier.close()
+    return crawled
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the parallel category scheduler')
+    parser.add_argument('--categories', type=int, default=8)
+    parser.add_argument('--jobs', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=1.0)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    setup_logging('error')  # No per-page log lines while timing
+
+    server, base_url = start_stub_server(args.latency)
+    categories = [{'name': f'cat-{i}', 'url': f'{base_url}/tim-viec-lam-cat-{i}'}
+                  for i in range(args.categories)]
+    print(f"[BENCH] {args.categories} categories x {args.jobs} jobs, latency {args.latency}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            elapsed, jobs = timed(crawl, categories, args.jobs, workers, os.path.join(tmp, f'state-{workers}.db'))
+            print(f"  workers={workers:<3} {elapsed:7.2f}s  {len(jobs)} jobs")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Search benchmark: the frontend's LIKE query vs the jobs_fts index.
+
+One database is grown through each size in turn (synthetic jobs written by
+JobWriter, so the FTS triggers run as they do in a crawl); at each size every
+query is timed with both SQL statements from src/services/database.js.
+
+Usage (from script/):
+  python -m bench.search                          # 10k and 100k rows
+  python -m bench.search --rows 10000 100000 1000000   # 1M takes a few minutes to build
+"""
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from crawler.database import JobWriter, SEARCH_WEIGHTS, fts_query
+
+from .db_write import synthetic_jobs
+
+LIKE_SQL = '''
+    SELECT * FROM jobs
+    WHERE title LIKE ? OR company LIKE ? OR description LIKE ?
+    ORDER BY crawled_at DESC LIMIT 50
+'''
+FTS_SQL = f'''
+    SELECT jobs.* FROM (
+        SELECT rowid, bm25(jobs_fts, {', '.join(map(str, SEARCH_WEIGHTS))}) AS score
+        FROM jobs_fts WHERE jobs_fts MATCH ? ORDER BY score LIMIT 50
+    ) AS hit JOIN jobs ON jobs.rowid = hit.rowid
+    ORDER BY hit.score
+'''
+# Selective, rare, absent, diacritic-free and matching every row
+QUERIES = ['kế toán', 'Công ty 4321', 'python', 'ke toan', 'công việc']
+
+
+def timed_query(conn: sqlite3.Connection, sql: str, params: tuple, repeat: int) -> tuple[float, int]:
+    """Median latency in ms and the number of rows returned"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = conn.execute(sql, params).fetchall()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, len(rows)
+
+
+def index_size(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'jobs_fts%'").fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark LIKE vs FTS5 job search')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'jobs.db')
+        jobs = synthetic_jobs(max(args.rows))
+        written = 0
+        for size in sorted(args.rows):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()), JobWriter(db_file, batch_size=5000) as writer:
+                for _ in range(size - written):
+                    writer.add(next(jobs))
+            written = size
+            conn = sqlite3.connect(db_file)
+            print(f"\n[BENCH] {size} rows (grown in {time.perf_counter() - start:.1f}s), "
+                  f"db {os.path.getsize(db_file) / 1e6:.0f} MB, index {index_size(conn) / 1e6:.0f} MB")
+            for query in QUERIES:
+                term = f'%{query}%'
+                like_ms, like_rows = timed_query(conn, LIKE_SQL, (term, term, term), args.repeat)
+                fts_ms, fts_rows = timed_query(conn, FTS_SQL, (fts_query(query),), args.repeat)
+                print(f"  {query!r:16} LIKE {like_ms:9.2f} ms ({like_rows:2} rows)   "
+                      f"FTS {fts_ms:9.2f} ms ({fts_rows:2} rows)   {like_ms / fts_ms:7.1f}x")
+            conn.close()
+
+
+if __name__ == '__main__':
+    main()
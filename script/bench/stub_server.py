@@ -0,0 +1,165 @@
+"""
+Local stub of TopCV for benchmarks.
+
+Serves refer/main.html for listing URLs (/tim-viec-lam-...) and refer/job.html
+for everything else, after a configurable artificial latency. Links in the
+listing page are rewritten to point back at the stub. Listings have `pages`
+pages (?page=N), each with its own job URLs; the last one has no next link. Responses carry an ETag
+(answered with 304 on If-None-Match) and are gzipped when the client asks.
+
+Fault injection, for the fetch layer's retries, adaptive rate and circuit breaker:
+  error_rate  this fraction of requests fails: 503 (with Retry-After: 1 every
+              other time), 500, or the connection is closed without a response
+  capacity    requests/sec served; above it the answer is 429 with Retry-After: 1
+  outage      (start, duration) in seconds after start-up during which every
+              request gets a 503
+Faults are drawn from a seeded random generator.
+"""
+import argparse
+import collections
+import gzip
+import hashlib
+import random
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+REFER_DIR = Path(__file__).resolve().parent.parent / 'refer'
+TOPCV_ORIGIN = 'https://www.topcv.vn'
+PAGE_PARAM = re.compile(r'[?&]page=(\d+)')
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency)
+        with server.lock:
+            server.requests += 1
+        fault = _fault(server)
+        if fault == 'drop':
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        if fault:
+            status, retry_after = fault
+            self.send_response(status)
+            if retry_after:
+                self.send_header('Retry-After', str(retry_after))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.path.startswith('/tim-viec-lam'):
+            match = PAGE_PARAM.search(self.path)
+            page = server.listings.get(int(match.group(1)) if match else 1, server.empty)
+        else:
+            page = server.detail
+        if self.headers.get('If-None-Match') == page['etag']:
+            self.send_response(304)
+            self.send_header('ETag', page['etag'])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+        body = page['gzip'] if gzipped else page['body']
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('ETag', page['etag'])
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _fault(server) -> tuple[int, int | None] | str | None:
+    """(status, Retry-After), 'drop', or None to serve the page"""
+    with server.lock:
+        now = time.monotonic()
+        if server.outage and 0 <= now - server.started - server.outage[0] < server.outage[1]:
+            server.faults[503] += 1
+            return 503, None
+        draw = server.random.random()
+        if draw < server.error_rate:
+            kind = server.random.choice((503, 503, 500, 'drop'))
+            server.faults[kind] += 1
+            if kind == 'drop':
+                return kind
+            return kind, 1 if kind == 503 and server.faults[503] % 2 else None
+        if server.capacity:
+            served = server.served
+            while served and now - served[0] >= 1:
+                served.popleft()
+            if len(served) >= server.capacity:
+                server.faults[429] += 1
+                return 429, 1
+            served.append(now)
+    return None
+
+
+def _page(body: bytes) -> dict:
+    return {'body': body, 'gzip': gzip.compress(body, 6), 'etag': '"%s"' % hashlib.md5(body).hexdigest()}
+
+
+def _listing_pages(html: str, pages: int) -> dict[int, dict]:
+    """Page N links to job URLs of its own and to page N + 1"""
+    listings = {}
+    for number in range(1, pages + 1):
+        body = html if number == 1 else html.replace('/viec-lam/', f'/viec-lam/p{number}-')
+        body = body.replace('?page=2"', f'?page={number + 1}"')
+        if number == pages:
+            body = body.replace('rel="next"', 'rel="nofollow"')
+        listings[number] = _page(body.encode())
+    return listings
+
+
+def start_stub_server(latency: float = 0.2, port: int = 0, pages: int = 5, error_rate: float = 0.0,
+                      capacity: float | None = None, outage: tuple[float, float] | None = None,
+                      seed: int = 0) -> tuple[ThreadingHTTPServer, str]:
+    """Start the stub in a daemon thread. Returns (server, base_url); server.faults counts the injected faults."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.daemon_threads = True
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    server.latency = latency
+    server.requests = 0
+    server.lock = threading.Lock()
+    server.error_rate = error_rate
+    server.capacity = capacity
+    server.outage = outage
+    server.random = random.Random(seed)
+    server.served = collections.deque()
+    server.faults = collections.Counter()
+    server.started = time.monotonic()
+    listing = (REFER_DIR / 'main.html').read_text(encoding='utf-8').replace(TOPCV_ORIGIN, base_url)
+    server.listings = _listing_pages(listing, pages)
+    server.empty = _page(b'<html><body></body></html>')
+    server.detail = _page((REFER_DIR / 'job.html').read_bytes())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, base_url
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local TopCV stub for benchmarks')
+    parser.add_argument('latency', nargs='?', type=float, default=0.2, help='Seconds before every response')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with an error')
+    parser.add_argument('--capacity', type=float, default=None, help='Requests/sec served, 429 above it')
+    parser.add_argument('--outage', type=float, nargs=2, metavar=('START', 'DURATION'),
+                        help='Answer every request with 503 during this window (seconds after start-up)')
+    args = parser.parse_args()
+    srv, url = start_stub_server(args.latency, port=args.port, error_rate=args.error_rate,
+                                 capacity=args.capacity, outage=args.outage)
+    print(f"[STUB] Serving on {url} (latency {args.latency}s, error rate {args.error_rate}, "
+          f"capacity {args.capacity or 'unlimited'}), Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -0,0 +1,275 @@
+"""
+Benchmark suite with regression gates for the crawler's hot paths.
+
+Every case reports a throughput (higher is better) and is compared with
+bench/baseline.json; the run fails (exit 1) when a case drops more than
+--threshold below its baseline. Each case is measured --rounds times and
+the best round counts, which is the least noisy estimate on a shared box.
+
+Raw throughput depends on the machine and on whatever else it is doing, so
+every round is preceded by a short fixed pure-Python loop (calibration) and
+cases are compared on throughput / calibration speed. A baseline recorded on
+a faster laptop, or a round slowed down by a busy neighbour, still compares.
+
+Cases use the refer/*.html fixtures, inflated copies of them (4x the job
+cards, 20x the description sections) and synthetic jobs; the end-to-end
+crawl runs against the local stub server with no added latency.
+
+Usage (from script/):
+  python -m bench.suite                      # run, compare, exit 1 on regression
+  python -m bench.suite --only parse_detail crawl_e2e
+  python -m bench.suite --update             # record the results as the new baseline
+  python -m bench.suite --threshold 0.1 --rounds 5
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date
+from operator import itemgetter
+from pathlib import Path
+
+from crawler import crawl_jobs_concurrent, set_fetch_policy, ADAPTIVE_MAX_RATE
+from crawler.database import JobWriter, connect, save_jobs_to_db
+from crawler.parser import detect_category, parse_job_detail, parse_job_list
+
+from .category import corpus
+from .db_write import synthetic_jobs
+from .parse import DETAIL_URL
+from .stub_server import REFER_DIR, start_stub_server
+
+BASELINE_FILE = Path(__file__).resolve().parent / 'baseline.json'
+THRESHOLD = 0.2
+ROUND_SECONDS = 1.0
+CALIBRATION_SECONDS = 0.25
+
+
+def inflate(html: str, start: str, end: str, times: int) -> str:
+    """Repeat the part of `html` from `start` up to `end`"""
+    i, j = html.index(start), html.index(end)
+    return html[:i] + html[i:j] * times + html[j:]
+
+
+def repeat(fn, seconds: float = ROUND_SECONDS) -> tuple[int, float]:
+    """Call fn() until `seconds` have passed; (calls, elapsed)"""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn()
+        count += 1
+    return count, time.perf_counter() - start
+
+
+def fresh_db(tmp: str) -> str:
+    """Empty working database with the schema in place (not part of the timing)"""
+    db_file = os.path.join(tmp, f'jobs-{time.perf_counter_ns()}.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        connect(db_file).close()
+    return db_file
+
+
+def mock_rows(rows: list[dict], n: int) -> list[dict]:
+    """n copies of the template rows with unique ids (and usernames)"""
+    copies = []
+    for i in range(n):
+        row = {**rows[i % len(rows)], 'id': i + 1}
+        if row.get('username'):
+            row['username'] = f"{row['username']}{i}"
+        copies.append(row)
+    return copies
+
+
+class Fixtures:
+    def __init__(self, tmp: str):
+        self.tmp = tmp
+        self.listing = (REFER_DIR / 'main.html').read_text(encoding='utf-8')
+        self.detail = (REFER_DIR / 'job.html').read_text(encoding='utf-8')
+        self.big_listing = inflate(self.listing, '<div class="job-item-search-result',
+                                   '<nav class="box-pagination">', 4)
+        self.big_detail = inflate(self.detail, '<div class="job-description__item">',
+                                  '<div class="job-description__item job-detail-section requirement">', 20)
+        self.docs = corpus(2000)
+        self.jobs = list(synthetic_jobs(20_000))
+        template = json.loads((REFER_DIR.parent / 'mock_data_template.json').read_text(encoding='utf-8'))
+        self.mock = {table: mock_rows(rows, 5000) for table, rows in template.items()}
+        self.stub = None
+
+    def stub_url(self) -> str:
+        if self.stub is None:
+            self.stub = start_stub_server(latency=0, pages=5)
+        return f'{self.stub[1]}/tim-viec-lam-nhan-vien-kinh-doanh'
+
+
+def _loop():
+    total = 0
+    for i in range(100_000):
+        total += i * i % 7
+    return total
+
+
+def calibration() -> float:
+    """Machine speed right now, in loops/s"""
+    calls, elapsed = repeat(_loop, CALIBRATION_SECONDS)
+    return calls / elapsed
+
+
+def parse_list(fx: Fixtures):
+    return repeat(lambda: parse_job_list(fx.listing))
+
+
+def parse_list_inflated(fx: Fixtures):
+    cards = len(parse_job_list(fx.big_listing))
+    calls, elapsed = repeat(lambda: parse_job_list(fx.big_listing))
+    return calls * cards, elapsed
+
+
+def parse_detail(fx: Fixtures):
+    return repeat(lambda: parse_job_detail(fx.detail, DETAIL_URL))
+
+
+def parse_detail_inflated(fx: Fixtures):
+    return repeat(lambda: parse_job_detail(fx.big_detail, DETAIL_URL))
+
+
+def category(fx: Fixtures):
+    start = time.perf_counter()
+    for title, description in fx.docs:
+        detect_category(title, description)
+    return len(fx.docs), time.perf_counter() - start
+
+
+def save_jobs(fx: Fixtures):
+    db_file = fresh_db(fx.tmp)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(0, len(fx.jobs), 500):
+            save_jobs_to_db(fx.jobs[i:i + 500], db_file)
+    return len(fx.jobs), time.perf_counter() - start
+
+
+def job_writer(fx: Fixtures):
+    db_file = fresh_db(fx.tmp)
+    start = time.perf_counter()
+    with JobWriter(db_file) as writer:
+        for job in fx.jobs:
+            writer.add(job)
+    return len(fx.jobs), time.perf_counter() - start
+
+
+def insert_mock(fx: Fixtures):
+    import insert_mock_data as mock
+    conn = sqlite3.connect(os.path.join(fx.tmp, f'mock-{time.perf_counter_ns()}.db'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        mock.create_tables(conn)
+    inserts = {'instructors': mock.insert_instructors, 'stories': mock.insert_stories,
+               'companies': mock.insert_companies, 'posts': mock.insert_posts,
+               'practice_questions': mock.insert_practice_questions}
+    start = time.perf_counter()
+    rows = sum(insert(conn, fx.mock[table]) for table, insert in inserts.items())
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return rows, elapsed
+
+
+def crawl_e2e(fx: Fixtures):
+    url = fx.stub_url()
+    # The crawler's own overhead: the adaptive rate starts at the caller's, so nothing paces but the stub
+    set_fetch_policy(rate=10_000)
+    start = time.perf_counter()
+    try:
+        jobs = crawl_jobs_concurrent(url, 30, concurrency=8, rate=10_000)
+    finally:
+        set_fetch_policy(rate=ADAPTIVE_MAX_RATE)
+    return len(jobs), time.perf_counter() - start
+
+
+# name -> (function, unit)
+CASES = {
+    'parse_list': (parse_list, 'pages/s'),
+    'parse_list_inflated': (parse_list_inflated, 'cards/s'),
+    'parse_detail': (parse_detail, 'pages/s'),
+    'parse_detail_inflated': (parse_detail_inflated, 'pages/s'),
+    'detect_category': (category, 'docs/s'),
+    'save_jobs_to_db': (save_jobs, 'rows/s'),
+    'job_writer': (job_writer, 'rows/s'),
+    'insert_mock_data': (insert_mock, 'rows/s'),
+    'crawl_e2e': (crawl_e2e, 'jobs/s'),
+}
+
+
+def measure(fx: Fixtures, name: str, rounds: int) -> tuple[float, float]:
+    """(throughput, throughput per calibration loop/s) of the best round"""
+    fn, _ = CASES[name]
+    best = (0.0, 0.0)
+    for _ in range(rounds):
+        speed = calibration()
+        count, elapsed = fn(fx)
+        rate = count / elapsed
+        best = max(best, (rate, rate / speed), key=itemgetter(1))
+    return best
+
+
+def load_baseline(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the benchmark suite and gate on regressions')
+    parser.add_argument('--only', nargs='+', choices=list(CASES), help='Cases to run (default: all)')
+    parser.add_argument('--rounds', type=int, default=5, help='Rounds per case; the best one counts')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='Allowed drop below baseline before failing (0.2 = 20%%)')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE)
+    parser.add_argument('--update', action='store_true', help='Save the results as the new baseline')
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    recorded = baseline.get('results', {})
+    results = {}
+    failed = []
+    print(f"[BENCH] {platform.python_implementation()} {platform.python_version()}, "
+          f"{args.rounds} rounds per case, baseline from {baseline.get('recorded', '-')}; "
+          f"change is measured against machine speed")
+    print(f"\n  {'case':24} {'result':>14} {'baseline':>14} {'change':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        fx = Fixtures(tmp)
+        for name in args.only or CASES:
+            rate, score = results[name] = measure(fx, name, args.rounds)
+            line = f"  {name:24} {rate:14,.1f}"
+            if name in recorded:
+                change = score / recorded[name]['score'] - 1
+                line += f" {recorded[name]['value']:14,.1f} {change:+8.1%}"
+                if change < -args.threshold:
+                    failed.append(name)
+                    line += '  REGRESSION'
+            else:
+                line += f" {'-':>14} {'':>8}"
+            print(f"{line}  {CASES[name][1]}")
+        if fx.stub:
+            fx.stub[0].shutdown()
+
+    if args.update:
+        recorded.update({name: {'value': round(rate, 1), 'score': round(score, 6), 'unit': CASES[name][1]}
+                         for name, (rate, score) in results.items()})
+        baseline = {'recorded': date.today().isoformat(), 'python': platform.python_version(),
+                    'machine': platform.machine(), 'results': recorded}
+        args.baseline.write_text(json.dumps(baseline, indent=2) + '\n', encoding='utf-8')
+        print(f"\n[BASELINE] Saved {len(results)} results to {args.baseline}")
+    elif failed:
+        print(f"\n[FAIL] {len(failed)} regressed more than {args.threshold:.0%}: {', '.join(failed)}")
+        sys.exit(1)
+    else:
+        print(f"\n[OK] No case regressed more than {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
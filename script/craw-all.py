@@ -2,60 +2,236 @@
 Crawl all categories from config-craw.json
 
 Usage:
-  python craw-all.py 10    # Crawl 10 jobs per category
-  python craw-all.py 20    # Crawl 20 jobs per category
-  python craw-all.py 30    # Crawl 30 jobs per category
+  python craw-all.py 10                 # Crawl 10 jobs per category
+  python craw-all.py 20                 # Crawl 20 jobs per category
+  python craw-all.py 30 -c 5            # Crawl 30 jobs per category, up to 5 requests in flight per host
+  python craw-all.py 30 -w 4 --rate 8   # 4 worker threads, 8 requests/sec overall
+  python craw-all.py 30 -w 4 --max-requests 200   # Stop after 200 requests in total
+  python craw-all.py 30 --no-adaptive --rate 1     # Fixed rate, no AIMD
+  python craw-all.py 30 --conditional   # Skip detail pages unchanged since last crawl (HTTP 304)
+  python craw-all.py 30 --incremental   # Nightly re-crawl: only fetch jobs not yet in jobs.db (or changed)
+  python craw-all.py 30 -w 4 -p 4       # Parse pages on 4 processes while fetching
+  python craw-all.py 30 -o jobs.ndjson.zst   # Compressed NDJSON output (.gz / .zst)
+  python craw-all.py 30 -w 4 --resume   # Continue an interrupted run where it stopped
+  python craw-all.py 30 -w 4 --join     # Extra process working on a running crawl's frontier
+  python craw-all.py 30 --no-dedup      # Fetch every listed job, even duplicates
+  python craw-all.py 30 --no-archive    # Do not keep the fetched HTML
+  python craw-all.py 30 --metrics crawl.prom --report crawl.json   # Run metrics (Prometheus / JSON)
+  python craw-all.py 30 --log-level debug --log-json               # Every fetch, as JSON lines
+  python craw-all.py 30 --profile --trace-malloc                   # cProfile / tracemalloc into profiles/
+  python craw-all.py 30 --shard 0/4     # Node 0 of 4: its slice of the categories, into jobs.shard-0-of-4.db
+  python craw-all.py 30 --shard 2/4 --shard-by url   # Every listing, only the job URLs hashing to 2
+
+Every listing and job URL is tracked in a frontier table (crawl_state.db):
+pending -> claimed -> fetched -> parsed -> stored, with retry counts and the
+last error, so a run that dies keeps everything already stored. Worker
+threads claim URLs from it in category priority order; --concurrency caps
+the requests in flight per host across all of them.
+
+Jobs listed under several categories are fetched once, and cards with the
+title, company, location and salary of a job already stored under another
+URL are not fetched at all; every stored job gets a canonical_id, shared by
+near-duplicate postings (see crawler/dedup.py).
+
+Every fetched page is kept in a compressed, content-addressed archive
+(archive/, see crawler/archive.py); `python reparse.py --archive` re-parses
+it with the current parser without touching the network.
+
+Requests to each host are paced by an adaptive rate (AIMD: starts at --rate,
+halved on 429s, 503s and timeouts, back up towards --rate while it answers);
+429, 5xx and network errors are retried with backoff, honouring Retry-After,
+and a host that keeps failing is left alone for a while by a circuit breaker
+(see crawler/client.py).
+
+With --shard i/n, n nodes (or processes) split the crawl by a stable hash
+of the URL and each writes its own database, frontier and output
+(jobs.shard-i-of-n.db, ...); `python merge-shards.py` folds the shard
+databases into jobs.db (see crawler/shard.py).
+
+Categories in config-craw.json may set "priority" (higher starts first)
+and "max_jobs" (overrides the per-category number given on the command line).
 """
+import argparse
 import json
-import sys
+import os
+from contextlib import ExitStack
+from datetime import datetime
 
-from crawler import crawl_jobs, save_jobs_to_db, JSON_FILE
+from crawler import (crawl_frontier, load_fingerprints, prioritize, print_host_stats, seed_categories,
+                     open_archive, set_archive, set_fetch_policy, ADAPTIVE_MAX_RATE, ARCHIVE_DIR, DB_FILE,
+                     FETCH_RETRIES, JSON_FILE, PROFILE_DIR, RATE_BURST, STATE_DB_FILE,
+                     DedupIndex, Frontier, JobWriter, NDJSONWriter, ParsePipeline, TokenBucket, iter_jobs_file)
+from crawler.logs import setup_logging
+from crawler.metrics import write_report, write_textfile
+from crawler.profiling import profile_threads, trace_malloc
+from crawler.shard import SHARD_BY, parse_shard, shard_file
 
 CONFIG_FILE = 'config-craw.json'
 
 
+def resume_parsed(frontier: Frontier, writer: JobWriter, path: str) -> int:
+    """Jobs already in the NDJSON output but not in the DB: store them instead of refetching"""
+    parsed = frontier.urls('job', 'parsed')
+    if not parsed or not os.path.exists(path):
+        return 0
+    for job in iter_jobs_file(path):
+        if job.get('url') in parsed:
+            writer.add(job)
+    writer.flush()
+    return len(parsed - frontier.urls('job', 'parsed'))
+
+
 def main():
-    max_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    parser = argparse.ArgumentParser(description='Crawl all categories from config-craw.json')
+    parser.add_argument('max_jobs', nargs='?', type=int, default=10, help='Jobs per category')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='Worker threads claiming listing/job URLs from the frontier')
+    parser.add_argument('--concurrency', '-c', type=int, default=None,
+                        help='Up to N requests in flight per host (at least N worker threads are started)')
+    parser.add_argument('--rate', type=float, default=None,
+                        help=f'Max requests per second across all workers (default: {ADAPTIVE_MAX_RATE:g}, '
+                             f'1 with --no-adaptive)')
+    parser.add_argument('--max-requests', type=int, default=None,
+                        help='Global request budget for the whole run')
+    parser.add_argument('--retries', type=int, default=FETCH_RETRIES,
+                        help='Retries of a request after a 429, 5xx or network error')
+    parser.add_argument('--no-adaptive', action='store_true',
+                        help='Do not back off per host on 429s, 503s and timeouts (AIMD)')
+    parser.add_argument('--conditional', action='store_true',
+                        help='Send stored ETag/Last-Modified and skip unchanged detail pages')
+    parser.add_argument('--incremental', '-i', action='store_true',
+                        help='Only fetch jobs not yet in jobs.db or whose listing card changed')
+    parser.add_argument('--parse-workers', '-p', type=int, default=None,
+                        help='Parse detail pages on N processes, decoupled from fetching')
+    parser.add_argument('--output', '-o', default=JSON_FILE,
+                        help='NDJSON file every job is appended to; .gz/.zst are compressed')
+    parser.add_argument('--config', default=CONFIG_FILE, help='Categories config file')
+    parser.add_argument('--db', default=DB_FILE, help='SQLite database to write to')
+    parser.add_argument('--state', default=STATE_DB_FILE, help='SQLite file holding the crawl frontier')
+    parser.add_argument('--no-dedup', action='store_true',
+                        help='Do not skip duplicate cards or cluster near-duplicate jobs')
+    parser.add_argument('--archive', default=ARCHIVE_DIR, help='Directory every fetched page is archived to')
+    parser.add_argument('--no-archive', action='store_true', help='Do not archive fetched pages')
+    parser.add_argument('--log-level', default='info', choices=['debug', 'info', 'warning', 'error'],
+                        help='debug also logs every fetch')
+    parser.add_argument('--log-json', action='store_true', help='Log JSON lines instead of text')
+    parser.add_argument('--metrics', help='Write run metrics to this Prometheus textfile')
+    parser.add_argument('--report', help='Write a JSON run report (metrics, percentiles, totals) to this file')
+    parser.add_argument('--profile', action='store_true', help=f'cProfile the run into {PROFILE_DIR}/')
+    parser.add_argument('--trace-malloc', action='store_true',
+                        help=f'Trace memory allocations, top sites into {PROFILE_DIR}/')
+    parser.add_argument('--shard', type=parse_shard, metavar='I/N',
+                        help='Crawl slice I of N (0-based); --db, --state and --output default to per-shard files')
+    parser.add_argument('--shard-by', choices=SHARD_BY, default='category',
+                        help='Slice the categories (default) or the job URLs of every category')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--resume', action='store_true',
+                      help='Continue the last run: requeue unfinished URLs, append to the output')
+    mode.add_argument('--join', action='store_true',
+                      help='Work on a frontier another process is crawling (no reset, no requeue)')
+    args = parser.parse_args()
+    setup_logging(args.log_level, args.log_json)
+    if args.rate is None:
+        args.rate = 1.0 if args.no_adaptive else ADAPTIVE_MAX_RATE
+    set_fetch_policy(args.retries, not args.no_adaptive, args.rate)
+    if args.shard:
+        for option, default in (('db', DB_FILE), ('state', STATE_DB_FILE), ('output', JSON_FILE)):
+            if getattr(args, option) == default:
+                setattr(args, option, shard_file(default, args.shard))
+    
+    run = datetime.now().strftime('%Y%m%d-%H%M%S')
+    with ExitStack() as stack:
+        if args.profile or args.trace_malloc:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+        if args.trace_malloc:
+            stack.enter_context(trace_malloc(os.path.join(PROFILE_DIR, f'crawl-{run}.malloc.txt')))
+        if args.profile:
+            stack.enter_context(profile_threads(os.path.join(PROFILE_DIR, f'crawl-{run}.prof')))
+        summary = crawl(args)
+    if args.metrics:
+        write_textfile(args.metrics)
+        print(f"[METRICS] {args.metrics}")
+    if args.report:
+        write_report(args.report, {'run': run, 'args': vars(args), **summary})
+        print(f"[REPORT] {args.report}")
+
+
+def crawl(args) -> dict:
+    """One crawl run; returns the totals for the run report"""
+    max_jobs = args.max_jobs
     
     # Load config
-    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+    with open(args.config, 'r', encoding='utf-8') as f:
         config = json.load(f)
     
     categories = config.get('categories', [])
     print(f"\n{'='*60}")
     print(f"CRAWL ALL - {max_jobs} jobs per category")
     print(f"{'='*60}")
-    print(f"Categories: {len(categories)}\n")
-    
-    all_jobs = []
-    
-    # Loop through categories and call crawl_jobs
-    for i, cat in enumerate(categories):
-        name = cat.get('name', 'Unknown')
-        url = cat.get('url', '')
-        
-        print(f"[{i+1}/{len(categories)}] {name}")
-        
-        if not url:
-            print("  [SKIP] No URL")
-            continue
-        
-        jobs = crawl_jobs(url, max_jobs)
-        all_jobs.extend(jobs)
-        print(f"  [OK] {len(jobs)} jobs\n")
-    
-    # Save all to JSON
-    with open(JSON_FILE, 'w', encoding='utf-8') as f:
-        json.dump(all_jobs, f, ensure_ascii=False, indent=2)
-    print(f"[JSON] Saved {len(all_jobs)} jobs to {JSON_FILE}")
-    
-    # Save to database
-    inserted = save_jobs_to_db(all_jobs)
-    print(f"[DB] Inserted {inserted} jobs")
+    print(f"Categories: {len(categories)}, workers: {args.workers}\n")
+    
+    frontier = Frontier(args.state)
+    if not (args.resume or args.join):
+        frontier.reset()
+        seeded = seed_categories(frontier, prioritize(categories, max_jobs), args.shard, args.shard_by)
+        if args.shard:
+            print(f"[SHARD] {args.shard[0]}/{args.shard[1]} by {args.shard_by}: {seeded} categories -> {args.db}")
+    
+    # One connection for the whole run; a job is 'stored' once its batch is committed
+    writer = JobWriter(args.db, on_flush=lambda urls: frontier.mark_many(urls, 'stored'))
+    # Loaded once JobWriter has migrated the schema
+    dedup = None if args.no_dedup else DedupIndex.load(args.db)
+    writer.dedup = dedup
+    if args.resume:
+        print(f"[RESUME] Stored {resume_parsed(frontier, writer, args.output)} jobs parsed by the last run")
+        print(f"[RESUME] Requeued {frontier.requeue_unfinished()} unfinished URLs")
+    out = NDJSONWriter(args.output, append=args.resume or args.join)
+    archive = None if args.no_archive else open_archive(args.archive)
+    set_archive(archive)
+    
+    def on_job(job):
+        # Called for every parsed job (worker threads, or the pipeline's writer thread)
+        out.write(job)
+        writer.add(job)
+    
+    threads = max(args.workers, args.concurrency or 1)
+    # One bucket for the whole run so the rate limit holds across workers
+    bucket = TokenBucket(args.rate, max(RATE_BURST, threads), args.max_requests)
+    known = load_fingerprints(args.db) if args.incremental else None
+    pipeline = ParsePipeline(on_job, args.parse_workers) if args.parse_workers else None
+    try:
+        crawl_frontier(frontier, bucket, threads, args.conditional, known, pipeline, on_job, dedup,
+                       args.concurrency)
+    finally:
+        # Also on Ctrl+C: whatever was parsed is stored and marked, the rest is resumable
+        if pipeline:
+            pipeline.close()
+        writer.close()
+        out.close()
+        set_archive(None)
+        archived = archive.stats() if archive else None
+        if archive:
+            archive.close()
+        counts = frontier.counts()
+        frontier.close()
+    print(f"\n[DB] Inserted {writer.written} jobs ({bucket.issued} requests)")
+    print(f"[JSON] Saved {out.count} jobs to {args.output}")
+    if archived:
+        print(f"[ARCHIVE] {archived['pages']} pages from {archived['fetches']} fetches, "
+              f"{archived['bytes_stored'] / 1024 / 1024:.1f} MB ({archived['bytes'] / 1024 / 1024:.1f} MB of HTML) "
+              f"in {args.archive}")
+    if dedup:
+        print(f"[DEDUP] {dedup.skipped} duplicate cards not fetched, "
+              f"{dedup.duplicates} near-duplicate jobs in the index")
+    for kind, statuses in sorted(counts.items()):
+        print(f"[FRONTIER] {kind}: " + ', '.join(f"{status} {n}" for status, n in sorted(statuses.items())))
+    print_host_stats()
     
     print(f"\n{'='*60}")
-    print(f"DONE: {len(all_jobs)} total jobs")
-    print(f"{'='*60}\n")
+    print(f"DONE: {out.count} total jobs")
+    print(f"{'='*60}")
+    print("[NEXT] python publish.py   # update public/data/jobs.db for the web app\n")
+    return {'jobs': out.count, 'stored': writer.written, 'requests': bucket.issued, 'frontier': counts}
 
 
 if __name__ == '__main__':
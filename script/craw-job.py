@@ -2,55 +2,103 @@
 TopCV Job Crawler
 
 Usage:
-  python craw-job.py <url> <max_jobs>   # Crawl jobs from URL
-  python craw-job.py step2              # JSON -> SQLite (jobs.db)
+  python craw-job.py <url> <max_jobs>                  # Crawl jobs from URL
+  python craw-job.py <url> <max_jobs> --concurrency 5  # Fetch detail pages concurrently
+  python craw-job.py <url> <max_jobs> --conditional    # Skip pages unchanged since last crawl (HTTP 304)
+  python craw-job.py <url> <max_jobs> --incremental    # Only fetch jobs not yet in jobs.db (or changed)
+  python craw-job.py <url> <max_jobs> -o jobs.ndjson.gz  # Compressed output (.gz / .zst)
+  python craw-job.py <url> <max_jobs> --no-adaptive    # Fixed one request/sec instead of the adaptive rate
+  python craw-job.py step2                             # NDJSON -> SQLite (jobs.db)
+
+Every fetched page is kept in archive/ (see reparse.py --archive); --no-archive skips that.
 
 Examples:
   python craw-job.py https://www.topcv.vn/tim-viec-lam-ke-toan 10
+  python craw-job.py https://www.topcv.vn/tim-viec-lam-ke-toan 30 -c 5 --rate 5
   python craw-job.py step2
+  python craw-job.py step2 -o jobs_output.json         # Legacy JSON array files still load
 """
-import json
-import sys
+import argparse
+import os
 
-from crawler import crawl_jobs, save_jobs_to_db, JSON_FILE
+from crawler import (crawl_jobs, crawl_jobs_concurrent, load_fingerprints, print_host_stats, iter_jobs_file,
+                     set_archive, set_fetch_policy, DB_FILE, FETCH_RETRIES, JSON_FILE, RATE_LIMIT, DedupIndex,
+                     JobWriter, NDJSONWriter, open_archive)
+from crawler.logs import setup_logging
 
 
-def crawl_to_json(url: str, max_jobs: int) -> list[dict]:
-    """Crawl jobs from URL and save to JSON"""
+def crawl_to_json(url: str, max_jobs: int, concurrency: int | None = None,
+                  rate: float = RATE_LIMIT, conditional: bool = False,
+                  incremental: bool = False, output: str = JSON_FILE, archive: bool = True) -> int:
+    """Crawl jobs from URL, appending each job to the NDJSON output as it is parsed"""
     print(f"\n[CRAWL] {url} (max: {max_jobs})")
     
-    jobs = crawl_jobs(url, max_jobs)
-    
-    with open(JSON_FILE, 'w', encoding='utf-8') as f:
-        json.dump(jobs, f, ensure_ascii=False, indent=2)
+    known = load_fingerprints() if incremental else None
+    store = open_archive() if archive else None
+    set_archive(store)
+    with NDJSONWriter(output) as out:
+        options = {'conditional': conditional, 'known': known, 'on_job': out.write}
+        try:
+            if concurrency:
+                crawl_jobs_concurrent(url, max_jobs, concurrency, rate, **options)
+            else:
+                crawl_jobs(url, max_jobs, **options)
+        finally:
+            set_archive(None)
+            if store:
+                store.close()
+    print_host_stats()
     
-    print(f"[DONE] Saved {len(jobs)} jobs to {JSON_FILE}")
-    return jobs
+    print(f"[DONE] Saved {out.count} jobs to {output}")
+    return out.count
 
 
-def json_to_db():
-    """Load JSON and save to database"""
-    print(f"\n[DB] Loading {JSON_FILE}...")
+def json_to_db(path: str = JSON_FILE):
+    """Stream NDJSON (or legacy JSON) into the database in batches"""
+    print(f"\n[DB] Loading {path}...")
     
-    try:
-        with open(JSON_FILE, 'r', encoding='utf-8') as f:
-            jobs = json.load(f)
-    except FileNotFoundError:
-        print(f"[ERROR] {JSON_FILE} not found!")
+    if not os.path.exists(path):
+        print(f"[ERROR] {path} not found!")
         return
     
-    inserted = save_jobs_to_db(jobs)
+    with JobWriter() as writer:
+        writer.dedup = DedupIndex.load(DB_FILE)
+        inserted = writer.write(iter_jobs_file(path))
     print(f"[DONE] Inserted {inserted} jobs to database")
+    print("[NEXT] python publish.py   # update public/data/jobs.db for the web app")
 
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print(__doc__)
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='TopCV job crawler',
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog=__doc__)
+    parser.add_argument('target', help='Category URL to crawl, or "step2" to load the output into SQLite')
+    parser.add_argument('max_jobs', nargs='?', type=int, default=10, help='Max jobs to crawl')
+    parser.add_argument('--concurrency', '-c', type=int, default=None,
+                        help='Fetch detail pages concurrently with N requests per host')
+    parser.add_argument('--rate', type=float, default=RATE_LIMIT,
+                        help='Max requests per second in concurrent mode')
+    parser.add_argument('--conditional', action='store_true',
+                        help='Send stored ETag/Last-Modified and skip unchanged detail pages')
+    parser.add_argument('--incremental', '-i', action='store_true',
+                        help='Only fetch jobs not yet in jobs.db or whose listing card changed')
+    parser.add_argument('--output', '-o', default=JSON_FILE,
+                        help='NDJSON file to write (crawl) or read (step2); .gz/.zst are compressed')
+    parser.add_argument('--no-archive', action='store_true',
+                        help='Do not keep fetched pages in the HTML archive (see reparse.py --archive)')
+    parser.add_argument('--retries', type=int, default=FETCH_RETRIES,
+                        help='Retries of a request after a 429, 5xx or network error')
+    parser.add_argument('--no-adaptive', action='store_true',
+                        help='Do not back off on 429s, 503s and timeouts (AIMD), one request/sec sequentially')
+    parser.add_argument('--log-level', default='info', choices=['debug', 'info', 'warning', 'error'],
+                        help='debug also logs every fetch')
+    parser.add_argument('--log-json', action='store_true', help='Log JSON lines instead of text')
+    args = parser.parse_args()
+    setup_logging(args.log_level, args.log_json)
+    set_fetch_policy(args.retries, not args.no_adaptive, args.rate if args.concurrency else None)
     
-    if sys.argv[1].lower() == 'step2':
-        json_to_db()
+    if args.target.lower() == 'step2':
+        json_to_db(args.output)
     else:
-        url = sys.argv[1]
-        max_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 10
-        crawl_to_json(url, max_jobs)
+        crawl_to_json(args.target, args.max_jobs, args.concurrency, args.rate, args.conditional,
+                      args.incremental, args.output, not args.no_archive)
@@ -1,5 +1,16 @@
 # Crawler module
 from .config import *
-from .parser import fetch_page, parse_job_list, parse_job_detail
-from .database import save_jobs_to_db
-from .crawl import crawl_jobs
+from .client import fetch, host_stats, print_host_stats, set_fetch_policy
+from .parser import PARSER_VERSION, fetch_page, parse_job_list, parse_job_detail, make_job_id, card_fingerprint
+from .database import save_jobs_to_db, load_fingerprints, search_jobs, JobWriter
+from .crawl import crawl_jobs, iter_listing, select_jobs
+from .async_crawl import crawl_jobs_async, crawl_jobs_concurrent
+from .ratelimit import TokenBucket, AdaptiveRate
+from .retry import CircuitBreaker, CircuitOpenError
+from .scheduler import prioritize
+from .pipeline import ParsePipeline
+from .ndjson import NDJSONWriter, iter_ndjson, iter_jobs_file
+from .frontier import Frontier, crawl_frontier, seed_categories
+from .shard import merge_shards, parse_shard, shard_of
+from .dedup import DedupIndex, canonical_url
+from .archive import HtmlArchive, open_archive, set_archive
@@ -0,0 +1,206 @@
+"""
+Content-addressed archive of every fetched page, for offline re-parsing.
+
+  archive/
+    index.db            blobs(hash -> segment, offset, length)
+                        fetches(url, fetched_at -> kind, hash)
+                        parsed(hash, parser_version -> job JSON)
+    000001.zst ...      append-only segments of independent zstd frames
+
+A page is keyed by the sha256 of its HTML and stored once however often it
+is fetched; every fetch only adds an index row. Each page is its own frame,
+so one page is read by slicing a memory-mapped segment and decompressing
+that slice. Segments are flushed before the index rows pointing into them
+are committed: a crash can leave unreferenced bytes at the end of a
+segment, never an index row pointing at missing data.
+
+Parse results are cached by (hash, PARSER_VERSION): re-parsing the archive
+after a parser change only parses each distinct page once, and not at all
+when the parser version has not changed.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterator
+
+from .config import ARCHIVE_DIR, ARCHIVE_LEVEL, ARCHIVE_SEGMENT_SIZE
+from .logs import event
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+log = logging.getLogger(__name__)
+_active = None
+
+
+class HtmlArchive:
+    """Append-only page store; thread-safe, fetchers call put() concurrently"""
+
+    def __init__(self, directory: str = ARCHIVE_DIR, segment_size: int = ARCHIVE_SEGMENT_SIZE,
+                 level: int = ARCHIVE_LEVEL):
+        if zstandard is None:
+            raise RuntimeError("Install the 'zstandard' package to use the HTML archive")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_size = segment_size
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._lock = threading.Lock()
+        self._maps = {}
+        self.conn = sqlite3.connect(os.path.join(directory, 'index.db'), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute('PRAGMA synchronous = NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS fetches (
+                url TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                PRIMARY KEY (url, fetched_at)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS parsed (
+                hash TEXT NOT NULL,
+                parser_version INTEGER NOT NULL,
+                job TEXT NOT NULL,
+                PRIMARY KEY (hash, parser_version)
+            ) WITHOUT ROWID;
+        ''')
+        self.conn.commit()
+        last = self.conn.execute('SELECT MAX(segment) FROM blobs').fetchone()[0] or 1
+        self._segment = last
+        self._file = open(self._segment_path(last), 'ab')
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f'{segment:06d}.zst')
+
+    def put(self, url: str, html: str, kind: str = 'job') -> str:
+        """Archive one fetched page; returns its content hash"""
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        fetched_at = datetime.now().isoformat()
+        with self._lock:
+            known = self.conn.execute('SELECT 1 FROM blobs WHERE hash = ?', (digest,)).fetchone()
+            if not known:
+                frame = self._compressor.compress(data)
+                if self._file.tell() and self._file.tell() + len(frame) > self.segment_size:
+                    self._file.close()
+                    self._segment += 1
+                    self._file = open(self._segment_path(self._segment), 'ab')
+                offset = self._file.tell()
+                self._file.write(frame)
+                self._file.flush()
+                self.conn.execute('INSERT INTO blobs VALUES (?, ?, ?, ?, ?)',
+                                  (digest, self._segment, offset, len(frame), len(data)))
+            self.conn.execute('INSERT OR REPLACE INTO fetches VALUES (?, ?, ?, ?)',
+                              (url, fetched_at, kind, digest))
+            self.conn.commit()
+        return digest
+
+    def _map(self, segment: int, end: int) -> mmap.mmap:
+        """Memory map of a segment covering at least `end` bytes (the open segment keeps growing)"""
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < end:
+            if mapped is not None:
+                mapped.close()
+            with open(self._segment_path(segment), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+        return mapped
+
+    def get(self, digest: str) -> str | None:
+        """HTML of an archived page by content hash"""
+        with self._lock:
+            row = self.conn.execute('SELECT segment, offset, length FROM blobs WHERE hash = ?',
+                                    (digest,)).fetchone()
+            if not row:
+                return None
+            segment, offset, length = row
+            frame = self._map(segment, offset + length)[offset:offset + length]
+        return self._decompressor.decompress(frame).decode('utf-8')
+
+    def latest(self, kind: str = 'job') -> list[tuple[str, str]]:
+        """(url, hash) of the last fetch of every URL of a kind, in segment order for sequential reads"""
+        with self._lock:
+            return self.conn.execute('''
+                SELECT f.url, f.hash FROM (
+                    SELECT url, hash, MAX(fetched_at) FROM fetches WHERE kind = ? GROUP BY url
+                ) AS f JOIN blobs AS b ON b.hash = f.hash
+                ORDER BY b.segment, b.offset
+            ''', (kind,)).fetchall()
+
+    def iter_pages(self, kind: str = 'job') -> Iterator[tuple[str, str, str]]:
+        """(url, hash, html) of the last fetch of every URL of a kind"""
+        for url, digest in self.latest(kind):
+            yield url, digest, self.get(digest)
+
+    def cached_parse(self, digest: str, parser_version: int) -> dict | None:
+        """Job parsed from this page by this parser version, if any"""
+        with self._lock:
+            row = self.conn.execute('SELECT job FROM parsed WHERE hash = ? AND parser_version = ?',
+                                    (digest, parser_version)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def cache_parse(self, digest: str, parser_version: int, job: dict):
+        with self._lock:
+            self.conn.execute('INSERT OR REPLACE INTO parsed VALUES (?, ?, ?)',
+                              (digest, parser_version, json.dumps(job, ensure_ascii=False)))
+            self.conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            blobs, size, stored = self.conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0) FROM blobs'
+            ).fetchone()
+            fetches = self.conn.execute('SELECT COUNT(*) FROM fetches').fetchone()[0]
+        return {'fetches': fetches, 'pages': blobs, 'bytes': size, 'bytes_stored': stored}
+
+    def close(self):
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+            self._file.close()
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_archive(directory: str = ARCHIVE_DIR) -> HtmlArchive | None:
+    """The crawlers' default archive; None, with a warning, when zstandard is not installed"""
+    if zstandard is None:
+        event(log, logging.WARNING, 'ARCHIVE', "zstandard is not installed: fetched pages are not archived "
+              "(pip install zstandard, or pass --no-archive)")
+        return None
+    return HtmlArchive(directory)
+
+
+def set_archive(archive: HtmlArchive | None):
+    """Archive every page fetch_page() fetches from now on (None stops)"""
+    global _active
+    _active = archive
+
+
+def archive_page(url: str, html: str, kind: str):
+    if _active is not None:
+        try:
+            _active.put(url, html, kind)
+        except Exception as e:
+            event(log, logging.WARNING, 'ARCHIVE', str(e), url=url)
@@ -0,0 +1,70 @@
+"""Concurrent crawling: detail pages fetched in parallel under per-host limits"""
+import asyncio
+import logging
+from typing import Callable
+from urllib.parse import urlsplit
+
+from .config import CONCURRENCY, RATE_LIMIT, RATE_BURST
+from .crawl import iter_listing
+from .dedup import DedupIndex
+from .logs import event
+from .parser import fetch_page, parse_job_detail
+from .ratelimit import TokenBucket
+
+log = logging.getLogger(__name__)
+
+
+async def _crawl_detail(job: dict, semaphores: dict, bucket: TokenBucket, concurrency: int,
+                        conditional: bool, pipeline, on_job: Callable[[dict], None] | None) -> dict | None:
+    """Fetch and parse one detail page, respecting host concurrency and rate limit"""
+    host = urlsplit(job['url']).netloc
+    sem = semaphores.setdefault(host, asyncio.Semaphore(concurrency))
+    async with sem:
+        if not await bucket.acquire_async():
+            return None
+        detail_html = await asyncio.to_thread(fetch_page, job['url'], conditional)
+    if not detail_html:
+        return None
+    if pipeline:
+        # put() may block on backpressure, keep it off the event loop
+        await asyncio.to_thread(pipeline.put, job['url'], detail_html, {'fingerprint': job['fingerprint']})
+        return None
+    job_data = await asyncio.to_thread(parse_job_detail, detail_html, job['url'])
+    if job_data:
+        job_data['fingerprint'] = job['fingerprint']
+        if on_job:
+            on_job(job_data)
+    return job_data
+
+
+async def crawl_jobs_async(url: str, max_jobs: int = 10, concurrency: int = CONCURRENCY,
+                           rate: float = RATE_LIMIT, bucket: TokenBucket | None = None,
+                           conditional: bool = False, known: dict | None = None,
+                           pipeline=None, on_job: Callable[[dict], None] | None = None,
+                           dedup: DedupIndex | None = None) -> list[dict]:
+    """
+    Async version of crawl_jobs, following pagination the same way.
+    Up to `concurrency` requests per host are in flight at once and requests
+    start at no more than `rate` per second (pass `bucket` to share a budget).
+    """
+    bucket = bucket or TokenBucket(rate, RATE_BURST)
+    pages = iter_listing(url, max_jobs, bucket, known, dedup)
+    semaphores = {}
+    tasks = []
+    # Detail fetches of one page run while the listing generator prefetches the next
+    while (jobs_list := await asyncio.to_thread(next, pages, None)) is not None:
+        event(log, logging.INFO, 'INFO', f"Found {len(jobs_list)} jobs, crawling details (concurrency={concurrency})...")
+        tasks += [asyncio.create_task(_crawl_detail(job, semaphores, bucket, concurrency, conditional,
+                                                    pipeline, on_job)) for job in jobs_list]
+    results = await asyncio.gather(*tasks)
+    return [job for job in results if job]
+
+
+def crawl_jobs_concurrent(url: str, max_jobs: int = 10, concurrency: int = CONCURRENCY,
+                          rate: float = RATE_LIMIT, bucket: TokenBucket | None = None,
+                          **options) -> list[dict]:
+    """
+    Blocking entry point for crawl_jobs_async, usable from plain scripts.
+    `options` are the keyword arguments of crawl_jobs_async.
+    """
+    return asyncio.run(crawl_jobs_async(url, max_jobs, concurrency, rate, bucket, **options))
@@ -0,0 +1,111 @@
+"""
+Pluggable HTML parser backends for parse_job_list / parse_job_detail.
+
+Every backend exposes the same small interface (parse, select, select_one,
+text, attr) so the extraction code in parser.py is written once:
+  html.parser  BeautifulSoup + the stdlib parser (always available)
+  lxml         BeautifulSoup + lxml tree builder
+  strainer     BeautifulSoup building only the subtrees the selectors need
+  selectolax   selectolax's lexbor engine (C, no BeautifulSoup at all)
+"""
+import html as html_lib
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# Classes of the elements read by parse_job_list / parse_job_detail
+LIST_CLASSES = {'job-item-search-result'}
+DETAIL_CLASSES = {
+    'job-detail__info--title', 'company-name-label', 'section-salary', 'section-location',
+    'section-experience', 'job-description__item', 'item-tag', 'company-logo',
+}
+
+
+class SoupBackend:
+    def __init__(self, features: str = 'html.parser', strain: bool = False):
+        self.features = features
+        self.strain = strain
+
+    def parse(self, html: str, classes: set[str]):
+        parse_only = None
+        if self.strain:
+            parse_only = SoupStrainer(attrs={'class': lambda v: v is not None and not classes.isdisjoint(v.split())})
+        return BeautifulSoup(html, self.features, parse_only=parse_only)
+
+    def select(self, node, css: str) -> list:
+        return node.select(css)
+
+    def select_one(self, node, css: str):
+        return node.select_one(css)
+
+    def text(self, node) -> str:
+        return node.get_text(strip=True)
+
+    def attr(self, node, name: str) -> str:
+        return node.get(name, '')
+
+
+class LexborBackend:
+    def parse(self, html: str, classes: set[str]):
+        return LexborHTMLParser(html).root
+
+    def select(self, node, css: str) -> list:
+        return node.css(css)
+
+    def select_one(self, node, css: str):
+        return node.css_first(css)
+
+    def text(self, node) -> str:
+        return node.text(strip=True)
+
+    def attr(self, node, name: str) -> str:
+        return node.attributes.get(name) or ''
+
+
+def available_backends() -> list[str]:
+    names = ['html.parser', 'strainer']
+    if HAS_LXML:
+        names.append('lxml')
+    if LexborHTMLParser is not None:
+        names.append('selectolax')
+    return names
+
+
+def get_backend(name: str = 'auto'):
+    """Backend instance by name; 'auto' picks the fastest one installed"""
+    if name == 'auto':
+        name = 'selectolax' if LexborHTMLParser is not None else 'strainer'
+    if name == 'html.parser':
+        return SoupBackend('html.parser')
+    if name == 'lxml' and HAS_LXML:
+        return SoupBackend('lxml')
+    if name == 'strainer':
+        return SoupBackend('lxml' if HAS_LXML else 'html.parser', strain=True)
+    if name == 'selectolax' and LexborHTMLParser is not None:
+        return LexborBackend()
+    raise ValueError(f"Unknown or unavailable parser backend: {name} (available: {available_backends()})")
+
+
+_SKIP_BLOCKS = re.compile(r'<!--.*?-->|<(script|style|template)\b[^>]*>.*?</\1\s*>|<![^>]*>|<\?[^>]*>',
+                          re.S | re.I)
+_TAGS = re.compile(r'<[^>"\']*(?:(?:"[^"]*"|\'[^\']*\')[^>"\']*)*>')
+
+
+def page_text_lower(html: str) -> str:
+    """
+    Lowercased visible text of a page, computed with two regex passes instead
+    of building a tree. Same words as soup.get_text().lower(); only runs of
+    whitespace between elements may differ.
+    """
+    return html_lib.unescape(_TAGS.sub('', _SKIP_BLOCKS.sub('', html))).lower()
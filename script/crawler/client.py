@@ -0,0 +1,307 @@
+"""
+Shared HTTP client: pooled keep-alive session, compression and conditional GET.
+
+Every host gets its own adaptive rate (crawler/ratelimit.py AdaptiveRate) and
+circuit breaker (crawler/retry.py); fetch() retries 429, 5xx and network
+errors with backoff, honouring Retry-After (see the FETCH_RETRIES settings in
+crawler/config.py). The callers' TokenBucket still caps the overall rate and
+counts the request budget; retries do not take a token.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import (HEADERS, POOL_SIZE, STATE_DB_FILE, FETCH_RETRIES, RETRY_STATUSES, RETRY_BASE, RETRY_CAP,
+                     RETRY_AFTER_MAX, ADAPTIVE_MIN_RATE, ADAPTIVE_MAX_RATE, ADAPTIVE_INCREASE, ADAPTIVE_DECREASE,
+                     CIRCUIT_FAILURES, CIRCUIT_COOLDOWN,
+                     CIRCUIT_MAX_COOLDOWN)
+from .logs import event
+from .metrics import inc, observe
+from .ratelimit import AdaptiveRate
+from .retry import CircuitBreaker, backoff_delay, retry_after
+
+log = logging.getLogger(__name__)
+
+try:
+    import brotli  # noqa: F401  (urllib3 decodes br only when this is installed)
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+_session = None
+_session_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+_validators = None
+_hosts = {}
+_hosts_lock = threading.Lock()
+# See set_fetch_policy
+_policy = {'retries': FETCH_RETRIES, 'adaptive': True, 'rate': ADAPTIVE_MAX_RATE}
+
+
+class FetchResult(NamedTuple):
+    url: str
+    status: int
+    text: str | None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+class HostControl(NamedTuple):
+    rate: AdaptiveRate
+    breaker: CircuitBreaker
+
+
+class ValidatorStore:
+    """ETag / Last-Modified values from earlier crawls, kept in the crawl state DB"""
+
+    def __init__(self, db_file: str = STATE_DB_FILE):
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER,
+                fetched_at TEXT
+            )
+        ''')
+        self.conn.commit()
+
+    def get(self, url: str) -> tuple[str | None, str | None, int]:
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT etag, last_modified, size FROM http_cache WHERE url = ?', (url,)
+            ).fetchone()
+        return row or (None, None, 0)
+
+    def put(self, url: str, etag: str | None, last_modified: str | None, size: int):
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?)',
+                (url, etag, last_modified, size, datetime.now().isoformat())
+            )
+            self.conn.commit()
+
+
+def get_session() -> requests.Session:
+    """Process-wide session; connections to each host are pooled and kept alive"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def get_validators() -> ValidatorStore:
+    global _validators
+    with _session_lock:
+        if _validators is None:
+            _validators = ValidatorStore()
+        return _validators
+
+
+def set_fetch_policy(retries: int | None = None, adaptive: bool | None = None, rate: float | None = None):
+    """
+    `retries` per request (0: fail on the first error); `adaptive` False
+    turns the per-host AIMD pacing off (the callers' rate limit alone applies);
+    `rate` is the requests/sec every host's AIMD starts at and never exceeds,
+    normally the caller's --rate (hosts already seen keep theirs until reset_hosts)
+    """
+    if retries is not None:
+        _policy['retries'] = retries
+    if adaptive is not None:
+        _policy['adaptive'] = adaptive
+    if rate is not None:
+        _policy['rate'] = rate
+
+
+def fetch_policy() -> dict:
+    return dict(_policy)
+
+
+def host_control(host: str) -> HostControl:
+    with _hosts_lock:
+        control = _hosts.get(host)
+        if control is None:
+            control = _hosts[host] = HostControl(
+                AdaptiveRate(_policy['rate'], min(ADAPTIVE_MIN_RATE, _policy['rate']), _policy['rate'],
+                             ADAPTIVE_INCREASE, ADAPTIVE_DECREASE),
+                CircuitBreaker(CIRCUIT_FAILURES, CIRCUIT_COOLDOWN, CIRCUIT_MAX_COOLDOWN))
+        return control
+
+
+def host_wait(url: str) -> float:
+    """Seconds until the circuit breaker of the URL's host lets a request through"""
+    return host_control(urlsplit(url).netloc).breaker.wait()
+
+
+def reset_hosts():
+    """Forget every host's rate, circuit state and counters"""
+    with _hosts_lock:
+        _hosts.clear()
+    with _stats_lock:
+        _stats.clear()
+
+
+def _count(host: str, **deltas):
+    with _stats_lock:
+        stats = _stats.setdefault(host, {
+            'requests': 0, 'not_modified': 0, 'bytes_wire': 0, 'bytes_decoded': 0, 'bytes_saved': 0,
+            'retries': 0, 'throttled': 0,
+        })
+        for key, value in deltas.items():
+            stats[key] += value
+
+
+def _failed(host: str, control: HostControl, reason: str, pause: float | None = None,
+            overloaded: bool = False) -> bool:
+    """
+    An `overloaded` answer (429, 503, timeout) slows the host down; 5xx and
+    network errors count towards its circuit. A Retry-After holds back every
+    request to the host. Returns True when this opened the circuit.
+    """
+    if _policy['adaptive'] and overloaded:
+        control.rate.throttled(pause)
+    elif _policy['adaptive'] and pause:
+        control.rate.pause(pause)
+    if reason != '429' and control.breaker.failure():
+        inc('crawler_circuit_open_total', host=host)
+        event(log, logging.WARNING, 'CIRCUIT', f"{host}: open after {control.breaker.failures} failures, "
+              f"next try in {control.breaker.cooldown:.0f}s", host=host, cooldown=control.breaker.cooldown)
+        return True
+    return False
+
+
+def _retry(host: str, url: str, attempt: int, reason: str, pause: float | None):
+    delay = max(pause or 0.0, backoff_delay(attempt, RETRY_BASE, RETRY_CAP))
+    inc('crawler_fetch_retries_total', host=host, reason=reason)
+    _count(host, retries=1)
+    event(log, logging.INFO, 'RETRY', f"{reason}, retry {attempt + 1}/{_policy['retries']} in {delay:.1f}s",
+          url=url, reason=reason, attempt=attempt + 1, delay=round(delay, 3))
+    time.sleep(delay)
+
+
+def fetch(url: str, conditional: bool = False, timeout: int = 30) -> FetchResult:
+    """
+    GET `url` on the shared session.
+    With `conditional`, stored validators are sent as If-None-Match /
+    If-Modified-Since; a 304 comes back with text=None and no body downloaded.
+    Requests are paced by the host's adaptive rate; 429, 5xx and network
+    errors are retried (see set_fetch_policy). Raises CircuitOpenError while
+    the host's circuit is open, requests exceptions once retries run out and
+    on other HTTP errors.
+    """
+    headers = {}
+    store = get_validators() if conditional else None
+    size = 0
+    if store:
+        etag, last_modified, size = store.get(url)
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+    host = urlsplit(url).netloc
+    control = host_control(host)
+    attempt = 0
+    while True:
+        control.breaker.check(host)
+        if _policy['adaptive']:
+            control.rate.acquire()
+        last = attempt >= _policy['retries']
+        start = time.perf_counter()
+        try:
+            resp = get_session().get(url, headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            inc('crawler_fetch_errors_total', host=host)
+            retryable = isinstance(e, (requests.ConnectionError, requests.Timeout))
+            overloaded = isinstance(e, requests.Timeout)
+            if not retryable or _failed(host, control, type(e).__name__, None, overloaded) or last:
+                raise
+            _retry(host, url, attempt, type(e).__name__, None)
+            attempt += 1
+            continue
+        latency = time.perf_counter() - start
+        observe('crawler_fetch_seconds', latency, host=host)
+        inc('crawler_http_responses_total', host=host, status=resp.status_code)
+        if resp.status_code not in RETRY_STATUSES:
+            break
+        inc('crawler_fetch_errors_total', host=host)
+        pause = retry_after(resp.headers.get('Retry-After'), RETRY_AFTER_MAX)
+        if resp.status_code == 429:
+            _count(host, throttled=1)
+        if _failed(host, control, str(resp.status_code), pause, resp.status_code in (429, 503)) or last:
+            resp.raise_for_status()
+        _retry(host, url, attempt, str(resp.status_code), pause)
+        attempt += 1
+
+    if control.breaker.success():
+        event(log, logging.WARNING, 'CIRCUIT', f"{host}: closed", host=host)
+    if _policy['adaptive']:
+        control.rate.success(latency)
+    if resp.status_code == 304:
+        _count(host, requests=1, not_modified=1, bytes_saved=size)
+        return FetchResult(url, 304, None)
+    if resp.status_code >= 400:
+        inc('crawler_fetch_errors_total', host=host)
+    resp.raise_for_status()
+
+    body = resp.content
+    wire = resp.raw.tell() or len(body)
+    inc('crawler_fetch_bytes_total', len(body), host=host)
+    _count(host, requests=1, bytes_wire=wire, bytes_decoded=len(body), bytes_saved=len(body) - wire)
+    if store and (resp.headers.get('ETag') or resp.headers.get('Last-Modified')):
+        store.put(url, resp.headers.get('ETag'), resp.headers.get('Last-Modified'), len(body))
+    return FetchResult(url, resp.status_code, resp.text)
+
+
+def host_stats() -> dict[str, dict]:
+    """
+    Per-host counters: requests, new connections opened, connections reused,
+    304 responses, bytes on the wire / decoded, bytes saved by compression
+    and by 304s, retries, 429 responses, and the current adaptive rate and
+    circuit state.
+    """
+    with _stats_lock:
+        stats = {host: dict(values) for host, values in _stats.items()}
+    with _hosts_lock:
+        for host, control in _hosts.items():
+            stats.setdefault(host, {}).update(rate=control.rate.rate, circuit=control.breaker.state,
+                                              circuit_opened=control.breaker.opened)
+    if _session is not None:
+        adapters = {id(a): a for a in _session.adapters.values()}
+        for adapter in adapters.values():
+            for key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools[key]
+                host = key.key_host if key.key_port in (None, 80, 443) else f'{key.key_host}:{key.key_port}'
+                entry = stats.setdefault(host, {})
+                entry['connections'] = entry.get('connections', 0) + pool.num_connections
+                entry['reused'] = entry.get('reused', 0) + pool.num_requests - pool.num_connections
+    return stats
+
+
+def print_host_stats():
+    for host, s in host_stats().items():
+        print(f"  [HTTP] {host}: {s.get('requests', 0)} requests, "
+              f"{s.get('connections', 0)} connections ({s.get('reused', 0)} reused), "
+              f"{s.get('not_modified', 0)} not modified, {s.get('bytes_saved', 0) / 1024:.0f} KB saved, "
+              f"{s.get('retries', 0)} retries ({s.get('throttled', 0)} throttled), "
+              f"rate {s.get('rate', 0):.1f}/s, circuit {s.get('circuit', 'closed')}"
+              + (f" (opened {s['circuit_opened']}x)" if s.get('circuit_opened') else ''))
@@ -1,7 +1,89 @@
 """Crawler configuration and constants"""
+from .matcher import KeywordMatcher
 
-JSON_FILE = 'jobs_output.json'
-DB_FILE = '../public/data/jobs.db'
+# Crawl output, one job per line; use a .gz or .zst suffix for compression
+JSON_FILE = 'jobs_output.ndjson'
+# Working database every crawl writes to; publish.py builds the browser copy from it
+DB_FILE = 'jobs.db'
+PUBLISH_DB_FILE = '../public/data/jobs.db'
+# Page sizes publish tries; the one giving the smallest file is kept
+PUBLISH_PAGE_SIZES = (1024, 2048, 4096, 8192)
+# Chunked copy for HTTP range-request clients (publish.py --chunked): one fixed
+# page size, which is also the size of each range request, and the size of the
+# files the database is split into
+CHUNKED_PAGE_SIZE = 4096
+CHUNK_SIZE = 10 * 1024 * 1024
+# Deltas listed in the published manifest; clients further behind download the full file
+DELTA_RETENTION = 30
+# Every fetched page, zstd-compressed and content-addressed (see crawler/archive.py);
+# a new segment file is started once the current one reaches ARCHIVE_SEGMENT_SIZE
+ARCHIVE_DIR = 'archive'
+ARCHIVE_SEGMENT_SIZE = 256 * 1024 * 1024
+ARCHIVE_LEVEL = 3
+# craw-all.py --profile / --trace-malloc output, one file per run
+PROFILE_DIR = 'profiles'
+# Crawl-only state (HTTP validators, ...), never shipped to the browser
+STATE_DB_FILE = 'crawl_state.db'
+
+# Rate used to store USD salaries in the VND columns (see crawler/normalize.py)
+USD_TO_VND = 25_000
+
+# Query parameters that only track where a link was clicked; dropped from job
+# URLs (with utm_*) so each posting has one URL and one id
+TRACKING_PARAMS = ('ta_source', 'u_sr_id', 'sba', 'fbclid', 'gclid', 'ref')
+# Jobs at least this similar (estimated Jaccard over word 3-grams) are one posting
+DEDUP_THRESHOLD = 0.7
+# Stored jobs a crawl compares new cards and jobs against, by crawl date
+DEDUP_WINDOW_DAYS = 30
+
+# Listing pages followed per category when the first ones do not hold max_jobs new jobs
+LISTING_MAX_PAGES = 20
+
+# Keep-alive connections kept per host by the shared HTTP session
+POOL_SIZE = 16
+
+# HTML parser backend: 'auto', 'html.parser', 'lxml', 'strainer' or 'selectolax'
+# (see crawler/backends.py); 'auto' picks the fastest one installed
+PARSER_BACKEND = 'auto'
+
+# Jobs written to SQLite per batch
+DB_BATCH_SIZE = 500
+
+# Fetched pages waiting for a parser process (backpressure on the fetchers)
+PIPELINE_QUEUE_SIZE = 64
+
+# Crawl frontier (in STATE_DB_FILE): attempts per URL, seconds before a claim is abandoned
+MAX_RETRIES = 3
+CLAIM_TIMEOUT = 600
+
+# Concurrent crawl mode: max in-flight requests per host, requests/sec, burst size
+CONCURRENCY = 5
+RATE_LIMIT = 5.0
+RATE_BURST = 5
+
+# Fetch layer (see crawler/client.py). 429, 5xx and network errors are retried
+# up to FETCH_RETRIES times after an exponential backoff with jitter
+# (RETRY_BASE * 2**attempt, at most RETRY_CAP seconds) or the Retry-After the
+# server sent, if longer; Retry-After is honoured up to RETRY_AFTER_MAX seconds
+FETCH_RETRIES = 3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_BASE = 0.5
+RETRY_CAP = 30.0
+RETRY_AFTER_MAX = 120.0
+# Adaptive per-host rate (AIMD, see crawler/ratelimit.py): starts at the caller's
+# rate (ADAPTIVE_MAX_RATE unless set_fetch_policy got one), is multiplied by
+# ADAPTIVE_DECREASE on a 429, 503 or timeout and grows back by ADAPTIVE_INCREASE
+# requests/sec per second, never above the starting rate
+ADAPTIVE_MIN_RATE = 0.2
+ADAPTIVE_MAX_RATE = 20.0
+ADAPTIVE_INCREASE = 1.0
+ADAPTIVE_DECREASE = 0.5
+# Circuit breaker: CIRCUIT_FAILURES consecutive 5xx / network errors from a host stop
+# all requests to it for CIRCUIT_COOLDOWN seconds, doubled after every failed trial
+# request up to CIRCUIT_MAX_COOLDOWN
+CIRCUIT_FAILURES = 5
+CIRCUIT_COOLDOWN = 10.0
+CIRCUIT_MAX_COOLDOWN = 300.0
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
@@ -31,3 +113,6 @@ CATEGORY_KEYWORDS = {
     'Giáo dục': ['giáo dục', 'giáo viên', 'teacher', 'education', 'đào tạo', 'giảng viên'],
     'Telesales': ['telesales', 'telemarketing', 'tele', 'gọi điện'],
 }
+
+# Built once at import: one compiled regex for all keywords (see crawler/matcher.py)
+CATEGORY_MATCHER = KeywordMatcher(CATEGORY_KEYWORDS)
@@ -1,29 +1,135 @@
 """Core crawling logic"""
+import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
 
-from .parser import fetch_page, parse_job_list, parse_job_detail
+from .client import fetch_policy
+from .config import LISTING_MAX_PAGES
+from .dedup import DedupIndex, canonical_url
+from .logs import event
+from .parser import fetch_page, next_page_url, parse_job_list, parse_job_detail, make_job_id, card_fingerprint
+from .ratelimit import TokenBucket
 
+log = logging.getLogger(__name__)
 
-def crawl_jobs(url: str, max_jobs: int = 10) -> list[dict]:
+
+def select_jobs(jobs_list: list[dict], max_jobs: int, known: dict | None = None,
+                dedup: DedupIndex | None = None) -> list[dict]:
+    """
+    Pick up to `max_jobs` listing cards to fetch, tagging each with its
+    fingerprint; card URLs are canonicalized (tracking parameters dropped).
+    With `known` (job id -> fingerprint, see load_fingerprints) only new jobs and
+    jobs whose title/salary/location changed are kept. Rows stored before
+    fingerprints existed count as changed once, then get their fingerprint.
+    Selected jobs are added to `known` so other categories of the same run skip them.
+    With `dedup`, cards of jobs already selected in this run or duplicating a
+    known job are skipped too (see DedupIndex.duplicate_card).
+    """
+    selected = []
+    for job in jobs_list:
+        job['url'] = canonical_url(job['url'])
+        job['fingerprint'] = card_fingerprint(job)
+        job_id = make_job_id(job['url'])
+        if known is not None and known.get(job_id, '') == job['fingerprint']:
+            continue
+        if dedup and dedup.duplicate_card(job):
+            continue
+        if known is not None:
+            known[job_id] = job['fingerprint']
+        selected.append(job)
+        if len(selected) >= max_jobs:
+            break
+    if known is not None:
+        event(log, logging.INFO, 'INCREMENTAL', f"{len(jobs_list)} listed, {len(selected)} new or changed",
+              listed=len(jobs_list), selected=len(selected))
+    elif dedup:
+        event(log, logging.INFO, 'DEDUP', f"{len(jobs_list)} listed, {len(selected)} not seen before",
+              listed=len(jobs_list), selected=len(selected))
+    return selected
+
+
+def _fetch_listing(url: str, bucket: TokenBucket | None) -> str | None:
+    if bucket and not bucket.acquire():
+        event(log, logging.WARNING, 'BUDGET', 'Request budget exhausted')
+        return None
+    return fetch_page(url, kind='listing')
+
+
+def iter_listing(url: str, max_jobs: int, bucket: TokenBucket | None = None, known: dict | None = None,
+                 dedup: DedupIndex | None = None, max_pages: int = LISTING_MAX_PAGES) -> Iterator[list[dict]]:
     """
-    Crawl jobs from a category URL.
+    The jobs to fetch from a category listing, one list per listing page,
+    following its "next page" links (see select_jobs for `known` and `dedup`).
+    A page is fetched only while fewer than `max_jobs` jobs were selected,
+    and in the background while the caller works on the previous page's
+    jobs. Stops after a page with nothing new: pages are newest first, so
+    the ones after it are older still. Cards repeated on a later page
+    (listings shift as jobs are posted) are skipped.
+    """
+    seen = set()
+    selected = 0
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        page = prefetch.submit(_fetch_listing, url, bucket)
+        for number in range(1, max_pages + 1):
+            html = page.result()
+            if not html:
+                return
+            cards = [card for card in parse_job_list(html) if canonical_url(card['url']) not in seen]
+            jobs = select_jobs(cards, max_jobs - selected, known, dedup)
+            seen.update(card['url'] for card in cards)
+            selected += len(jobs)
+            next_url = next_page_url(html, url)
+            more = jobs and selected < max_jobs and next_url and number < max_pages
+            if more:
+                url = next_url
+                page = prefetch.submit(_fetch_listing, url, bucket)
+            event(log, logging.INFO, 'PAGE', f"{number}: {len(jobs)} jobs selected ({selected}/{max_jobs})",
+                  url=url, page=number, selected=selected)
+            yield jobs
+            if not more:
+                return
+
+
+def crawl_jobs(url: str, max_jobs: int = 10, bucket: TokenBucket | None = None,
+               conditional: bool = False, known: dict | None = None, pipeline=None,
+               on_job: Callable[[dict], None] | None = None, dedup: DedupIndex | None = None) -> list[dict]:
+    """
+    Crawl jobs from a category URL, following its pagination until `max_jobs`
+    jobs are selected (see iter_listing).
+    Requests are paced per host by the fetch layer's adaptive rate (see
+    crawler/client.py; one per second when it is turned off). With `bucket`,
+    every request also takes a token and the crawl stops early once the
+    budget runs out.
+    With `conditional`, detail pages unchanged since the last crawl (HTTP 304)
+    are skipped. With `known`, the crawl is incremental; with `dedup`, duplicate
+    cards are not fetched (see select_jobs).
+    With `pipeline` (a ParsePipeline), fetched pages are handed to its parser
+    processes and the parsed jobs go to its sink instead of the return value.
+    `on_job` is called with each job as soon as it is parsed.
     Returns list of job dictionaries.
     """
-    html = fetch_page(url)
-    if not html:
-        return []
-    
-    jobs_list = parse_job_list(html)[:max_jobs]
-    print(f"  [INFO] Found {len(jobs_list)} jobs, crawling details...")
-    
     results = []
-    for i, job in enumerate(jobs_list):
-        print(f"    [{i+1}/{len(jobs_list)}] {job['title'][:40]}...")
-        detail_html = fetch_page(job['url'])
-        if detail_html:
-            job_data = parse_job_detail(detail_html, job['url'])
-            if job_data:
-                results.append(job_data)
-        time.sleep(1)  # Rate limiting
+    done = 0
+    for jobs_list in iter_listing(url, max_jobs, bucket, known, dedup):
+        event(log, logging.INFO, 'INFO', f"Found {len(jobs_list)} jobs, crawling details...")
+        for job in jobs_list:
+            done += 1
+            event(log, logging.DEBUG, f"{done}/{max_jobs}", f"{job['title'][:40]}...", url=job['url'])
+            if bucket and not bucket.acquire():
+                event(log, logging.WARNING, 'BUDGET', 'Request budget exhausted')
+                return results
+            detail_html = fetch_page(job['url'], conditional)
+            if detail_html and pipeline:
+                pipeline.put(job['url'], detail_html, {'fingerprint': job['fingerprint']})
+            elif detail_html:
+                job_data = parse_job_detail(detail_html, job['url'])
+                if job_data:
+                    job_data['fingerprint'] = job['fingerprint']
+                    results.append(job_data)
+                    if on_job:
+                        on_job(job_data)
+            if not bucket and not fetch_policy()['adaptive']:
+                time.sleep(1)  # Rate limiting
     
     return results
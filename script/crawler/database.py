@@ -1,15 +1,84 @@
 """Database operations"""
 import json
+import logging
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from operator import itemgetter
+from typing import Callable, Iterable
 
-from .config import DB_FILE
+from .config import DB_FILE, DB_BATCH_SIZE
+from .dedup import DedupIndex, canonical_url, make_job_id
+from .logs import event
+from .metrics import inc, observe
+from .normalize import normalize_job
 
+log = logging.getLogger(__name__)
 
-def save_jobs_to_db(jobs: list[dict], db_file: str = DB_FILE) -> int:
-    """Save jobs to SQLite database. Returns number of inserted jobs."""
-    conn = sqlite3.connect(db_file)
-    
+JOB_COLUMNS = (
+    'id', 'title', 'company', 'location', 'salary', 'job_type', 'category', 'remote', 'description',
+    'requirements', 'url', 'source', 'background_image', 'created_at', 'raw_data', 'crawled_at',
+    'fingerprint', 'salary_min_vnd', 'salary_max_vnd', 'salary_currency', 'salary_negotiable',
+    'exp_min_years', 'exp_max_years', 'canonical_id', 'minhash',
+)
+# Dedup results (crawler/dedup.py) survive writes that do not compute them
+KEEP_IF_NULL = ('canonical_id', 'minhash')
+# Set by the crawl, not by the page: re-parsing stored pages keeps them (see REPARSE_JOB_SQL)
+CRAWL_COLUMNS = ('fingerprint', 'created_at', 'crawled_at')
+# Typed salary/experience columns (crawler/normalize.py), indexed for range filters
+NORMALIZED_COLUMNS = {
+    'salary_min_vnd': 'INTEGER',
+    'salary_max_vnd': 'INTEGER',
+    'salary_currency': 'TEXT',
+    'salary_negotiable': 'INTEGER DEFAULT 0',
+    'exp_min_years': 'REAL',
+    'exp_max_years': 'REAL',
+}
+RANGE_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_jobs_salary_min ON jobs(salary_min_vnd)',
+    'CREATE INDEX IF NOT EXISTS idx_jobs_salary_max ON jobs(salary_max_vnd)',
+    'CREATE INDEX IF NOT EXISTS idx_jobs_exp_min ON jobs(exp_min_years)',
+)
+
+# Upsert rather than INSERT OR REPLACE: the row keeps its rowid, which the
+# search index points at, and the update trigger keeps the index in sync
+
+
+def _upsert_sql(keep: tuple[str, ...] = ()) -> str:
+    """INSERT ... ON CONFLICT DO UPDATE of every column but the `keep` ones"""
+    def update(c):
+        if c in KEEP_IF_NULL:
+            return f'{c} = COALESCE(excluded.{c}, {c})'
+        return f'{c} = excluded.{c}'
+    return f'''
+    INSERT INTO jobs ({', '.join(JOB_COLUMNS)})
+    VALUES ({', '.join('?' * len(JOB_COLUMNS))})
+    ON CONFLICT(id) DO UPDATE SET {', '.join(update(c) for c in JOB_COLUMNS[1:] if c not in keep)}
+'''
+
+
+INSERT_JOB_SQL = _upsert_sql()
+REPARSE_JOB_SQL = _upsert_sql(keep=CRAWL_COLUMNS)
+
+# Full-text search over these columns, bm25 weights in the same order
+SEARCH_COLUMNS = ('title', 'company', 'description')
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+
+
+def _fold_sql(expr: str) -> str:
+    # unicode61 strips accents but keeps đ, which Vietnamese users often type as d
+    return f"replace(replace({expr}, 'đ', 'd'), 'Đ', 'D')"
+
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, decl: str):
+    """ALTER TABLE ADD COLUMN, skipped when the column already exists"""
+    if column not in {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}:
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {decl}')
+
+
+def _migration_1_jobs_table(conn):
     conn.execute('''
         CREATE TABLE IF NOT EXISTS jobs (
             id TEXT PRIMARY KEY,
@@ -30,43 +99,451 @@ def save_jobs_to_db(jobs: list[dict], db_file: str = DB_FILE) -> int:
             crawled_at TEXT
         )
     ''')
-    
-    # Migration: add category column if not exists
+
+
+def _migration_2_category(conn):
+    # Databases created before the category column existed
+    _add_column(conn, 'jobs', 'category', 'TEXT')
+
+
+def _migration_3_fingerprint(conn):
+    _add_column(conn, 'jobs', 'fingerprint', 'TEXT')
+
+
+def create_search_index(conn: sqlite3.Connection, triggers: bool = True):
+    """
+    jobs_fts: FTS5 index over SEARCH_COLUMNS, accent-insensitive, with no
+    copy of the text (content comes from the jobs_search view). Triggers keep
+    it in sync with every write to jobs; a read-only copy can skip them.
+    """
+    folded = ', '.join(f'{_fold_sql(c)} AS {c}' for c in SEARCH_COLUMNS)
+    conn.execute(f'CREATE VIEW jobs_search AS SELECT rowid AS doc_id, {folded} FROM jobs')
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE jobs_fts USING fts5(
+            {', '.join(SEARCH_COLUMNS)},
+            content='jobs_search', content_rowid='doc_id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    if triggers:
+        _create_search_triggers(conn)
+    rebuild_search_index(conn)
+
+
+def _create_search_triggers(conn: sqlite3.Connection):
+    columns = ', '.join(SEARCH_COLUMNS)
+    new = ', '.join(_fold_sql(f'new.{c}') for c in SEARCH_COLUMNS)
+    old = ', '.join(_fold_sql(f'old.{c}') for c in SEARCH_COLUMNS)
+    conn.execute(f'''
+        CREATE TRIGGER jobs_fts_insert AFTER INSERT ON jobs BEGIN
+            INSERT INTO jobs_fts (rowid, {columns}) VALUES (new.rowid, {new});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER jobs_fts_delete AFTER DELETE ON jobs BEGIN
+            INSERT INTO jobs_fts (jobs_fts, rowid, {columns}) VALUES ('delete', old.rowid, {old});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER jobs_fts_update AFTER UPDATE OF {columns} ON jobs BEGIN
+            INSERT INTO jobs_fts (jobs_fts, rowid, {columns}) VALUES ('delete', old.rowid, {old});
+            INSERT INTO jobs_fts (rowid, {columns}) VALUES (new.rowid, {new});
+        END
+    ''')
+
+
+def _migration_4_search_index(conn):
+    create_search_index(conn)
+
+
+def _migration_5_change_log(conn):
+    """
+    job_changes: one row per write to jobs, so publish can build a delta of
+    what changed since the last published version without diffing databases.
+    publish_log: the change-log position of every published version.
+    """
+    conn.execute('''
+        CREATE TABLE job_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            op TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE publish_log (
+            version INTEGER PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            published_at TEXT,
+            jobs INTEGER,
+            delta TEXT
+        )
+    ''')
+    for op in LOG_EVENTS:
+        _create_log_trigger(conn, op)
+
+
+# Write on jobs -> (row holding the id, op recorded in job_changes)
+LOG_EVENTS = {'INSERT': ('new', 'upsert'), 'UPDATE': ('new', 'upsert'), 'DELETE': ('old', 'delete')}
+
+
+def _create_log_trigger(conn: sqlite3.Connection, statement: str):
+    row, op = LOG_EVENTS[statement]
+    conn.execute(f'''
+        CREATE TRIGGER jobs_log_{statement.lower()} AFTER {statement} ON jobs BEGIN
+            INSERT INTO job_changes (job_id, op) VALUES ({row}.id, '{op}');
+        END
+    ''')
+
+
+def backfill_normalized(conn: sqlite3.Connection, batch_size: int = DB_BATCH_SIZE) -> int:
+    """
+    Recompute the normalized columns of every job from its salary and
+    experience text, `batch_size` rows per executemany. Call inside a
+    transaction. Returns the number of rows updated.
+    """
+    # job_row stores the experience text in job_type
+    rows = conn.execute('SELECT rowid, salary, job_type FROM jobs')
+    sql = f"UPDATE jobs SET {', '.join(f'{c} = ?' for c in NORMALIZED_COLUMNS)} WHERE rowid = ?"
+    # Salary texts repeat a lot ("Thoả thuận", "10 - 15 triệu"): parse each once
+    parsed = {}
+    count = 0
+    while batch := rows.fetchmany(batch_size):
+        updates = []
+        for rowid, salary, experience in batch:
+            values = parsed.get((salary, experience))
+            if values is None:
+                values = parsed[salary, experience] = (
+                    *normalize_job({'salary': salary, 'experience': experience}).values(),)
+            updates.append((*values, rowid))
+        conn.executemany(sql, updates)
+        count += len(updates)
+    return count
+
+
+def _migration_6_normalized_columns(conn):
+    for column, decl in NORMALIZED_COLUMNS.items():
+        _add_column(conn, 'jobs', column, decl)
+    # New columns change the published schema, so clients download the full
+    # file next time anyway: the backfill need not be logged row by row
+    conn.execute('DROP TRIGGER jobs_log_update')
+    # Backfill before indexing: one index build instead of index updates per row
+    count = backfill_normalized(conn)
+    _create_log_trigger(conn, 'UPDATE')
+    for sql in RANGE_INDEXES:
+        conn.execute(sql)
+    event(log, logging.INFO, 'DB', f"Normalized salary/experience of {count} jobs", jobs=count)
+
+
+def _canonicalize_ids(conn: sqlite3.Connection) -> int:
+    """
+    Rewrite url and id of jobs stored with tracking parameters in the URL;
+    of several rows for one canonical URL the most recently crawled is kept.
+    Returns the number of rows deleted.
+    """
+    newest = {}
+    stale = []
+    renames = []
+    for rowid, job_id, url in conn.execute('SELECT rowid, id, url FROM jobs ORDER BY crawled_at DESC'):
+        canonical = canonical_url(url) if url else url
+        new_id = make_job_id(url) if url else job_id
+        if new_id in newest:
+            stale.append((rowid,))
+            continue
+        newest[new_id] = rowid
+        if new_id != job_id or canonical != url:
+            renames.append((new_id, canonical, rowid))
+    conn.executemany('DELETE FROM jobs WHERE rowid = ?', stale)
+    conn.executemany('UPDATE jobs SET id = ?, url = ? WHERE rowid = ?', renames)
+    return len(stale)
+
+
+def backfill_dedup(conn: sqlite3.Connection, batch_size: int = DB_BATCH_SIZE) -> int:
+    """
+    Recompute signature and canonical_id of every job, oldest first so the
+    first crawled copy of a posting is its canonical job. Call inside a
+    transaction. Returns the number of jobs that are duplicates.
+    """
+    index = DedupIndex()
+    rows = conn.execute('SELECT rowid, id, title, company, description FROM jobs ORDER BY crawled_at')
+    duplicates = 0
+    while batch := rows.fetchmany(batch_size):
+        updates = []
+        for rowid, job_id, title, company, description in batch:
+            job = {'id': job_id, 'title': title, 'company': company, 'description': description}
+            canonical_id, minhash = index.add(job)
+            duplicates += canonical_id != job_id
+            updates.append((canonical_id, minhash, rowid))
+        conn.executemany('UPDATE jobs SET canonical_id = ?, minhash = ? WHERE rowid = ?', updates)
+    return duplicates
+
+
+def _migration_7_dedup(conn):
+    _add_column(conn, 'jobs', 'canonical_id', 'TEXT')
+    _add_column(conn, 'jobs', 'minhash', 'BLOB')
+    # A new published column again: clients download the full file next time
+    conn.execute('DROP TRIGGER jobs_log_update')
+    removed = _canonicalize_ids(conn)
+    duplicates = backfill_dedup(conn)
+    _create_log_trigger(conn, 'UPDATE')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_canonical ON jobs(canonical_id)')
+    event(log, logging.INFO, 'DB', f"Canonical URLs: {removed} duplicate rows removed; {duplicates} near-duplicate jobs",
+          removed=removed, duplicates=duplicates)
+
+
+# Schema version N is reached by running MIGRATIONS[:N]; the current version
+# is stored in PRAGMA user_version. Append new steps, never edit old ones.
+MIGRATIONS = [
+    _migration_1_jobs_table,
+    _migration_2_category,
+    _migration_3_fingerprint,
+    _migration_4_search_index,
+    _migration_5_change_log,
+    _migration_6_normalized_columns,
+    _migration_7_dedup,
+]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Run pending migrations, each in its own transaction. Returns the schema version."""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            step(conn)
+            conn.execute(f'PRAGMA user_version = {number}')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        event(log, logging.INFO, 'DB', f"Migrated schema to version {number}", version=number)
+    return len(MIGRATIONS)
+
+
+def connect(db_file: str = DB_FILE) -> sqlite3.Connection:
+    """
+    Open the jobs database for bulk writing: autocommit mode (transactions are
+    explicit), WAL journal checkpointed every ~40 MB, fsync only at checkpoints
+    and a 64 MB page cache. Migrates the schema on the way in.
+    """
+    conn = sqlite3.connect(db_file, isolation_level=None, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA wal_autocheckpoint = 10000')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute('PRAGMA cache_size = -64000')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    migrate(conn)
+    return conn
+
+
+def rebuild_search_index(conn: sqlite3.Connection):
+    """Re-index every job, e.g. after VACUUM, which may renumber rowids"""
+    conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+
+
+def drop_search_index(conn: sqlite3.Connection):
+    """Remove jobs_fts with its view and triggers; create_search_index() builds them again"""
+    for trigger in ('insert', 'delete', 'update'):
+        conn.execute(f'DROP TRIGGER IF EXISTS jobs_fts_{trigger}')
+    conn.execute('DROP TABLE IF EXISTS jobs_fts')
+    conn.execute('DROP VIEW IF EXISTS jobs_search')
+
+
+@contextmanager
+def bulk_load(conn: sqlite3.Connection, search_index: bool = True):
+    """
+    Bulk insert into jobs: its triggers and secondary indexes are dropped for
+    the duration and recreated afterwards, then the search index is rebuilt.
+    One index build and one FTS build instead of per-row updates; the rows
+    are not logged in job_changes, so use it on a database that has never
+    been published. Without `search_index` the search index is dropped
+    instead (search_jobs needs it back; publish does not copy it). Call inside
+    a transaction.
+    """
+    if not search_index:
+        drop_search_index(conn)
+    saved = conn.execute('''
+        SELECT type, name, sql FROM sqlite_master
+        WHERE tbl_name = 'jobs' AND type IN ('index', 'trigger') AND sql IS NOT NULL
+    ''').fetchall()
+    for kind, name, _ in saved:
+        conn.execute(f'DROP {kind.upper()} {name}')
+    yield
+    # Indexes first, so the triggers do not fire while they are built
+    for _, _, sql in sorted(saved, key=lambda row: row[0] != 'index'):
+        conn.execute(sql)
+    if search_index:
+        rebuild_search_index(conn)
+
+
+def fts_query(text: str) -> str:
+    """
+    User input -> FTS5 query: every word must match as a prefix ("ke toan"
+    finds "Kế toán trưởng"); quoting keeps FTS5 operators out of user input
+    """
+    words = text.replace('đ', 'd').replace('Đ', 'D').split()
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in words)
+
+
+def search_jobs(text: str, db_file: str = DB_FILE, limit: int = 50) -> list[dict]:
+    """Jobs matching every word of `text`, best bm25 match first"""
+    query = fts_query(text)
+    if not query:
+        return []
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
     try:
-        conn.execute('ALTER TABLE jobs ADD COLUMN category TEXT')
-    except:
-        pass
-    
-    inserted = 0
-    for job in jobs:
+        rows = conn.execute(f'''
+            SELECT jobs.* FROM (
+                SELECT rowid, bm25(jobs_fts, {', '.join(map(str, SEARCH_WEIGHTS))}) AS score
+                FROM jobs_fts WHERE jobs_fts MATCH ? ORDER BY score LIMIT ?
+            ) AS hit JOIN jobs ON jobs.rowid = hit.rowid
+            ORDER BY hit.score
+        ''', (query, limit))
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def job_row(job: dict, crawled_at: str, canonical_id: str | None = None, minhash: bytes | None = None) -> tuple:
+    """Map a parsed job dict (plus its DedupIndex.add result) onto JOB_COLUMNS"""
+    return (
+        job.get('id'),
+        job.get('title'),
+        job.get('company'),
+        job.get('location'),
+        job.get('salary'),
+        job.get('experience', 'Full-time'),
+        job.get('category', 'Khác'),
+        1 if job.get('remote') else 0,
+        job.get('description'),
+        ','.join(job.get('tags', [])),
+        job.get('url'),
+        job.get('source', 'topcv'),
+        job.get('background_image'),
+        job.get('created_at'),
+        json.dumps(job, ensure_ascii=False),
+        crawled_at,
+        job.get('fingerprint'),
+        *normalize_job(job).values(),
+        canonical_id,
+        minhash,
+    )
+
+
+class JobWriter:
+    """
+    Long-lived, batched writer for the jobs table.
+
+    Jobs are buffered and written with executemany, `batch_size` rows per
+    transaction. One writer can be reused across categories and threads.
+    close() (or leaving the `with` block) flushes, checkpoints the WAL and
+    switches the file back to a rollback journal so sql.js can open it.
+    `on_flush(urls)` is called after every commit with the URLs it stored.
+    With `dedup`, every job gets its canonical_id from the index first.
+    With `reparse`, jobs already stored keep their CRAWL_COLUMNS.
+    """
+
+    def __init__(self, db_file: str = DB_FILE, batch_size: int = DB_BATCH_SIZE,
+                 on_flush: Callable[[list[str]], None] | None = None, dedup: DedupIndex | None = None,
+                 reparse: bool = False):
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.dedup = dedup
+        self.sql = REPARSE_JOB_SQL if reparse else INSERT_JOB_SQL
+        self.conn = connect(db_file)
+        self.written = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def add(self, job: dict) -> int:
+        """Buffer one job. Returns the number of rows written by this call."""
+        cluster = self.dedup.add(job) if self.dedup else ()
+        with self._lock:
+            self._buffer.append(job_row(job, datetime.now().isoformat(), *cluster))
+            if len(self._buffer) >= self.batch_size:
+                return self._flush()
+        return 0
+
+    def write(self, jobs: Iterable[dict]) -> int:
+        """Write jobs and flush. Returns the number of rows written."""
+        count = 0
+        for job in jobs:
+            count += self.add(job)
+        return count + self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+        # Key order keeps primary key inserts local in the B-tree; the sort is
+        # stable, so the last version of a duplicated job still wins
+        rows.sort(key=itemgetter(0))
+        start = time.perf_counter()
+        self.conn.execute('BEGIN')
         try:
-            conn.execute('''
-                INSERT OR REPLACE INTO jobs 
-                (id, title, company, location, salary, job_type, category, remote, description, 
-                 requirements, url, source, background_image, created_at, raw_data, crawled_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                job.get('id'),
-                job.get('title'),
-                job.get('company'),
-                job.get('location'),
-                job.get('salary'),
-                job.get('experience', 'Full-time'),
-                job.get('category', 'Khác'),
-                1 if job.get('remote') else 0,
-                job.get('description'),
-                ','.join(job.get('tags', [])),
-                job.get('url'),
-                job.get('source', 'topcv'),
-                job.get('background_image'),
-                job.get('created_at'),
-                json.dumps(job, ensure_ascii=False),
-                datetime.now().isoformat()
-            ))
-            inserted += 1
-        except Exception as e:
-            print(f"  [DB ERROR] {e}")
-    
-    conn.commit()
-    conn.close()
-    return inserted
+            self.conn.executemany(self.sql, rows)
+            self.conn.execute('COMMIT')
+            count = len(rows)
+        except sqlite3.Error as e:
+            self.conn.execute('ROLLBACK')
+            event(log, logging.ERROR, 'DB ERROR', f"Batch of {len(rows)} failed ({e}), retrying row by row")
+            count = self._write_rows_one_by_one(rows)
+        observe('crawler_db_batch_seconds', time.perf_counter() - start)
+        inc('crawler_db_rows_total', count)
+        self.written += count
+        if self.on_flush:
+            url_index = JOB_COLUMNS.index('url')
+            self.on_flush([row[url_index] for row in rows])
+        return count
+
+    def _write_rows_one_by_one(self, rows: list[tuple]) -> int:
+        count = 0
+        self.conn.execute('BEGIN')
+        for row in rows:
+            try:
+                self.conn.execute(self.sql, row)
+                count += 1
+            except sqlite3.Error as e:
+                event(log, logging.ERROR, 'DB ERROR', f"{row[0]}: {e}", id=row[0])
+        self.conn.execute('COMMIT')
+        return count
+
+    def close(self):
+        self.flush()
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.conn.execute('PRAGMA journal_mode = DELETE')
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def save_jobs_to_db(jobs: Iterable[dict], db_file: str = DB_FILE) -> int:
+    """Save jobs to SQLite database. Returns number of inserted jobs."""
+    with JobWriter(db_file) as writer:
+        return writer.write(jobs)
+
+
+def load_fingerprints(db_file: str = DB_FILE) -> dict[str, str | None]:
+    """
+    Map job id -> listing fingerprint for every stored job.
+    Used by incremental crawls to skip detail pages that are already stored.
+    """
+    conn = sqlite3.connect(db_file)
+    try:
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(jobs)')]
+        if not columns:
+            return {}
+        if 'fingerprint' not in columns:
+            return {job_id: None for (job_id,) in conn.execute('SELECT id FROM jobs')}
+        return dict(conn.execute('SELECT id, fingerprint FROM jobs'))
+    finally:
+        conn.close()
@@ -0,0 +1,197 @@
+"""
+Duplicate job detection.
+
+URLs are canonicalized first: tracking parameters (ta_source, u_sr_id, utm_*,
+...) and fragments are dropped, so one posting has one URL and one job id no
+matter which listing or search it was found through.
+
+Near-duplicates (the same posting under another URL, reposts) are found
+with MinHash over word 3-grams of title + company + description and LSH
+banding: a job is only compared with the jobs sharing at least one band of
+its signature, not with every stored job. Every job gets a canonical_id,
+the id of the first job of its cluster.
+
+Signatures use one-permutation hashing: each shingle is hashed once and
+lands in one of NUM_HASHES bins, each bin keeping its minimum, with empty
+bins filled from their right neighbour. Same estimate as NUM_HASHES
+independent permutations, at the cost of a single hash per shingle.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+from array import array
+from bisect import bisect
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .config import TRACKING_PARAMS, DEDUP_THRESHOLD, DEDUP_WINDOW_DAYS
+from .logs import event
+from .matcher import fold
+
+log = logging.getLogger(__name__)
+
+NUM_HASHES = 64
+LSH_BANDS = 16  # of NUM_HASHES // LSH_BANDS rows: pairs above ~0.5 similarity become candidates
+SHINGLE_WORDS = 3
+_EMPTY = 0xFFFFFFFF
+
+
+def canonical_url(url: str) -> str:
+    """'HTTPS://www.TopCV.vn/viec-lam/x/1.html?u_sr_id=..#top' -> 'https://www.topcv.vn/viec-lam/x/1.html'"""
+    parts = urlsplit(url.strip())
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not (key in TRACKING_PARAMS or key.startswith('utm_')))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ''))
+
+
+def make_job_id(url: str) -> str:
+    """Stable job id: the `id` primary key of the jobs table"""
+    return hashlib.md5(canonical_url(url).encode()).hexdigest()[:12]
+
+
+CARD_FIELDS = ('title', 'company', 'location', 'salary')
+
+
+def card_key(job: dict) -> str:
+    """
+    What a listing card and a stored job have in common (CARD_FIELDS), accents
+    and spacing ignored. Postings of one company with the same title in other
+    cities or at other salaries are different jobs, so both are part of the key.
+    """
+    return '|'.join(' '.join(fold(job.get(field) or '').split()) for field in CARD_FIELDS)
+
+
+def signature(text: str) -> bytes | None:
+    """MinHash signature (NUM_HASHES uint32) of the text's word shingles; None for empty text"""
+    words = fold(text).split()
+    if not words:
+        return None
+    bins = [_EMPTY] * NUM_HASHES
+    for i in range(max(1, len(words) - SHINGLE_WORDS + 1)):
+        shingle = ' '.join(words[i:i + SHINGLE_WORDS]).encode()
+        h = int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), 'little')
+        slot, value = h % NUM_HASHES, h >> 32
+        if value < bins[slot]:
+            bins[slot] = value
+    if _EMPTY in bins:
+        # Densify: an empty bin borrows the next filled bin to its right, shifted by the distance
+        filled = [i for i, value in enumerate(bins) if value != _EMPTY]
+        source = bins[:]
+        for i in range(NUM_HASHES):
+            if source[i] == _EMPTY:
+                j = filled[bisect(filled, i) % len(filled)]
+                distance = (j - i) % NUM_HASHES
+                bins[i] = (source[j] + distance * 0x9E3779B1) & _EMPTY
+    return array('I', bins).tobytes()
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    a, b = array('I', a), array('I', b)
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def job_text(job: dict) -> str:
+    return ' '.join(job.get(field) or '' for field in ('title', 'company', 'description'))
+
+
+class DedupIndex:
+    """
+    LSH index of job signatures plus the card keys of known jobs.
+
+    duplicate_card() runs on listing cards, before any detail page is fetched;
+    add() runs on every parsed job and returns its canonical_id. Thread-safe.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self.rows = NUM_HASHES // LSH_BANDS
+        self._buckets = [{} for _ in range(LSH_BANDS)]  # band bytes -> job ids
+        self._signatures = {}
+        self._canonical = {}
+        self._cards = {}
+        self._selected = set()
+        self._lock = threading.Lock()
+        self.skipped = 0
+
+    @classmethod
+    def load(cls, db_file: str, days: int = DEDUP_WINDOW_DAYS) -> 'DedupIndex':
+        """Index the jobs crawled in the last `days` days"""
+        index = cls()
+        since = (datetime.now() - timedelta(days=days)).isoformat()
+        conn = sqlite3.connect(db_file)
+        try:
+            rows = conn.execute('''
+                SELECT id, title, company, location, salary, canonical_id, minhash FROM jobs
+                WHERE crawled_at >= ? ORDER BY crawled_at
+            ''', (since,))
+            for job_id, *card, canonical_id, minhash in rows:
+                index._cards.setdefault(card_key(dict(zip(CARD_FIELDS, card))), job_id)
+                if minhash:
+                    index._insert(job_id, minhash, canonical_id or job_id)
+        except sqlite3.OperationalError:
+            pass  # No jobs table yet
+        finally:
+            conn.close()
+        event(log, logging.INFO, 'DEDUP', f"Indexed {len(index._signatures)} jobs of the last {days} days",
+              jobs=len(index._signatures), days=days)
+        return index
+
+    def _bands(self, minhash: bytes):
+        size = self.rows * 4
+        for band in range(LSH_BANDS):
+            yield band, minhash[band * size:(band + 1) * size]
+
+    def _insert(self, job_id: str, minhash: bytes, canonical_id: str):
+        self._signatures[job_id] = minhash
+        self._canonical[job_id] = canonical_id
+        for band, key in self._bands(minhash):
+            self._buckets[band].setdefault(key, []).append(job_id)
+
+    def duplicate_card(self, card: dict) -> bool:
+        """
+        True when a listing card need not be fetched: its job was already
+        selected in this run (another category), or a different job with the
+        same title, company, location and salary is known
+        """
+        job_id = make_job_id(card['url'])
+        key = card_key(card)
+        with self._lock:
+            duplicate = job_id in self._selected or self._cards.setdefault(key, job_id) != job_id
+            if duplicate:
+                self.skipped += 1
+            else:
+                self._selected.add(job_id)
+            return duplicate
+
+    def match(self, minhash: bytes, job_id: str | None = None) -> str | None:
+        """Canonical id of the most similar indexed job above the threshold"""
+        candidates = set()
+        for band, key in self._bands(minhash):
+            candidates.update(self._buckets[band].get(key, ()))
+        candidates.discard(job_id)
+        best, best_score = None, self.threshold
+        for candidate in candidates:
+            score = similarity(minhash, self._signatures[candidate])
+            if score >= best_score:
+                best, best_score = candidate, score
+        return self._canonical[best] if best else None
+
+    def add(self, job: dict) -> tuple[str, bytes | None]:
+        """(canonical_id, signature) of a parsed job, which joins the index"""
+        job_id = job.get('id') or make_job_id(job['url'])
+        minhash = signature(job_text(job))
+        with self._lock:
+            self._cards.setdefault(card_key(job), job_id)
+            if job_id in self._canonical:
+                return self._canonical[job_id], minhash  # Re-crawled: stays in its cluster
+            if minhash is None:
+                return job_id, None
+            canonical_id = self.match(minhash, job_id) or job_id
+            self._insert(job_id, minhash, canonical_id)
+            return canonical_id, minhash
+
+    @property
+    def duplicates(self) -> int:
+        return sum(1 for job_id, canonical_id in self._canonical.items() if job_id != canonical_id)
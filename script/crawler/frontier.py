@@ -0,0 +1,320 @@
+"""
+Persistent crawl frontier: every listing and job URL with its status, in SQLite.
+
+Status flow: listing  pending -> claimed -> parsed (its job URLs are queued)
+             job      pending -> claimed -> fetched -> parsed -> stored
+A listing page that does not fill its category's quota queues the next
+page with the remaining quota.
+Errors send a URL back to pending until it has failed MAX_RETRIES times,
+then it is marked failed.
+
+Workers claim URLs with a single UPDATE ... RETURNING inside BEGIN IMMEDIATE,
+so several threads or crawler processes can share one frontier file without
+ever claiming the same row twice. Claimed/fetched rows untouched for
+CLAIM_TIMEOUT seconds are considered abandoned and can be claimed again.
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable
+from urllib.parse import urlsplit
+
+from .config import STATE_DB_FILE, LISTING_MAX_PAGES, MAX_RETRIES, CLAIM_TIMEOUT
+from .crawl import select_jobs
+from .dedup import DedupIndex, canonical_url
+from .logs import event
+from .metrics import inc
+from .parser import NOT_MODIFIED, fetch_page, next_page_url, parse_job_list, parse_job_detail
+from .ratelimit import TokenBucket
+from .shard import in_shard
+
+log = logging.getLogger(__name__)
+
+# In flight: a worker owns the row
+IN_FLIGHT = ('claimed', 'fetched')
+
+
+class Frontier:
+    def __init__(self, db_file: str = STATE_DB_FILE):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file, isolation_level=None, check_same_thread=False, timeout=30)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute('PRAGMA synchronous = NORMAL')
+        self.lock = threading.Lock()
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                category TEXT,
+                priority INTEGER DEFAULT 0,
+                payload TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                retries INTEGER DEFAULT 0,
+                last_error TEXT,
+                claimed_by TEXT,
+                claimed_at TEXT,
+                updated_at TEXT
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_frontier_claim ON frontier(kind, status, priority)')
+
+    def _write(self, sql: str, params=()) -> list:
+        """Run one statement in its own IMMEDIATE transaction"""
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self.conn.execute(sql, params).fetchall()
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+        return rows
+
+    def reset(self):
+        """Forget the previous run"""
+        self._write('DELETE FROM frontier')
+
+    def requeue_unfinished(self) -> int:
+        """
+        Resume after a crash: rows a worker owned, and jobs parsed but not
+        stored in the database (and not recovered from the output file), go
+        back to pending. Only safe when no other process uses this frontier.
+        """
+        rows = self._write('''
+            UPDATE frontier SET status = 'pending', claimed_by = NULL, claimed_at = NULL
+            WHERE status IN (?, ?) OR (kind = 'job' AND status = 'parsed')
+            RETURNING url
+        ''', IN_FLIGHT)
+        return len(rows)
+
+    def add(self, url: str, kind: str, category: str | None = None, priority: int = 0,
+            payload: dict | None = None) -> bool:
+        """Add a URL unless the frontier already has it; True when added"""
+        with self.lock:
+            return self.conn.execute('''
+                INSERT OR IGNORE INTO frontier (url, kind, category, priority, payload, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (url, kind, category, priority, json.dumps(payload, ensure_ascii=False),
+                  datetime.now().isoformat())).rowcount > 0
+
+    def claim(self, kind: str, worker: str, limit: int = 1) -> list[dict]:
+        """Atomically claim up to `limit` pending (or abandoned) URLs of one kind"""
+        now = datetime.now()
+        stale = (now - timedelta(seconds=CLAIM_TIMEOUT)).isoformat()
+        rows = self._write('''
+            UPDATE frontier SET status = 'claimed', claimed_by = ?, claimed_at = ?, updated_at = ?
+            WHERE url IN (
+                SELECT url FROM frontier
+                WHERE kind = ? AND (status = 'pending' OR (status IN (?, ?) AND claimed_at < ?))
+                ORDER BY priority DESC, rowid
+                LIMIT ?
+            )
+            RETURNING url, category, priority, payload
+        ''', (worker, now.isoformat(), now.isoformat(), kind, *IN_FLIGHT, stale, limit))
+        claimed = []
+        for url, category, priority, payload in rows:
+            entry = json.loads(payload) if payload else {}
+            entry.update(url=url, category=category, priority=priority)
+            claimed.append(entry)
+        return claimed
+
+    def mark(self, url: str, status: str):
+        self._write('UPDATE frontier SET status = ?, updated_at = ? WHERE url = ?',
+                    (status, datetime.now().isoformat(), url))
+
+    def mark_many(self, urls: list[str], status: str):
+        now = datetime.now().isoformat()
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                self.conn.executemany('UPDATE frontier SET status = ?, updated_at = ? WHERE url = ?',
+                                      [(status, now, url) for url in urls])
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def fail(self, url: str, error: str):
+        """Record an error; the URL is retried until it has failed MAX_RETRIES times"""
+        self._write('''
+            UPDATE frontier SET retries = retries + 1, last_error = ?, updated_at = ?,
+                   claimed_by = NULL, claimed_at = NULL,
+                   status = CASE WHEN retries + 1 >= ? THEN 'failed' ELSE 'pending' END
+            WHERE url = ?
+        ''', (error, datetime.now().isoformat(), MAX_RETRIES, url))
+
+    def has(self, url: str) -> bool:
+        with self.lock:
+            return self.conn.execute('SELECT 1 FROM frontier WHERE url = ?', (url,)).fetchone() is not None
+
+    def urls(self, kind: str, status: str) -> set[str]:
+        with self.lock:
+            rows = self.conn.execute('SELECT url FROM frontier WHERE kind = ? AND status = ?', (kind, status))
+            return {url for (url,) in rows}
+
+    def busy(self, kind: str) -> bool:
+        """True while some URL of this kind is pending or being worked on"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM frontier WHERE kind = ? AND status IN ('pending', 'claimed') LIMIT 1", (kind,)
+            ).fetchone()
+        return row is not None
+
+    def counts(self) -> dict[str, dict[str, int]]:
+        """{kind: {status: count}}"""
+        with self.lock:
+            rows = self.conn.execute('SELECT kind, status, COUNT(*) FROM frontier GROUP BY kind, status')
+            result = {}
+            for kind, status, count in rows:
+                result.setdefault(kind, {})[status] = count
+        return result
+
+    def close(self):
+        self.conn.close()
+
+
+class HostSlots:
+    """At most `limit` requests in flight per host across all worker threads (None: no limit)"""
+
+    def __init__(self, limit: int | None = None):
+        self.limit = limit
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, url: str):
+        if not self.limit:
+            yield
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            sem = self._semaphores.setdefault(host, threading.BoundedSemaphore(self.limit))
+        with sem:
+            yield
+
+
+def seed_categories(frontier: Frontier, tasks: list[dict], shard: tuple[int, int] | None = None,
+                    shard_by: str = 'category') -> int:
+    """
+    Add the listing URL of every category task (see scheduler.prioritize).
+    With `shard` only this node's slice (see crawler/shard.py): the categories
+    whose listing URL hashes to it, or with shard_by 'url' every category with
+    1/n of its quota, the listing pages then keep only the job URLs of the
+    shard. Returns the number of categories added.
+    """
+    added = 0
+    for task in tasks:
+        payload = {'quota': task['quota']}
+        if shard and shard_by == 'category' and not in_shard(task['url'], shard):
+            continue
+        if shard and shard_by == 'url':
+            payload = {'quota': -(-task['quota'] // shard[1]), 'shard': list(shard)}
+        added += frontier.add(task['url'], 'listing', task['name'], task['priority'], payload)
+    return added
+
+
+def _process_listing(frontier: Frontier, listing: dict, bucket: TokenBucket, known: dict | None, dedup,
+                     slots: HostSlots):
+    if not bucket.acquire():
+        frontier.mark(listing['url'], 'pending')
+        return False
+    with slots.hold(listing['url']):
+        html = fetch_page(listing['url'], kind='listing')
+    if not html:
+        frontier.fail(listing['url'], 'fetch failed')
+        return True
+    # Cards repeated from an earlier page (listings shift as jobs are posted) are already queued
+    fresh = [card for card in parse_job_list(html) if not frontier.has(canonical_url(card['url']))]
+    # Sharded by URL: another node's cards are not ours, but they still mean the page had news
+    shard = listing.get('shard')
+    cards = [card for card in fresh if in_shard(card['url'], shard)]
+    jobs = select_jobs(cards, listing['quota'], known, dedup)
+    queued = sum(frontier.add(job['url'], 'job', listing['category'], listing['priority'], job) for job in jobs)
+    # Quota not met yet: queue the next listing page (see crawl.iter_listing)
+    page = listing.get('page', 1)
+    next_url = next_page_url(html, listing['url'])
+    if (queued or shard and fresh) and queued < listing['quota'] and next_url and page < LISTING_MAX_PAGES:
+        frontier.add(next_url, 'listing', listing['category'], listing['priority'],
+                     {'quota': listing['quota'] - queued, 'page': page + 1, **({'shard': shard} if shard else {})})
+    frontier.mark(listing['url'], 'parsed')
+    event(log, logging.INFO, 'FRONTIER', f"{listing['category']}: {queued} job URLs queued (page {page})",
+          category=listing['category'], page=page, queued=queued)
+    return True
+
+
+def _process_job(frontier: Frontier, job: dict, bucket: TokenBucket, conditional: bool,
+                 pipeline, on_job: Callable[[dict], None] | None, slots: HostSlots):
+    if not bucket.acquire():
+        frontier.mark(job['url'], 'pending')
+        return False
+    with slots.hold(job['url']):
+        html = fetch_page(job['url'], conditional)
+    if html == NOT_MODIFIED:
+        # A 304 means the stored copy is still current
+        frontier.mark(job['url'], 'stored')
+        return True
+    if not html:
+        frontier.fail(job['url'], 'fetch failed')
+        return True
+    frontier.mark(job['url'], 'fetched')
+    inc('crawler_jobs_total', category=job['category'])
+    if pipeline:
+        pipeline.put(job['url'], html, {'fingerprint': job['fingerprint']})
+        return True
+    job_data = parse_job_detail(html, job['url'])
+    if not job_data:
+        frontier.fail(job['url'], 'parse failed')
+        return True
+    job_data['fingerprint'] = job['fingerprint']
+    frontier.mark(job['url'], 'parsed')
+    if on_job:
+        on_job(job_data)
+    return True
+
+
+def _worker(frontier: Frontier, worker: str, bucket: TokenBucket, conditional: bool,
+            known: dict | None, pipeline, on_job, dedup, slots: HostSlots):
+    while True:
+        listings = frontier.claim('listing', worker)
+        if listings:
+            if not _process_listing(frontier, listings[0], bucket, known, dedup, slots):
+                return
+            continue
+        jobs = frontier.claim('job', worker)
+        if jobs:
+            if not _process_job(frontier, jobs[0], bucket, conditional, pipeline, on_job, slots):
+                event(log, logging.WARNING, 'BUDGET', 'Request budget exhausted')
+                return
+            continue
+        if not frontier.busy('listing'):
+            return
+        time.sleep(0.2)  # another worker is still expanding a listing
+
+
+def crawl_frontier(frontier: Frontier, bucket: TokenBucket, workers: int = 1, conditional: bool = False,
+                   known: dict | None = None, pipeline=None,
+                   on_job: Callable[[dict], None] | None = None, dedup: DedupIndex | None = None,
+                   host_limit: int | None = None) -> dict:
+    """
+    Drain the frontier with `workers` threads: listing pages first (they add
+    job URLs), then job pages in priority order. Jobs are marked 'parsed' and
+    passed to `on_job` (or to `pipeline`); the caller marks them 'stored' once
+    they are safely in the database. With `dedup`, duplicate cards are never
+    queued. At most `host_limit` requests per host are in flight at once
+    (None: one per thread). Returns frontier.counts().
+    """
+    slots = HostSlots(host_limit)
+    prefix = f'{socket.gethostname()}-{os.getpid()}'
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_worker, frontier, f'{prefix}-{i}', bucket, conditional, known, pipeline, on_job,
+                               dedup, slots) for i in range(workers)]
+        for future in futures:
+            future.result()
+    return frontier.counts()
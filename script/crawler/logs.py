@@ -0,0 +1,47 @@
+"""
+Levelled logging for the crawler modules.
+
+Each module logs to logging.getLogger(__name__) through event(), which
+attaches a tag (FETCH, PAGE, DB ERROR, ...) and structured fields. The text
+format is the familiar "  [TAG] message"; --log-json writes one JSON object
+per line with the fields as keys, for log shippers. Per-page lines (FETCH,
+progress) are DEBUG, so a normal run does not pay for formatting them.
+"""
+import json
+import logging
+import sys
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        tag = getattr(record, 'tag', None) or record.levelname
+        return f"  [{tag}] {record.getMessage()}"
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'tag': getattr(record, 'tag', None),
+            'msg': record.getMessage(),
+            **getattr(record, 'fields', {}),
+        }
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level: str = 'info', json_format: bool = False):
+    """Send the crawler's logs to stdout (the scripts' own output goes there too)"""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if json_format else TextFormatter())
+    logger = logging.getLogger('crawler')
+    logger.handlers[:] = [handler]
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+
+def event(logger: logging.Logger, level: int, tag: str, message: str, **fields):
+    """Log `message` under `tag`; `fields` become keys of the JSON line"""
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={'tag': tag, 'fields': fields})
@@ -0,0 +1,132 @@
+"""
+Compiled keyword matcher for category detection.
+
+All keywords are folded (lowercase, Vietnamese diacritics removed, đ -> d)
+and compiled into one regex with word boundaries, so a text is scanned once
+instead of once per keyword, and 'it' no longer matches inside "digital".
+Folding makes "ke toan" match "Kế Toán" and the other way round.
+
+Keywords of SHORT_KEYWORD_LENGTH characters or fewer ('it', 'hr', 'ui', ...)
+are too ambiguous once folded ('ít' means "few"), so they are looked up as
+whole words in the text with its accents kept instead.
+"""
+import re
+import unicodedata
+
+SHORT_KEYWORD_LENGTH = 2
+# A hit in the title counts this many times a hit in the description
+TITLE_WEIGHT = 3.0
+
+
+def _decompose(text: str) -> str:
+    """Lowercase NFD: accents become separate combining code points"""
+    return unicodedata.normalize('NFD', text.lower())
+
+
+def _strip_accents(decomposed: str) -> str:
+    # An ASCII encode drops the combining marks in C; other non-ASCII characters go too
+    return decomposed.replace('đ', 'd').encode('ascii', 'ignore').decode('ascii')
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip diacritics: 'Kế toán Đà Nẵng' -> 'ke toan da nang'"""
+    return _strip_accents(_decompose(text))
+
+
+def _trie_pattern(trie: dict) -> str:
+    """Regex for a character trie; shared prefixes are matched once"""
+    end = '' in trie
+    branches = [(r'\s+' if char == ' ' else re.escape(char)) + _trie_pattern(child)
+                for char, child in sorted(trie.items()) if char]
+    if not branches:
+        return ''
+    if len(branches) == 1 and not end:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')' + ('?' if end else '')
+
+
+def _compile(keywords) -> re.Pattern | None:
+    """
+    One regex for all (folded, so ASCII) keywords, as a trie so the regex
+    engine does not retry every alternative at each position; words inside
+    a phrase may be separated by any whitespace
+    """
+    if not keywords:
+        return None
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return re.compile(rf'(?<![a-z0-9_]){_trie_pattern(trie)}(?![a-z0-9_])')
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or '\u0300' <= char <= '\u036f'
+
+
+def _count_words(decomposed: str, word: str) -> int:
+    """Occurrences of `word` not inside a longer word (str.find beats a regex here)"""
+    count, size = 0, len(word)
+    start = decomposed.find(word)
+    while start != -1:
+        end = start + size
+        if ((start == 0 or not _is_word_char(decomposed[start - 1]))
+                and (end == len(decomposed) or not _is_word_char(decomposed[end]))):
+            count += 1
+        start = decomposed.find(word, end)
+    return count
+
+
+class KeywordMatcher:
+    """
+    Weighted multi-keyword matcher: {category: [keywords]} -> scores per category.
+
+    Every occurrence of a keyword adds one point to each category listing it,
+    TITLE_WEIGHT points when it is in the title.
+    """
+
+    def __init__(self, keywords: dict[str, list[str]], title_weight: float = TITLE_WEIGHT):
+        self.title_weight = title_weight
+        self.order = {category: i for i, category in enumerate(keywords)}
+        self._folded, self._short = {}, {}
+        for category, words in keywords.items():
+            for word in words:
+                key = ' '.join(fold(word).split())
+                if len(key) <= SHORT_KEYWORD_LENGTH:
+                    table, key = self._short, _decompose(word.strip())
+                else:
+                    table = self._folded
+                categories = table.setdefault(key, [])
+                if category not in categories:
+                    categories.append(category)
+        self._pattern = _compile(self._folded)
+
+    def _score(self, text: str, weight: float, scores: dict[str, float]):
+        decomposed = _decompose(text)
+        if self._pattern:
+            for match in self._pattern.finditer(_strip_accents(decomposed)):
+                for category in self._folded[' '.join(match.group().split())]:
+                    scores[category] = scores.get(category, 0.0) + weight
+        if self._short:
+            for word, categories in self._short.items():
+                hits = _count_words(decomposed, word)
+                if hits:
+                    for category in categories:
+                        scores[category] = scores.get(category, 0.0) + hits * weight
+
+    def scores(self, title: str, description: str = '') -> dict[str, float]:
+        """{category: score} for every category with at least one hit"""
+        scores = {}
+        self._score(title, self.title_weight, scores)
+        if description:
+            self._score(description, 1.0, scores)
+        return scores
+
+    def best(self, title: str, description: str = '', default: str | None = None) -> str | None:
+        """Highest scoring category; ties go to the one listed first"""
+        scores = self.scores(title, description)
+        if not scores:
+            return default
+        return max(scores, key=lambda category: (scores[category], -self.order[category]))
@@ -0,0 +1,195 @@
+"""
+Run metrics: counters and histograms, exported as a Prometheus textfile
+(for node_exporter's textfile collector) and as a JSON run report.
+
+  crawler_fetch_seconds{host}              histogram  HTTP request latency
+  crawler_fetch_bytes_total{host}          counter    decoded response bytes
+  crawler_http_responses_total{host,status}
+  crawler_fetch_errors_total{host}         counter    network errors and HTTP errors
+  crawler_fetch_retries_total{host,reason} counter    requests retried (429, 5xx, network errors)
+  crawler_circuit_open_total{host}         counter    times a host's circuit breaker opened
+  crawler_parse_seconds{page}              histogram  parse time of a listing / detail page
+  crawler_parse_failures_total{page}       counter
+  crawler_db_batch_seconds                 histogram  commit time of a JobWriter batch
+  crawler_db_rows_total                    counter    rows written by JobWriter
+  crawler_jobs_total{category}             counter    detail pages fetched per crawl category
+
+Histograms keep fixed buckets, not samples, so memory does not grow with
+the run; the report's percentiles are interpolated within a bucket.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HELP = {
+    'crawler_fetch_seconds': 'HTTP request latency',
+    'crawler_fetch_bytes_total': 'Decoded response bytes',
+    'crawler_http_responses_total': 'HTTP responses by status',
+    'crawler_fetch_errors_total': 'Requests that failed (network or HTTP error)',
+    'crawler_fetch_retries_total': 'Requests retried after a 429, 5xx or network error',
+    'crawler_circuit_open_total': 'Times a host circuit breaker opened',
+    'crawler_parse_seconds': 'Parse time per page',
+    'crawler_parse_failures_total': 'Pages the parser returned nothing for',
+    'crawler_db_batch_seconds': 'Write and commit time of a database batch',
+    'crawler_db_rows_total': 'Rows written to the database',
+    'crawler_jobs_total': 'Job detail pages fetched per crawl category',
+}
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = SECONDS_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = self.buckets[i - 1] if i else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+class Metrics:
+    """Thread-safe registry; series are created on first use"""
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started = time.time()
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines, typed = [], set()
+
+        def header(name: str, kind: str):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# HELP {name} {HELP.get(name, name)}')
+                lines.append(f'# TYPE {name} {kind}')
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                header(name, 'counter')
+                lines.append(f'{name}{_labels(labels)} {value}')
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                header(name, 'histogram')
+                cumulative = 0
+                for bound, n in zip((*histogram.buckets, '+Inf'), histogram.counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{_labels(labels + (("le", bound),))} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {histogram.sum}')
+                lines.append(f'{name}_count{_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def report(self) -> dict:
+        """Counters with their rate over the run, histograms with mean and percentiles"""
+        elapsed = max(time.time() - self.started, 1e-9)
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value, 'per_sec': round(value / elapsed, 3)}
+                        for (name, labels), value in sorted(self._counters.items())]
+            histograms = [{
+                'name': name, 'labels': dict(labels), 'count': h.count, 'sum': round(h.sum, 6),
+                'mean': round(h.sum / h.count, 6) if h.count else None,
+                **{f'p{int(q * 100)}': h.quantile(q) for q in (0.5, 0.9, 0.99)},
+            } for (name, labels), h in sorted(self._histograms.items(), key=lambda item: item[0])]
+        return {
+            'started_at': datetime.fromtimestamp(self.started).isoformat(),
+            'elapsed': round(elapsed, 3),
+            'counters': counters,
+            'histograms': histograms,
+        }
+
+
+METRICS = Metrics()
+inc = METRICS.inc
+observe = METRICS.observe
+timer = METRICS.timer
+
+
+def timed(name: str, **labels):
+    """Decorator: observe the duration of every call in histogram `name`"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                METRICS.observe(name, time.perf_counter() - start, **labels)
+        return wrapper
+    return decorate
+
+
+def _write_atomic(path: str, text: str):
+    """The textfile collector may read at any time: never let it see a half-written file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_textfile(path: str, metrics: Metrics = METRICS):
+    _write_atomic(path, metrics.prometheus())
+
+
+def write_report(path: str, extra: dict | None = None, metrics: Metrics = METRICS):
+    """JSON run report: metrics.report() plus `extra` (arguments, totals, ...)"""
+    _write_atomic(path, json.dumps({**(extra or {}), **metrics.report()}, ensure_ascii=False, indent=2))
@@ -0,0 +1,202 @@
+"""
+Streaming newline-delimited JSON: one job per line, optionally compressed.
+
+The compression is picked from the file name: .gz (gzip), .zst (zstandard,
+optional dependency) or plain text. Every record is flushed as soon as it
+is written, so a crash loses at most the record being written; a torn last
+line is skipped on read.
+
+Plain JSON files of arrays (legacy job exports, mock data exports) are read
+incrementally too, item by item, with iter_json_arrays().
+"""
+import gzip
+import io
+import json
+import logging
+import re
+import threading
+from typing import Any, Iterator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .logs import event
+
+log = logging.getLogger(__name__)
+
+
+def _open(path: str, mode: str):
+    """Open a text stream for 'r', 'w' or 'a'; compressed streams append new frames/members"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("Install the 'zstandard' package to use .zst files")
+        raw = open(path, mode + 'b')
+        if mode == 'r':
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        else:
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(raw)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class NDJSONWriter:
+    """Append-only job writer; thread-safe, flushes after every record"""
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self.count = 0
+        self._file = _open(path, 'a' if append else 'w')
+        self._lock = threading.Lock()
+
+    def write(self, job: dict):
+        line = json.dumps(job, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.path.endswith('.zst'):
+                # TextIOWrapper.flush() only reaches the compressor; end the block too
+                self._file.buffer.flush(zstandard.FLUSH_BLOCK)
+            self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_ndjson(path: str) -> Iterator[dict]:
+    """Yield records one by one; a truncated trailing record (from a crash) is skipped"""
+    with _open(path, 'r') as f:
+        try:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    event(log, logging.WARNING, 'WARN', f"{path}:{line_no}: skipping incomplete record",
+                          path=path, line=line_no)
+        except (EOFError, zstandard.ZstdError if zstandard else EOFError) as e:
+            event(log, logging.WARNING, 'WARN', f"{path}: truncated stream ({e})", path=path)
+
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+# What may follow a number that was cut off by the end of the buffer ("1" of "1.5e3")
+NUMBER_TAIL = re.compile(r'[0-9.eE+-]*\Z')
+
+
+class JSONStream:
+    """
+    Incremental JSON reader over a text stream. Values are decoded with
+    raw_decode from a buffer that is refilled `chunk_size` characters at a
+    time and drops what has been consumed, so memory stays bounded by the
+    chunk size plus the largest value read.
+    """
+
+    def __init__(self, f, chunk_size: int = 1 << 20):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, '' at the end of the stream"""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def take(self, allowed: str) -> str:
+        """Consume the next character, which must be one of `allowed`"""
+        char = self.peek()
+        if not char or char not in allowed:
+            raise ValueError(f"Expected one of {allowed!r}, got {char or 'end of file'!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        while True:
+            self.peek()
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Most likely cut off at the end of the buffer: read on and retry
+                if self._fill():
+                    continue
+                raise
+            # A number at the very end of the buffer may go on in the next chunk
+            if NUMBER_TAIL.match(self.buf, end) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def items(self) -> Iterator[Any]:
+        """The items of the array starting here"""
+        self.take('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.take(',]') == ']':
+                return
+
+
+def iter_json_arrays(path: str, chunk_size: int = 1 << 20) -> Iterator[tuple[str | None, Any]]:
+    """
+    (key, item) for every item of the arrays in a JSON file, without loading
+    the file: {"a": [...], "b": [...]} yields ('a', item)... then ('b', item)...,
+    a top-level array yields (None, item). Object members that are not arrays
+    are skipped.
+    """
+    with _open(path, 'r') as f:
+        stream = JSONStream(f, chunk_size)
+        if stream.peek() == '[':
+            for item in stream.items():
+                yield None, item
+            return
+        stream.take('{')
+        if stream.peek() == '}':
+            return
+        while True:
+            key = stream.value()
+            stream.take(':')
+            if stream.peek() == '[':
+                for item in stream.items():
+                    yield key, item
+            else:
+                stream.value()
+            if stream.take(',}') == '}':
+                return
+
+
+def iter_jobs_file(path: str) -> Iterator[dict]:
+    """Jobs from an NDJSON file, or from a legacy JSON array file (*.json), streamed"""
+    if path.endswith('.json'):
+        for _, job in iter_json_arrays(path):
+            yield job
+    else:
+        yield from iter_ndjson(path)
@@ -0,0 +1,105 @@
+"""
+Salary and experience normalization: free text -> numbers.
+
+  "10 - 15 triệu"    -> 10,000,000 .. 15,000,000 VND
+  "Tới 20 triệu"     ->       None .. 20,000,000 VND
+  "Trên 2,000 USD"   -> 2,000 USD converted at USD_TO_VND .. None
+  "Thoả thuận"       -> negotiable
+  "Dưới 1 năm"       -> 0 .. 1 years
+  "Trên 5 năm"       -> 5 .. None years
+
+Open ends stay None so "up to 20 triệu" is not mistaken for "exactly 20".
+"""
+import re
+
+from .config import USD_TO_VND
+from .matcher import fold
+
+NEGOTIABLE = ('thoa thuan', 'negotiable', 'canh tranh', 'competitive')
+# Folded unit word -> VND multiplier
+UNITS = {
+    'ty': 1_000_000_000,
+    'trieu': 1_000_000, 'tr': 1_000_000,
+    'nghin': 1_000, 'ngan': 1_000, 'k': 1_000,
+    'vnd': 1, 'd': 1,
+}
+CURRENCIES = {'usd': 'USD', '$': 'USD'}
+# "Tới 20 triệu", "Up to", "Dưới" open below; "Trên", "Từ", "Over" open above
+UPPER_ONLY = ('toi', 'up to', 'duoi', 'under', 'den')
+LOWER_ONLY = ('tren', 'tu', 'over', 'from')
+
+NUMBER = re.compile(r'\d+(?:[.,]\d+)*')
+THOUSANDS = re.compile(r'\d{1,3}(?:([.,])\d{3})(?:\1\d{3})*')
+WORD = re.compile(r'[a-z$]+')
+MONTHS = re.compile(r'thang|month')
+
+
+def _number(text: str) -> float:
+    """'2,500' and '15.000.000' are thousands separators, '22.5' and '1,5' decimals"""
+    if THOUSANDS.fullmatch(text):
+        return float(re.sub(r'[.,]', '', text))
+    return float(text.replace(',', '.'))
+
+
+def _bounds(folded: str, values: list[float]) -> tuple[float | None, float | None]:
+    if len(values) >= 2:
+        return min(values[:2]), max(values[:2])
+    value = values[0]
+    if folded.startswith(UPPER_ONLY):
+        return None, value
+    if folded.startswith(LOWER_ONLY):
+        return value, None
+    return value, value
+
+
+def parse_salary(text: str | None) -> dict:
+    """
+    {'salary_min_vnd', 'salary_max_vnd', 'salary_currency', 'salary_negotiable'}
+    for a salary as shown on TopCV; all None when the text is not understood
+    """
+    result = {'salary_min_vnd': None, 'salary_max_vnd': None, 'salary_currency': None, 'salary_negotiable': 0}
+    folded = ' '.join(fold(text or '').split())
+    if any(word in folded for word in NEGOTIABLE):
+        result['salary_negotiable'] = 1
+        return result
+    numbers = NUMBER.findall(folded)
+    if not numbers:
+        return result
+    values = [_number(n) for n in numbers]
+    words = WORD.findall(folded.replace('$', ' $ '))
+    currency = next((CURRENCIES[w] for w in words if w in CURRENCIES), 'VND')
+    if currency == 'USD':
+        multiplier = USD_TO_VND
+    else:
+        multiplier = next((UNITS[w] for w in words if w in UNITS), None)
+        if multiplier is None:
+            # "10 - 15" with no unit: millions, unless the numbers are already in VND
+            multiplier = 1_000_000 if max(values) < 1000 else 1
+    low, high = _bounds(folded, values)
+    result['salary_currency'] = currency
+    result['salary_min_vnd'] = round(low * multiplier) if low is not None else None
+    result['salary_max_vnd'] = round(high * multiplier) if high is not None else None
+    return result
+
+
+def parse_experience(text: str | None) -> tuple[float | None, float | None]:
+    """(min years, max years) for 'Không yêu cầu', '2 năm', 'Dưới 1 năm', '1 - 3 năm', '6 tháng', ..."""
+    folded = ' '.join(fold(text or '').split())
+    if not folded:
+        return None, None
+    if 'khong yeu cau' in folded or 'no experience' in folded or 'chua co' in folded:
+        return 0, None
+    numbers = NUMBER.findall(folded)
+    if not numbers:
+        return None, None
+    scale = 1 / 12 if MONTHS.search(folded) else 1
+    low, high = _bounds(folded, [_number(n) * scale for n in numbers])
+    if low is None:
+        low = 0  # "Dưới 1 năm": anything from none up to a year
+    return low, high
+
+
+def normalize_job(job: dict) -> dict:
+    """The typed columns for a parsed job; experience comes from `experience`"""
+    exp_min, exp_max = parse_experience(job.get('experience'))
+    return {**parse_salary(job.get('salary')), 'exp_min_years': exp_min, 'exp_max_years': exp_max}
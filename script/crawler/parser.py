@@ -1,49 +1,101 @@
 """HTML parsing functions"""
 import hashlib
+import html as htmllib
+import logging
 import random
+import re
+import time
 from datetime import datetime
+from urllib.parse import urljoin
 
-import requests
-from bs4 import BeautifulSoup
+from . import config
+from .archive import archive_page
+from .backends import LIST_CLASSES, DETAIL_CLASSES, get_backend, page_text_lower
+from .client import fetch, host_wait
+from .config import DEFAULT_BACKGROUNDS, CATEGORY_MATCHER
+from .dedup import canonical_url, make_job_id
+from .logs import event
+from .metrics import inc, timed
 
-from .config import HEADERS, DEFAULT_BACKGROUNDS, CATEGORY_KEYWORDS
+log = logging.getLogger(__name__)
 
+# Bump whenever parse_job_detail() output changes: archived pages cached under
+# an older version are parsed again by `reparse.py --archive`
+PARSER_VERSION = 1
 
-def fetch_page(url: str) -> str | None:
-    """Fetch HTML content from URL"""
+# TopCV's "next page" arrow: <a data-href="...?page=2" rel="next">
+NEXT_LINK = re.compile(r'<a\b[^>]*\brel="next"[^>]*>')
+LINK_TARGET = re.compile(r'\b(?:data-href|href)="([^"]+)"')
+
+# fetch_page() result for a 304: falsy like a failure (None), but callers that
+# sent a conditional request can tell the two apart
+NOT_MODIFIED = ''
+
+
+def fetch_page(url: str, conditional: bool = False, kind: str = 'job') -> str | None:
+    """
+    Fetch HTML content from URL over the shared session.
+    Returns None when the fetch failed (error status, timeout, open circuit)
+    and, with `conditional`, NOT_MODIFIED when the server answers 304.
+    Pages are archived as `kind` ('job' or 'listing') when an archive is set.
+    While the host's circuit is open the call waits for its next trial
+    request, once; if that fails too, it returns None without a request.
+    """
     try:
-        print(f"  [FETCH] {url}")
-        resp = requests.get(url, headers=HEADERS, timeout=30)
-        resp.raise_for_status()
-        return resp.text
+        wait = host_wait(url)
+        if wait:
+            time.sleep(wait)
+        event(log, logging.DEBUG, 'FETCH', url, url=url, kind=kind)
+        result = fetch(url, conditional)
+        if result.not_modified:
+            event(log, logging.DEBUG, '304', 'Not modified', url=url)
+            return NOT_MODIFIED
+        if result.text:
+            archive_page(url, result.text, kind)
+        return result.text or None
     except Exception as e:
-        print(f"  [ERROR] {e}")
+        event(log, logging.WARNING, 'ERROR', str(e), url=url, kind=kind)
         return None
 
 
-def parse_job_list(html: str) -> list[dict]:
+def card_fingerprint(card: dict) -> str:
+    """Fingerprint of a listing card; changes when title, salary or location change"""
+    key = '|'.join(card.get(field, '') for field in ('title', 'salary', 'location'))
+    return hashlib.md5(key.encode()).hexdigest()[:12]
+
+
+def next_page_url(html: str, url: str) -> str | None:
+    """URL of the listing page after this one, None on the last page"""
+    link = NEXT_LINK.search(html)
+    target = LINK_TARGET.search(link.group(0)) if link else None
+    return urljoin(url, htmllib.unescape(target.group(1))) if target else None
+
+
+@timed('crawler_parse_seconds', page='listing')
+def parse_job_list(html: str, backend: str | None = None) -> list[dict]:
     """Parse job list page and extract basic job info"""
-    soup = BeautifulSoup(html, 'html.parser')
+    be = get_backend(backend or config.PARSER_BACKEND)
+    root = be.parse(html, LIST_CLASSES)
     jobs = []
-    cards = soup.select('div.job-item-search-result')
+    cards = be.select(root, 'div.job-item-search-result')
     
     for card in cards:
         try:
-            title_link = card.select_one('h3.title a')
+            title_link = be.select_one(card, 'h3.title a')
             if not title_link:
                 continue
             
-            company_elem = card.select_one('a.company span.company-name')
-            salary_elem = card.select_one('label.title-salary') or card.select_one('label.salary span')
-            loc_elem = card.select_one('label.address span.city-text')
+            company_elem = be.select_one(card, 'a.company span.company-name')
+            salary_elem = be.select_one(card, 'label.title-salary') or be.select_one(card, 'label.salary span')
+            loc_elem = be.select_one(card, 'label.address span.city-text')
             
             jobs.append({
-                'job_id': card.get('data-job-id', ''),
-                'title': title_link.get_text(strip=True),
-                'url': title_link.get('href', ''),
-                'company': company_elem.get_text(strip=True) if company_elem else '',
-                'salary': salary_elem.get_text(strip=True) if salary_elem else 'Thoa thuan',
-                'location': loc_elem.get_text(strip=True) if loc_elem else '',
+                'job_id': be.attr(card, 'data-job-id'),
+                'title': be.text(title_link),
+                'url': be.attr(title_link, 'href'),
+                'company': be.text(company_elem) if company_elem else '',
+                'salary': be.text(salary_elem) if salary_elem else 'Thoa thuan',
+                'location': be.text(loc_elem) if loc_elem else '',
             })
         except:
             continue
@@ -51,34 +103,31 @@ def parse_job_list(html: str) -> list[dict]:
 
 
 def detect_category(title: str, description: str) -> str:
-    """Auto-detect job category based on title and description"""
-    text = (title + ' ' + description).lower()
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword.lower() in text:
-                return category
-    return 'Khác'
+    """Auto-detect job category: the best weighted keyword score, title hits counting most"""
+    return CATEGORY_MATCHER.best(title, description, default='Khác')
 
 
-def parse_job_detail(html: str, url: str) -> dict | None:
+@timed('crawler_parse_seconds', page='detail')
+def parse_job_detail(html: str, url: str, backend: str | None = None) -> dict | None:
     """Parse job detail page and extract full job info"""
-    soup = BeautifulSoup(html, 'html.parser')
+    be = get_backend(backend or config.PARSER_BACKEND)
+    root = be.parse(html, DETAIL_CLASSES)
     
     try:
-        title = soup.select_one('h1.job-detail__info--title')
-        company = soup.select_one('div.company-name-label a.name')
-        salary = soup.select_one('div.section-salary .job-detail__info--section-content-value')
-        location = soup.select_one('div.section-location .job-detail__info--section-content-value')
-        experience = soup.select_one('div.section-experience .job-detail__info--section-content-value')
+        title = be.select_one(root, 'h1.job-detail__info--title')
+        company = be.select_one(root, 'div.company-name-label a.name')
+        salary = be.select_one(root, 'div.section-salary .job-detail__info--section-content-value')
+        location = be.select_one(root, 'div.section-location .job-detail__info--section-content-value')
+        experience = be.select_one(root, 'div.section-experience .job-detail__info--section-content-value')
         
         description = requirements = benefits = ''
-        for item in soup.select('div.job-description__item'):
-            h3 = item.select_one('h3')
-            content = item.select_one('.job-description__item--content')
+        for item in be.select(root, 'div.job-description__item'):
+            h3 = be.select_one(item, 'h3')
+            content = be.select_one(item, '.job-description__item--content')
             if not h3 or not content:
                 continue
-            heading = h3.get_text(strip=True).lower()
-            text = content.get_text(strip=True)
+            heading = be.text(h3).lower()
+            text = be.text(content)
             if 'mo ta' in heading or 'mô tả' in heading:
                 description = text
             elif 'yeu cau' in heading or 'yêu cầu' in heading:
@@ -86,30 +135,31 @@ def parse_job_detail(html: str, url: str) -> dict | None:
             elif 'quyen loi' in heading or 'quyền lợi' in heading:
                 benefits = text
         
-        tags = [t.get_text(strip=True) for t in soup.select('.item-tag')[:6]]
-        logo = soup.select_one('.company-logo img')
-        page_text = soup.get_text().lower()
-        title_text = title.get_text(strip=True) if title else ''
+        tags = [be.text(t) for t in be.select(root, '.item-tag')[:6]]
+        logo = be.select_one(root, '.company-logo img')
+        page_text = page_text_lower(html)
+        title_text = be.text(title) if title else ''
         
         return {
-            'id': hashlib.md5(url.encode()).hexdigest()[:12],
+            'id': make_job_id(url),
             'title': title_text,
-            'company': company.get_text(strip=True) if company else '',
-            'salary': salary.get_text(strip=True) if salary else 'Thoa thuan',
-            'location': location.get_text(strip=True) if location else '',
-            'experience': experience.get_text(strip=True) if experience else '',
+            'company': be.text(company) if company else '',
+            'salary': be.text(salary) if salary else 'Thoa thuan',
+            'location': be.text(location) if location else '',
+            'experience': be.text(experience) if experience else '',
             'category': detect_category(title_text, description),
             'description': description[:500],
             'requirements': requirements[:500],
             'benefits': benefits[:500],
             'tags': tags,
-            'logo': logo.get('src', '') if logo else '',
+            'logo': be.attr(logo, 'src') if logo else '',
             'remote': any(kw in page_text for kw in ['remote', 'lam viec tu xa', 'wfh']),
-            'url': url,
+            'url': canonical_url(url),
             'background_image': random.choice(DEFAULT_BACKGROUNDS),
             'source': 'topcv',
             'created_at': datetime.now().isoformat(),
         }
     except Exception as e:
-        print(f"  [ERROR] Parse failed: {e}")
+        inc('crawler_parse_failures_total', page='detail')
+        event(log, logging.WARNING, 'ERROR', f"Parse failed: {e}", url=url)
         return None
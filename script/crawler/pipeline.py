@@ -0,0 +1,104 @@
+"""Parsing stage on a process pool, decoupled from fetching"""
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from .config import PIPELINE_QUEUE_SIZE
+from .logs import event
+from .metrics import inc, observe
+from .parser import parse_job_detail
+
+log = logging.getLogger(__name__)
+_DONE = object()
+# Workers must not be forked from this process: fetcher, writer, metrics and
+# logging threads may hold a lock at that moment, and the child would inherit
+# it locked. parse_job_detail is importable, so fresh interpreters can run it
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def _parse_timed(html: str, url: str) -> tuple[dict | None, float]:
+    """parse_job_detail in a worker process; the time is recorded by the parent"""
+    start = time.perf_counter()
+    job = parse_job_detail(html, url)
+    return job, time.perf_counter() - start
+
+
+class ParsePipeline:
+    """
+    fetchers --put()--> bounded queue --> ProcessPoolExecutor(parse_job_detail) --> sink
+
+    put() blocks while the queue is full, so slow parsing pushes back on the
+    fetchers instead of piling HTML up in memory. At most 2 pages per worker
+    are being parsed or waiting for the sink at any time. The sink is called
+    with each parsed job dict from a single writer thread, so it may hold a
+    SQLite connection. Use as a context manager or call close() to drain and
+    stop cleanly.
+    """
+
+    def __init__(self, sink: Callable[[dict], None], workers: int | None = None,
+                 queue_size: int = PIPELINE_QUEUE_SIZE):
+        self.sink = sink
+        self.workers = workers or os.cpu_count() or 1
+        self.parsed = 0
+        self.failed = 0
+        self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(START_METHOD))
+        self._inbox = queue.Queue(queue_size)
+        self._outbox = queue.Queue()
+        self._slots = threading.BoundedSemaphore(self.workers * 2)
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        self._dispatcher.start()
+        self._writer.start()
+
+    def put(self, url: str, html: str, extra: dict | None = None):
+        """Queue a fetched page; `extra` fields are merged into the parsed dict"""
+        self._inbox.put((url, html, extra))
+
+    def _dispatch(self):
+        while (item := self._inbox.get()) is not _DONE:
+            url, html, extra = item
+            self._slots.acquire()
+            future = self._pool.submit(_parse_timed, html, url)
+            future.add_done_callback(lambda f, extra=extra: self._outbox.put((f, extra)))
+
+    def _write(self):
+        while (item := self._outbox.get()) is not _DONE:
+            future, extra = item
+            self._slots.release()
+            try:
+                job, elapsed = future.result()
+                observe('crawler_parse_seconds', elapsed, page='detail')
+            except Exception as e:
+                event(log, logging.ERROR, 'ERROR', f"Parse worker failed: {e}")
+                job = None
+            if not job:
+                inc('crawler_parse_failures_total', page='detail')
+                self.failed += 1
+                continue
+            if extra:
+                job.update(extra)
+            try:
+                self.sink(job)
+                self.parsed += 1
+            except Exception as e:
+                self.failed += 1
+                event(log, logging.ERROR, 'ERROR', f"Sink failed: {e}")
+
+    def close(self):
+        """Parse everything already queued, deliver it to the sink, then stop"""
+        self._inbox.put(_DONE)
+        self._dispatcher.join()
+        self._pool.shutdown(wait=True)
+        self._outbox.put(_DONE)
+        self._writer.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
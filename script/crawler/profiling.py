@@ -0,0 +1,73 @@
+"""
+Per-run profiles for craw-all.py --profile / --trace-malloc.
+
+The crawl runs on worker threads. Before Python 3.12 cProfile only sees
+the thread that enabled it, so profile_threads() gives every thread started
+inside it a profiler of its own and merges them all into one .prof file
+(open it with `python -m pstats` or snakeviz). From 3.12 cProfile runs on
+sys.monitoring, which is process-wide and allows one profiler at a time:
+the single profiler of the calling thread sees every thread. Parser
+processes (--parse-workers) are not profiled.
+"""
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+
+@contextmanager
+def profile_threads(path: str, top: int = 25):
+    """cProfile this thread and the threads it starts; write `path` and print the top functions"""
+    profiles = [cProfile.Profile()]
+    lock = threading.Lock()
+
+    def start_thread_profile(*_):
+        # First profile event of a new thread: swap this hook for a real profiler
+        profile = cProfile.Profile()
+        with lock:
+            profiles.append(profile)
+        profile.enable()
+
+    per_thread = sys.version_info < (3, 12)
+    if per_thread:
+        threading.setprofile(start_thread_profile)
+    profiles[0].enable()
+    try:
+        yield
+    finally:
+        profiles[0].disable()
+        if per_thread:
+            threading.setprofile(None)
+        stats = pstats.Stats(profiles[0])
+        with lock:
+            for profile in profiles[1:]:
+                stats.add(profile)
+        stats.dump_stats(path)
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats('cumulative').print_stats(top)
+        threads = f"{len(profiles)} threads" if per_thread else "all threads"
+        print(f"[PROFILE] {threads} profiled, saved to {path}")
+        print(out.getvalue())
+
+
+@contextmanager
+def trace_malloc(path: str, top: int = 30, frames: int = 5):
+    """Trace allocations; write the peak and the largest live allocation sites to `path`"""
+    tracemalloc.start(frames)
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"current {current / 1024 / 1024:.1f} MB, peak {peak / 1024 / 1024:.1f} MB\n\n")
+            for stat in snapshot.statistics('traceback')[:top]:
+                f.write(f"{stat.size / 1024:.1f} KB in {stat.count} blocks\n")
+                f.write('\n'.join(stat.traceback.format()) + '\n\n')
+        print(f"[MALLOC] Peak {peak / 1024 / 1024:.1f} MB traced, top {top} allocation sites saved to {path}")
@@ -0,0 +1,332 @@
+"""
+Publish: build the read-only jobs.db the browser downloads from the working DB.
+
+The working DB (DB_FILE) is tuned for crawling: WAL, crawl-only columns such
+as raw_data. The published copy keeps only what the app reads, ordered newest
+first, with indexes for the app's queries, fresh statistics and no free
+pages, in whichever page size makes the smallest file.
+
+Every publish is a new version, numbered past both the working DB's
+publish_log and the existing manifest. Alongside the database it writes a
+gzipped NDJSON delta with the jobs inserted, updated and deleted since the
+previous version, taken from the working DB's job_changes log, and a
+manifest listing the deltas, so a client holding version N downloads only
+the deltas after N.
+
+The FTS5 search index (jobs_fts) is only published on request: the stock
+sql.js build the app loads has no FTS5, so it would be dead weight there
+and its triggers would fail every delta; search falls back to LIKE. An app
+served with an FTS5-enabled sql.js publishes with search_index. The
+manifest then names the index and its triggers, so a client whose build
+still lacks FTS5 can drop them before applying deltas.
+
+With a chunk size the file is also split into fixed-size pieces under
+chunks/ with a config.json in the format of sql.js-httpvfs, so a client can
+open the database over HTTP range requests and read only the pages a query
+touches instead of downloading all of it.
+
+Delta format, one JSON array per line:
+  ["delta", from_version, to_version, [column, ...]]   header
+  ["u", value, ...]                                     upsert, values in column order
+  ["d", job_id]                                         delete
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+
+from .config import DB_FILE, PUBLISH_DB_FILE, PUBLISH_PAGE_SIZES, DELTA_RETENTION
+from .database import RANGE_INDEXES, create_search_index
+
+# Columns of jobs that only the crawler uses
+CRAWL_ONLY_COLUMNS = ('raw_data', 'fingerprint', 'minhash')
+# Near-duplicates of another job (crawler/dedup.py) are not published
+PUBLISHED_JOBS = 'canonical_id IS NULL OR canonical_id = id'
+# Crawl bookkeeping that never ships
+CRAWL_ONLY_TABLES = ('job_changes', 'publish_log')
+
+PUBLISH_INDEXES = (
+    'CREATE INDEX idx_jobs_crawled_at ON jobs(crawled_at)',
+    'CREATE INDEX idx_jobs_category ON jobs(category, crawled_at)',
+) + RANGE_INDEXES
+
+MANIFEST_NAME = 'manifest.json'
+DELTA_DIR = 'deltas'
+CHUNK_DIR = 'chunks'
+
+
+def _column_def(column: tuple) -> str:
+    _, name, decl, notnull, default, pk = column
+    parts = [name, decl]
+    if pk:
+        parts.append('PRIMARY KEY')
+    if notnull:
+        parts.append('NOT NULL')
+    if default is not None:
+        parts.append(f'DEFAULT {default}')
+    if name == 'url':
+        parts.append('UNIQUE')  # also the url index
+    return ' '.join(p for p in parts if p)
+
+
+def _copy_jobs(conn: sqlite3.Connection, search_index: bool) -> list[str]:
+    columns = [c for c in conn.execute('PRAGMA work.table_info(jobs)') if c[1] not in CRAWL_ONLY_COLUMNS]
+    conn.execute(f"CREATE TABLE jobs ({', '.join(map(_column_def, columns))})")
+    names = ', '.join(c[1] for c in columns)
+    # Newest first in rowid order, so the feed query reads neighbouring pages
+    conn.execute(f'''
+        INSERT INTO jobs ({names}) SELECT {names} FROM work.jobs
+        WHERE {PUBLISHED_JOBS} ORDER BY crawled_at DESC
+    ''')
+    for sql in PUBLISH_INDEXES:
+        conn.execute(sql)
+    if search_index:
+        # Triggers stay so a client applying deltas keeps the search index in sync;
+        # the manifest lists them for clients whose SQLite lacks FTS5 (see publish)
+        create_search_index(conn)
+        conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('optimize')")
+    return [c[1] for c in columns]
+
+
+def _copy_other_tables(conn: sqlite3.Connection) -> list[str]:
+    """Every other table (instructors, posts, ...) with its indexes, as it is"""
+    skip = ('jobs',) + CRAWL_ONLY_TABLES
+    tables = conn.execute(f'''
+        SELECT name, sql FROM work.sqlite_master
+        WHERE type = 'table' AND name NOT IN ({', '.join('?' * len(skip))})
+              AND name NOT LIKE 'jobs_fts%' AND name NOT LIKE 'sqlite_%'
+    ''', skip).fetchall()
+    for name, sql in tables:
+        conn.execute(sql)
+        conn.execute(f'INSERT INTO main."{name}" SELECT * FROM work."{name}"')
+    for (sql,) in conn.execute(f'''
+        SELECT sql FROM work.sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({', '.join('?' * len(tables))})
+    ''', [name for name, _ in tables]).fetchall():
+        conn.execute(sql)
+    return [name for name, _ in tables]
+
+
+def _tables_digest(conn: sqlite3.Connection, tables: list[str]) -> str:
+    """Content hash of the tables deltas do not cover; a change means clients need the full file"""
+    digest = hashlib.md5()
+    for name in sorted(tables):
+        for row in conn.execute(f'SELECT * FROM main."{name}" ORDER BY rowid'):
+            digest.update(repr(row).encode())
+    return digest.hexdigest()
+
+
+def _write_delta(conn: sqlite3.Connection, path: str, columns: list[str],
+                 base: int, version: int, since_seq: int, until_seq: int) -> dict:
+    """Jobs changed in (since_seq, until_seq] of the change log, latest state of each"""
+    changes = conn.execute('''
+        SELECT job_id, op FROM work.job_changes
+        WHERE seq > ? AND seq <= ? AND seq IN (SELECT MAX(seq) FROM work.job_changes GROUP BY job_id)
+        ORDER BY seq
+    ''', (since_seq, until_seq)).fetchall()
+    upserts = deletes = 0
+    # A job that became a duplicate is deleted from the client's copy
+    select = f"SELECT {', '.join(columns)} FROM work.jobs WHERE id = ? AND ({PUBLISHED_JOBS})"
+    with gzip.open(path, 'wt', encoding='utf-8') as out:
+        out.write(json.dumps(['delta', base, version, columns]) + '\n')
+        for job_id, op in changes:
+            row = conn.execute(select, (job_id,)).fetchone() if op == 'upsert' else None
+            if row:
+                out.write(json.dumps(['u', *row], ensure_ascii=False) + '\n')
+                upserts += 1
+            else:
+                out.write(json.dumps(['d', job_id]) + '\n')
+                deletes += 1
+    return {'from': base, 'to': version, 'file': f'{DELTA_DIR}/{os.path.basename(path)}',
+            'bytes': os.path.getsize(path), 'upserts': upserts, 'deletes': deletes}
+
+
+def _load_manifest(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_chunks(db_path: str, out_dir: str, chunk_size: int, page_size: int) -> dict:
+    """
+    Split `db_path` into `chunk_size` files (name.000, name.001, ...) in
+    `out_dir` and write the sql.js-httpvfs config.json next to them; a page
+    never straddles two chunks. Returns the config.
+    """
+    if chunk_size % page_size:
+        raise ValueError(f'Chunk size {chunk_size} is not a multiple of the page size {page_size}')
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+    prefix = os.path.basename(db_path) + '.'
+    count = 0
+    with open(db_path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            with open(os.path.join(out_dir, f'{prefix}{count:03}'), 'wb') as out:
+                out.write(chunk)
+            count += 1
+    config = {
+        'serverMode': 'chunked',
+        'requestChunkSize': page_size,  # one page per range request
+        'databaseLengthBytes': os.path.getsize(db_path),
+        'serverChunkSize': chunk_size,
+        'urlPrefix': prefix,
+        'suffixLength': 3,
+    }
+    with open(os.path.join(out_dir, 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=1)
+    return config
+
+
+def _vacuum_into(conn: sqlite3.Connection, path: str, page_size: int) -> int:
+    if os.path.exists(path):
+        os.remove(path)
+    conn.execute(f'PRAGMA page_size = {page_size}')
+    conn.execute('VACUUM INTO ?', (path,))
+    return os.path.getsize(path)
+
+
+def publish(src: str = DB_FILE, dest: str = PUBLISH_DB_FILE, page_sizes=PUBLISH_PAGE_SIZES,
+            chunk_size: int | None = None, search_index: bool = False) -> dict:
+    """
+    Build version N+1 of `dest` from the working DB `src`, plus the delta from
+    version N and an updated manifest next to it. Tries every page size in
+    `page_sizes` and keeps the smallest file; the old file is replaced only
+    once the new one is complete. With `chunk_size`, also writes the chunked
+    copy for range-request clients; with `search_index`, the FTS5 index for
+    clients whose sql.js has FTS5. Returns a report dict.
+    """
+    if not os.path.exists(src):
+        raise FileNotFoundError(f'No working database at {src}: crawl first')
+    start = time.perf_counter()
+    out_dir = os.path.dirname(os.path.abspath(dest))
+    os.makedirs(os.path.join(out_dir, DELTA_DIR), exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = _load_manifest(manifest_path)
+
+    build = dest + '.build'
+    if os.path.exists(build):
+        os.remove(build)
+    conn = sqlite3.connect(build, isolation_level=None)
+    delta = None
+    try:
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('ATTACH DATABASE ? AS work', (src,))
+        # One transaction: the snapshot, the change-log position and the delta agree
+        conn.execute('BEGIN IMMEDIATE')
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM work.job_changes").fetchone()[0]
+        last = conn.execute('SELECT version, seq FROM work.publish_log ORDER BY version DESC LIMIT 1').fetchone()
+        # Past the manifest's version too: a fresh working DB must not reuse numbers
+        # that clients already cache under another database's contents
+        version = max(manifest.get('version', 0), last[0] if last else 0) + 1
+        columns = _copy_jobs(conn, search_index)
+        # Applying a delta fires these; a client without FTS5 drops them first
+        search = {'module': 'fts5', 'table': 'jobs_fts', 'triggers': [name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'jobs' ORDER BY name")]
+        } if search_index else None
+        tables = _copy_other_tables(conn)
+        conn.execute('CREATE TABLE publish_info (version INTEGER, published_at TEXT)')
+        conn.execute('INSERT INTO publish_info VALUES (?, ?)', (version, datetime.now().isoformat()))
+        digest = _tables_digest(conn, tables)
+        # Deltas only chain while the client's file has the same shape
+        chain = (last is not None and manifest.get('version') == last[0]
+                 and manifest.get('columns') == columns and manifest.get('tables_digest') == digest
+                 and manifest.get('search') == search)
+        if chain:
+            delta = _write_delta(conn, os.path.join(out_dir, DELTA_DIR, f'{last[0]}-{version}.ndjson.gz'),
+                                 columns, last[0], version, last[1], seq)
+        jobs = conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+        conn.execute('INSERT INTO work.publish_log VALUES (?, ?, ?, ?, ?)',
+                     (version, seq, datetime.now().isoformat(), jobs, delta and delta['file']))
+        conn.execute('DELETE FROM work.job_changes WHERE seq <= ?', (seq,))
+        conn.execute(f'PRAGMA user_version = {conn.execute("PRAGMA work.user_version").fetchone()[0]}')
+        conn.execute('COMMIT')
+        conn.execute('DETACH DATABASE work')
+        conn.execute('ANALYZE')
+
+        sizes = {}
+        best = None
+        for page_size in page_sizes:
+            candidate = f'{dest}.{page_size}'
+            sizes[page_size] = _vacuum_into(conn, candidate, page_size)
+            if best is None or sizes[page_size] < sizes[best]:
+                if best is not None:
+                    os.remove(f'{dest}.{best}')
+                best = page_size
+            else:
+                os.remove(candidate)
+    finally:
+        conn.close()
+        os.remove(build)
+    os.replace(f'{dest}.{best}', dest)
+
+    # Chunks of an older version must not outlive it
+    chunk_dir = os.path.join(out_dir, CHUNK_DIR)
+    chunks = write_chunks(dest, chunk_dir, chunk_size, best) if chunk_size else None
+    if not chunks and os.path.isdir(chunk_dir):
+        shutil.rmtree(chunk_dir)
+
+    deltas = (manifest.get('deltas', []) + [delta])[-DELTA_RETENTION:] if delta else []
+    for name in os.listdir(os.path.join(out_dir, DELTA_DIR)):
+        if f'{DELTA_DIR}/{name}' not in {d['file'] for d in deltas}:
+            os.remove(os.path.join(out_dir, DELTA_DIR, name))
+    manifest = {
+        'version': version,
+        'db': os.path.basename(dest),
+        'db_bytes': os.path.getsize(dest),
+        'columns': columns,
+        'tables_digest': digest,
+        'deltas': deltas,
+        'search': search,
+    }
+    if chunks:
+        manifest['chunks'] = f'{CHUNK_DIR}/config.json'
+
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    src_bytes = os.path.getsize(src) + sum(
+        os.path.getsize(src + suffix) for suffix in ('-wal',) if os.path.exists(src + suffix))
+    dest_bytes = os.path.getsize(dest)
+    return {
+        'src': src, 'dest': dest, 'version': version, 'delta': delta,
+        'jobs': jobs, 'columns': columns, 'tables': tables, 'search_index': search_index,
+        'page_size': best, 'page_sizes': sizes, 'chunks': chunks,
+        'src_bytes': src_bytes, 'dest_bytes': dest_bytes, 'saved_bytes': src_bytes - dest_bytes,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def iter_delta(path: str):
+    """Yield (columns, op, values) for every change in a delta file"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        _, _, _, columns = json.loads(f.readline())
+        for line in f:
+            op, *values = json.loads(line)
+            yield columns, op, values
+
+
+def apply_delta(conn: sqlite3.Connection, path: str) -> int:
+    """Apply a delta to a published copy (reference for the web client). Returns changes applied."""
+    count = 0
+    conn.execute('BEGIN')
+    for columns, op, values in iter_delta(path):
+        if op == 'u':
+            conn.execute(f'''
+                INSERT INTO jobs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
+                ON CONFLICT(id) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in columns[1:])}
+            ''', values)
+        else:
+            conn.execute('DELETE FROM jobs WHERE id = ?', values)
+        count += 1
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        conn.execute('UPDATE publish_info SET version = ?', (json.loads(f.readline())[2],))
+    conn.execute('COMMIT')
+    return count
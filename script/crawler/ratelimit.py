@@ -0,0 +1,121 @@
+"""Rate limiting primitives shared by the crawl modes"""
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens/sec, holding at most `burst` tokens.
+    `limit` caps the total number of tokens ever handed out (a request budget).
+    Safe to share between threads and asyncio tasks.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, limit: int | None = None):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.limit = limit
+        self.issued = 0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float | None:
+        """
+        Take one token (possibly going into debt). Returns seconds to wait,
+        or None when the budget is exhausted.
+        """
+        with self._lock:
+            if self.limit is not None and self.issued >= self.limit:
+                return None
+            self.issued += 1
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> bool:
+        """Block the calling thread until a token is available. False if over budget."""
+        wait = self._reserve()
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self) -> bool:
+        """Wait (without blocking the event loop) for a token. False if over budget."""
+        wait = self._reserve()
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+
+class AdaptiveRate:
+    """
+    Per-host request pacing with AIMD (additive increase, multiplicative
+    decrease), the way TCP finds a link's capacity:
+      - the rate starts at `rate`, normally the caller's own limit
+      - a back-off signal (429, 503, timeout; see throttled()) multiplies it
+        by `decrease`, at most once per response time, so a burst of 429s
+        counts as one signal
+      - every success while the pace was the bottleneck adds `increase`/rate,
+        i.e. about `increase` requests/sec per second, back up to `max_rate`
+      - Retry-After pauses every request to the host until it has passed
+    Other errors (500, network) say nothing about the rate and leave it alone.
+    The rate stays within [min_rate, max_rate]. Thread-safe; acquire() blocks.
+    """
+
+    def __init__(self, rate: float, min_rate: float, max_rate: float,
+                 increase: float = 1.0, decrease: float = 0.5):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency = None  # Moving average of the response time
+        self.paused_until = 0.0
+        self._next = 0.0
+        self._limited_at = 0.0
+        self._decreased_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the next request to the host may start"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next, self.paused_until)
+            self._next = start + 1 / self.rate
+            if start > now:
+                self._limited_at = start
+        if start > now:
+            time.sleep(start - now)
+
+    def success(self, latency: float):
+        with self._lock:
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if time.monotonic() - self._limited_at < 1:
+                # Only while requests wait for the pace: an idle rate would grow without limit
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def throttled(self, pause: float | None = None):
+        """A 429, 503 or timeout; `pause` is the Retry-After in seconds"""
+        with self._lock:
+            self._decrease()
+        if pause:
+            self.pause(pause)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self._decreased_at >= max(self.latency or 0, 1 / self.rate):
+            self._decreased_at = now
+            self.rate = max(self.min_rate, self.rate * self.decrease)
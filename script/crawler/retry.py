@@ -0,0 +1,104 @@
+"""Retries with exponential backoff and jitter, Retry-After, and a per-host circuit breaker"""
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+    def __init__(self, host: str, wait: float):
+        super().__init__(f'{host}: circuit open, next try in {wait:.0f}s')
+        self.host = host
+        self.wait = wait
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Seconds to wait before retry `attempt` (0-based): "full jitter", uniform
+    in [0, min(cap, base * 2**attempt)], so clients that failed together do
+    not all come back at the same moment
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_after(value: str | None, limit: float) -> float | None:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date), at most `limit`"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = float(value)
+    else:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    return min(max(seconds, 0.0), limit)
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failures` consecutive failures: requests fail at
+    once (CircuitOpenError) for `cooldown` seconds. Then half-open: a single
+    request goes through; success closes the circuit, failure opens it again
+    for twice as long (up to `max_cooldown`). A trial request that never
+    reports back does not block the host: another one goes through a
+    cooldown later.
+    """
+
+    def __init__(self, failures: int, cooldown: float, max_cooldown: float):
+        self.threshold = failures
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.failures = 0
+        self.state = 'closed'
+        self.opened = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> float:
+        """Seconds until a request would be let through (0 when it would be now)"""
+        with self._lock:
+            if self.state == 'closed':
+                return 0.0
+            return max(0.0, self._retry_at - time.monotonic())
+
+    def check(self, host: str):
+        """Let one request through, or raise CircuitOpenError"""
+        with self._lock:
+            if self.state == 'closed':
+                return
+            now = time.monotonic()
+            if now < self._retry_at:
+                raise CircuitOpenError(host, self._retry_at - now)
+            self.state = 'half-open'
+            self._retry_at = now + self.cooldown
+
+    def success(self) -> bool:
+        """True when this closes the circuit"""
+        with self._lock:
+            closed = self.state != 'closed'
+            self.state = 'closed'
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            return closed
+
+    def failure(self) -> bool:
+        """True when this opens the circuit"""
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half-open':
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            elif self.state == 'open' or self.failures < self.threshold:
+                return False
+            self.state = 'open'
+            self.opened += 1
+            self._retry_at = time.monotonic() + self.cooldown
+            return True
@@ -0,0 +1,28 @@
+"""Category scheduling: which categories are crawled, in what order, for how many jobs"""
+import logging
+
+from .logs import event
+
+log = logging.getLogger(__name__)
+
+
+def prioritize(categories: list[dict], max_jobs: int) -> list[dict]:
+    """
+    Drop categories without URL, attach each one's job quota and sort by
+    priority (highest first, config order breaks ties).
+    Config entries may set `priority` (default 0) and `max_jobs` (default: global).
+    """
+    tasks = []
+    for order, cat in enumerate(categories):
+        if not cat.get('url'):
+            event(log, logging.WARNING, 'SKIP', f"{cat.get('name', 'Unknown')}: no URL", category=cat.get('name'))
+            continue
+        tasks.append({
+            'name': cat.get('name', 'Unknown'),
+            'url': cat['url'],
+            'priority': cat.get('priority', 0),
+            'quota': cat.get('max_jobs', max_jobs),
+            'order': order,
+        })
+    tasks.sort(key=lambda t: (-t['priority'], t['order']))
+    return tasks
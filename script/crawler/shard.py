@@ -0,0 +1,188 @@
+"""
+Sharded crawling: N nodes split one crawl by a stable hash of the URL, each
+writing its own shard database, and merge_shards() folds the shards into
+the canonical jobs.db.
+
+`--shard i/n` (0 <= i < n) with
+  category  node i crawls the categories whose listing URL hashes to i,
+            listings and detail pages both (no page is fetched twice)
+  url       every node reads every listing but fetches only the job URLs
+            that hash to i, with 1/n of each category's quota: balanced
+            when a few categories hold most jobs, at the cost of n copies
+            of the listing requests
+The hash is md5 of the canonical URL, so every node, run and Python process
+agrees on it (unlike hash()).
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+
+from .config import DB_FILE
+from .database import (JOB_COLUMNS, KEEP_IF_NULL, MIGRATIONS, backfill_dedup, bulk_load, connect,
+                       create_search_index, drop_search_index)
+from .dedup import canonical_url
+from .logs import event
+
+log = logging.getLogger(__name__)
+
+SHARD_BY = ('category', 'url')
+# SQLite's default SQLITE_MAX_ATTACHED: shards are merged this many per transaction
+MERGE_GROUP = 10
+
+# The newest crawl of a URL wins; equal or older copies leave the row alone.
+# id is derived from the URL, the second clause only catches legacy rows whose
+# id and url disagree
+_UPDATE = ', '.join(f'{c} = COALESCE(excluded.{c}, {c})' if c in KEEP_IF_NULL else f'{c} = excluded.{c}'
+                    for c in JOB_COLUMNS[1:])
+MERGE_SQL = '''
+    INSERT INTO main.jobs ({columns}) SELECT {columns} FROM {shard}.jobs WHERE true
+    ON CONFLICT(url) DO UPDATE SET {update} WHERE excluded.crawled_at > COALESCE(jobs.crawled_at, '')
+    ON CONFLICT(id) DO UPDATE SET {update} WHERE excluded.crawled_at > COALESCE(jobs.crawled_at, '')
+'''
+# The ids MERGE_SQL is about to write, for job_changes while its triggers are dropped
+CHANGED_SQL = '''
+    INSERT INTO temp.merged (id) SELECT s.id FROM {shard}.jobs s LEFT JOIN main.jobs j ON j.url = s.url
+    WHERE j.url IS NULL OR s.crawled_at > COALESCE(j.crawled_at, '')
+'''
+
+
+def parse_shard(text: str) -> tuple[int, int]:
+    """'i/n' -> (i, n), 0 <= i < n"""
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise ValueError(f'shard must look like i/n, got {text!r}') from None
+    if not 0 <= index < count:
+        raise ValueError(f'shard index must be in 0..{count - 1}, got {text!r}')
+    return index, count
+
+
+def shard_of(url: str, count: int) -> int:
+    digest = hashlib.md5(canonical_url(url).encode()).digest()
+    return int.from_bytes(digest[:8], 'big') % count
+
+
+def in_shard(url: str, shard: tuple[int, int] | list[int] | None) -> bool:
+    return shard is None or shard_of(url, shard[1]) == shard[0]
+
+
+def shard_file(path: str, shard: tuple[int, int]) -> str:
+    """jobs.db -> jobs.shard-0-of-4.db, out.ndjson.zst -> out.shard-0-of-4.ndjson.zst"""
+    directory, name = os.path.split(path)
+    stem, dot, suffix = name.partition('.')
+    return os.path.join(directory, f'{stem}.shard-{shard[0]}-of-{shard[1]}{dot}{suffix}')
+
+
+def _check_shard(conn: sqlite3.Connection, alias: str, path: str):
+    version = conn.execute(f'PRAGMA {alias}.user_version').fetchone()[0]
+    if version != len(MIGRATIONS):
+        raise ValueError(f'{path}: schema version {version}, expected {len(MIGRATIONS)} '
+                         f'(open it with JobWriter once to migrate it)')
+
+
+def _merge_group(conn: sqlite3.Connection, shards: list[str], bulk: bool, log_changes: bool) -> dict[str, int]:
+    """Merge up to MERGE_GROUP shards in one transaction; rows inserted or updated per shard"""
+    aliases = []
+    try:
+        for i, path in enumerate(shards):
+            alias = f'shard{i}'
+            conn.execute(f'ATTACH DATABASE ? AS {alias}', (path,))
+            aliases.append(alias)
+            _check_shard(conn, alias, path)
+        columns = ', '.join(JOB_COLUMNS)
+        merged = {}
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if bulk:
+                with bulk_load(conn, search_index=False):
+                    for alias, path in zip(aliases, shards):
+                        if log_changes:
+                            conn.execute(CHANGED_SQL.format(shard=alias))
+                        merged[path] = conn.execute(
+                            MERGE_SQL.format(columns=columns, shard=alias, update=_UPDATE)).rowcount
+                if log_changes:
+                    conn.execute("INSERT INTO job_changes (job_id, op) SELECT DISTINCT id, 'upsert' FROM temp.merged")
+                    conn.execute('DELETE FROM temp.merged')
+            else:
+                for alias, path in zip(aliases, shards):
+                    merged[path] = conn.execute(
+                        MERGE_SQL.format(columns=columns, shard=alias, update=_UPDATE)).rowcount
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return merged
+    finally:
+        for alias in aliases:
+            conn.execute(f'DETACH DATABASE {alias}')
+
+
+def merge_shards(shards: list[str], db_file: str = DB_FILE, dedup: bool = False,
+                 search_index: bool = False) -> dict:
+    """
+    Fold shard databases into `db_file` with set-based INSERT ... SELECT
+    upserts over ATTACHed files: a URL crawled by several shards (or already
+    in `db_file`) keeps its most recently crawled copy. When the shards hold
+    at least as many rows as `db_file`, its indexes and triggers are dropped
+    for the merge and rebuilt once (bulk_load), pages go through a rollback
+    journal instead of the WAL (new pages are then written once, not twice),
+    and job_changes is written in one statement if the database has been
+    published; otherwise the triggers index and log every row.
+    The search index (jobs_fts) is dropped for the merge (publish does not
+    copy it), and with `search_index` it is built once at the end (or, in an
+    incremental merge, kept and updated by its triggers).
+    canonical_id comes from each shard's own dedup index; with `dedup` it is
+    recomputed over the merged jobs (slow). Returns totals for the report.
+    """
+    conn = connect(db_file)
+    try:
+        conn.execute('PRAGMA cache_size = -256000')
+        start = time.perf_counter()
+        before = conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+        incoming = 0
+        for path in shards:
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+            shard = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+            try:
+                incoming += shard.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+            finally:
+                shard.close()
+        bulk = incoming >= before
+        log_changes = bulk and conn.execute('SELECT 1 FROM publish_log LIMIT 1').fetchone() is not None
+        if bulk:
+            conn.execute('PRAGMA journal_mode = DELETE')
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS merged (id TEXT)')
+        # An incremental merge indexes its few rows through the triggers
+        keep_search = search_index and not bulk and conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'jobs_fts'").fetchone() is not None
+        if not keep_search:
+            drop_search_index(conn)
+        merged = {}
+        for i in range(0, len(shards), MERGE_GROUP):
+            merged.update(_merge_group(conn, shards[i:i + MERGE_GROUP], bulk, log_changes))
+            event(log, logging.INFO, 'MERGE', f"{len(merged)}/{len(shards)} shards merged",
+                  shards=len(merged), elapsed=round(time.perf_counter() - start, 3))
+        if search_index and not keep_search:
+            conn.execute('BEGIN IMMEDIATE')
+            create_search_index(conn)
+            conn.execute('COMMIT')
+        duplicates = None
+        if dedup:
+            conn.execute('BEGIN IMMEDIATE')
+            duplicates = backfill_dedup(conn)
+            conn.execute('COMMIT')
+        after = conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        conn.close()
+    written = sum(merged.values())
+    return {
+        'shards': merged, 'incoming': incoming, 'before': before, 'after': after,
+        'inserted': after - before, 'updated': written - (after - before), 'skipped': incoming - written,
+        'bulk': bulk, 'search_index': search_index, 'duplicates': duplicates,
+        'seconds': time.perf_counter() - start,
+    }
@@ -1,12 +1,17 @@
 """
-python insert_mock_data.py --truncate  
+python insert_mock_data.py --truncate
 ---
 Insert mock data (instructors, stories, posts, companies, practice_questions) into SQLite
 
+The JSON file is streamed, not loaded: each top-level array is parsed item
+by item and written with executemany, --batch rows at a time, all in one
+transaction. Memory stays bounded by the batch size, so multi-hundred-MB
+content exports (.json, .json.gz, .json.zst) load as well as the template.
+
 Usage:
   python insert_mock_data.py                           # Use default JSON, no truncate
   python insert_mock_data.py <json_file>               # Use custom JSON file
-  python insert_mock_data.py --truncate                # Truncate tables before insert
+  python insert_mock_data.py --truncate                # Drop and recreate the tables before insert
   python insert_mock_data.py <json_file> --truncate    # Custom JSON + truncate
 
 Examples:
@@ -14,36 +19,44 @@ Examples:
   python insert_mock_data.py my_generated_data.json
   python insert_mock_data.py --truncate
   python insert_mock_data.py my_generated_data.json --truncate
+  python insert_mock_data.py export.json.zst --db /tmp/content.db --batch 20000
 """
 import argparse
 import json
 import sqlite3
 import sys
+import time
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 
+from crawler.ndjson import iter_json_arrays
+
 SCRIPT_DIR = Path(__file__).parent
 DEFAULT_JSON = SCRIPT_DIR / "mock_data_template.json"
-DB_FILE = SCRIPT_DIR.parent / "public" / "data" / "jobs.db"
+# Working database; publish.py copies these tables into public/data/jobs.db
+DB_FILE = SCRIPT_DIR / "jobs.db"
+BATCH_SIZE = 5000
+PROGRESS_EVERY = 100_000
 
 TABLES_TO_TRUNCATE = ['instructors', 'stories', 'companies', 'posts', 'practice_questions']
 
+# One encoder for every row: json.dumps(..., ensure_ascii=False) builds a new one per call
+to_json = json.JSONEncoder(ensure_ascii=False).encode
+
 
 def truncate_tables(conn):
-    """Delete all data from tables"""
+    """Drop and recreate the tables: much faster than deleting every row of a large table"""
     print("[DB] Truncating tables...")
     for table in TABLES_TO_TRUNCATE:
-        try:
-            conn.execute(f'DELETE FROM {table}')
-            print(f"  - Truncated: {table}")
-        except Exception as e:
-            print(f"  - Skip {table}: {e}")
-    conn.commit()
+        conn.execute(f'DROP TABLE IF EXISTS {table}')
+        print(f"  - Truncated: {table}")
+    create_tables(conn)
 
 
 def create_tables(conn):
-    """Create all required tables"""
-    
+    """Create all required tables (no commit: inside a transaction they are part of it)"""
+
     conn.execute('''
         CREATE TABLE IF NOT EXISTS instructors (
             id INTEGER PRIMARY KEY,
@@ -55,7 +68,7 @@ def create_tables(conn):
             created_at TEXT
         )
     ''')
-    
+
     conn.execute('''
         CREATE TABLE IF NOT EXISTS stories (
             id INTEGER PRIMARY KEY,
@@ -66,7 +79,7 @@ def create_tables(conn):
             created_at TEXT
         )
     ''')
-    
+
     conn.execute('''
         CREATE TABLE IF NOT EXISTS companies (
             id TEXT PRIMARY KEY,
@@ -78,7 +91,7 @@ def create_tables(conn):
             created_at TEXT
         )
     ''')
-    
+
     conn.execute('''
         CREATE TABLE IF NOT EXISTS posts (
             id INTEGER PRIMARY KEY,
@@ -98,7 +111,7 @@ def create_tables(conn):
             FOREIGN KEY (author_id) REFERENCES instructors(id)
         )
     ''')
-    
+
     conn.execute('''
         CREATE TABLE IF NOT EXISTS practice_questions (
             id TEXT PRIMARY KEY,
@@ -112,182 +125,254 @@ def create_tables(conn):
             created_at TEXT
         )
     ''')
-    
-    conn.commit()
+
     print("[DB] Tables created/verified")
 
 
-def insert_instructors(conn, instructors):
-    count = 0
-    for item in instructors:
+def instructor_row(item, now):
+    return (
+        item['id'],
+        item['name'],
+        item['username'],
+        item.get('avatar'),
+        item.get('category'),
+        1 if item.get('verified') else 0,
+        now
+    )
+
+
+def story_row(item, now):
+    return (
+        item['id'],
+        item.get('user_name'),
+        item.get('user_username'),
+        item.get('image'),
+        1 if item.get('has_unseen', True) else 0,
+        now
+    )
+
+
+def company_row(item, now):
+    return (
+        item['id'],
+        item['name'],
+        item.get('logo'),
+        item.get('industry'),
+        item.get('size'),
+        item.get('location'),
+        now
+    )
+
+
+def post_row(item, now):
+    return (
+        item['id'],
+        item.get('author_id'),
+        item.get('time'),
+        item.get('content'),
+        item.get('image'),
+        to_json(item.get('tags', [])),
+        item.get('likes', 0),
+        item.get('comments', 0),
+        item.get('category'),
+        item.get('quiz_question'),
+        to_json(item.get('quiz_options', [])),
+        item.get('quiz_correct_id'),
+        item.get('quiz_explanation'),
+        now
+    )
+
+
+def practice_question_row(item, now):
+    return (
+        item['id'],
+        item.get('topic'),
+        item.get('title'),
+        item.get('question'),
+        to_json(item.get('options', [])),
+        item.get('correct_option_id'),
+        item.get('explanation'),
+        item.get('image'),
+        now
+    )
+
+
+# JSON key / table -> (columns, item -> row, name used in error messages)
+TABLES = {
+    'instructors': (('id', 'name', 'username', 'avatar', 'category', 'verified', 'created_at'),
+                    instructor_row, 'instructor'),
+    'stories': (('id', 'user_name', 'user_username', 'image', 'has_unseen', 'created_at'),
+                story_row, 'story'),
+    'companies': (('id', 'name', 'logo', 'industry', 'size', 'location', 'created_at'),
+                  company_row, 'company'),
+    'posts': (('id', 'author_id', 'time', 'content', 'image', 'tags', 'likes', 'comments', 'category',
+               'quiz_question', 'quiz_options', 'quiz_correct_id', 'quiz_explanation', 'created_at'),
+              post_row, 'post'),
+    'practice_questions': (('id', 'topic', 'title', 'question', 'options', 'correct_option_id',
+                            'explanation', 'image', 'created_at'),
+                           practice_question_row, 'practice_question'),
+}
+
+
+def insert_batch(conn, table, items):
+    """INSERT OR REPLACE one batch with executemany; bad items are reported and skipped"""
+    columns, to_row, name = TABLES[table]
+    now = datetime.now().isoformat()
+    rows = []
+    for item in items:
         try:
-            conn.execute('''
-                INSERT OR REPLACE INTO instructors 
-                (id, name, username, avatar, category, verified, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                item['id'],
-                item['name'],
-                item['username'],
-                item.get('avatar'),
-                item.get('category'),
-                1 if item.get('verified') else 0,
-                datetime.now().isoformat()
-            ))
-            count += 1
+            rows.append(to_row(item, now))
         except Exception as e:
-            print(f"  [ERROR] instructor: {e}")
-    return count
+            print(f"  [ERROR] {name}: {e}")
+    sql = f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    try:
+        conn.executemany(sql, rows)
+        return len(rows)
+    except sqlite3.Error:
+        # Replay the batch row by row to find the bad rows (rows already written are replaced)
+        count = 0
+        for row in rows:
+            try:
+                conn.execute(sql, row)
+                count += 1
+            except sqlite3.Error as e:
+                print(f"  [ERROR] {name}: {e}")
+        return count
 
 
-def insert_stories(conn, stories):
+def insert_rows(conn, table, items, batch_size=BATCH_SIZE):
+    """Insert any iterable of items into `table`, `batch_size` rows per executemany"""
+    items = iter(items)
     count = 0
-    for item in stories:
-        try:
-            conn.execute('''
-                INSERT OR REPLACE INTO stories 
-                (id, user_name, user_username, image, has_unseen, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                item['id'],
-                item.get('user_name'),
-                item.get('user_username'),
-                item.get('image'),
-                1 if item.get('has_unseen', True) else 0,
-                datetime.now().isoformat()
-            ))
-            count += 1
-        except Exception as e:
-            print(f"  [ERROR] story: {e}")
+    while batch := list(islice(items, batch_size)):
+        count += insert_batch(conn, table, batch)
     return count
 
 
+def insert_instructors(conn, instructors):
+    return insert_rows(conn, 'instructors', instructors)
+
+
+def insert_stories(conn, stories):
+    return insert_rows(conn, 'stories', stories)
+
+
 def insert_companies(conn, companies):
-    count = 0
-    for item in companies:
-        try:
-            conn.execute('''
-                INSERT OR REPLACE INTO companies 
-                (id, name, logo, industry, size, location, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                item['id'],
-                item['name'],
-                item.get('logo'),
-                item.get('industry'),
-                item.get('size'),
-                item.get('location'),
-                datetime.now().isoformat()
-            ))
-            count += 1
-        except Exception as e:
-            print(f"  [ERROR] company: {e}")
-    return count
+    return insert_rows(conn, 'companies', companies)
 
 
 def insert_posts(conn, posts):
-    count = 0
-    for item in posts:
-        try:
-            conn.execute('''
-                INSERT OR REPLACE INTO posts 
-                (id, author_id, time, content, image, tags, likes, comments, 
-                 category, quiz_question, quiz_options, quiz_correct_id, quiz_explanation, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                item['id'],
-                item.get('author_id'),
-                item.get('time'),
-                item.get('content'),
-                item.get('image'),
-                json.dumps(item.get('tags', []), ensure_ascii=False),
-                item.get('likes', 0),
-                item.get('comments', 0),
-                item.get('category'),
-                item.get('quiz_question'),
-                json.dumps(item.get('quiz_options', []), ensure_ascii=False),
-                item.get('quiz_correct_id'),
-                item.get('quiz_explanation'),
-                datetime.now().isoformat()
-            ))
-            count += 1
-        except Exception as e:
-            print(f"  [ERROR] post: {e}")
-    return count
+    return insert_rows(conn, 'posts', posts)
 
 
 def insert_practice_questions(conn, questions):
-    count = 0
-    for item in questions:
-        try:
-            conn.execute('''
-                INSERT OR REPLACE INTO practice_questions 
-                (id, topic, title, question, options, correct_option_id, explanation, image, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                item['id'],
-                item.get('topic'),
-                item.get('title'),
-                item.get('question'),
-                json.dumps(item.get('options', []), ensure_ascii=False),
-                item.get('correct_option_id'),
-                item.get('explanation'),
-                item.get('image'),
-                datetime.now().isoformat()
-            ))
-            count += 1
-        except Exception as e:
-            print(f"  [ERROR] practice_question: {e}")
-    return count
+    return insert_rows(conn, 'practice_questions', questions)
+
+
+class Progress:
+    """Rows written per table; prints a line with the rate every PROGRESS_EVERY rows"""
+
+    def __init__(self):
+        self.counts = {}
+        self.table = None
+        self.started = 0.0
+        self.reported = 0
+
+    def start(self, table):
+        self.finish()
+        self.table = table
+        self.started = time.perf_counter()
+        self.reported = 0
+        self.counts.setdefault(table, 0)
+
+    def add(self, count):
+        self.counts[self.table] += count
+        if self.counts[self.table] - self.reported >= PROGRESS_EVERY:
+            self.reported = self.counts[self.table]
+            self.report()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        count = self.counts[self.table]
+        print(f"  [LOAD] {self.table}: {count:,} rows ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    def finish(self):
+        if self.table is not None:
+            if self.counts[self.table] != self.reported:
+                self.report()
+            self.table = None
+
+
+def load_file(conn, json_file, batch_size=BATCH_SIZE):
+    """Stream every known top-level array of `json_file` into its table; returns the progress"""
+    progress = Progress()
+    batch = []
+    skipped = set()
+    for key, item in iter_json_arrays(str(json_file)):
+        if key not in TABLES:
+            if key not in skipped:
+                skipped.add(key)
+                print(f"  [SKIP] {key}: no such table")
+            continue
+        if key != progress.table:
+            if batch:
+                progress.add(insert_batch(conn, progress.table, batch))
+                batch = []
+            progress.start(key)
+        batch.append(item)
+        if len(batch) >= batch_size:
+            progress.add(insert_batch(conn, key, batch))
+            batch = []
+    if batch:
+        progress.add(insert_batch(conn, progress.table, batch))
+    progress.finish()
+    return progress
 
 
 def main():
     parser = argparse.ArgumentParser(description='Insert mock data into SQLite database')
-    parser.add_argument('json_file', nargs='?', default=None, help='JSON file with mock data')
-    parser.add_argument('--truncate', '-t', action='store_true', help='Truncate tables before inserting')
+    parser.add_argument('json_file', nargs='?', default=None, help='JSON file with mock data (.json, .gz, .zst)')
+    parser.add_argument('--truncate', '-t', action='store_true', help='Drop and recreate the tables before inserting')
+    parser.add_argument('--db', default=str(DB_FILE), help='Database to insert into')
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE, help='Rows per executemany')
     args = parser.parse_args()
-    
+
     json_file = Path(args.json_file) if args.json_file else DEFAULT_JSON
-    
+
     if not json_file.exists():
         print(f"[ERROR] File not found: {json_file}")
         sys.exit(1)
-    
-    print(f"[LOAD] Reading {json_file}...")
-    
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    print(f"[DB] Connecting to {DB_FILE}...")
-    conn = sqlite3.connect(DB_FILE)
-    
+
+    print(f"[LOAD] Streaming {json_file}...")
+    print(f"[DB] Connecting to {args.db}...")
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    # One transaction for the whole load, nothing half-loaded if the input
+    # turns out to be broken. A rollback journal rather than WAL: it only
+    # saves the pages the load changes, WAL would write every new page twice
+    conn.execute('PRAGMA journal_mode = DELETE')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA cache_size = -256000')
+    conn.execute('PRAGMA temp_store = MEMORY')
+
     create_tables(conn)
-    
-    if args.truncate:
-        truncate_tables(conn)
-    
-    results = {}
-    
-    if 'instructors' in data:
-        results['instructors'] = insert_instructors(conn, data['instructors'])
-    
-    if 'stories' in data:
-        results['stories'] = insert_stories(conn, data['stories'])
-    
-    if 'companies' in data:
-        results['companies'] = insert_companies(conn, data['companies'])
-    
-    if 'posts' in data:
-        results['posts'] = insert_posts(conn, data['posts'])
-    
-    if 'practice_questions' in data:
-        results['practice_questions'] = insert_practice_questions(conn, data['practice_questions'])
-    
-    conn.commit()
-    conn.close()
-    
-    print("\n[DONE] Inserted:")
-    for table, count in results.items():
+    started = time.perf_counter()
+    conn.execute('BEGIN')
+    try:
+        if args.truncate:
+            truncate_tables(conn)
+        progress = load_file(conn, json_file, args.batch)
+        conn.execute('COMMIT')
+    except Exception as e:
+        conn.execute('ROLLBACK')
+        print(f"[ERROR] {json_file}: {e}; nothing was inserted")
+        sys.exit(1)
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - started
+
+    total = sum(progress.counts.values())
+    print(f"\n[DONE] Inserted {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s):")
+    for table, count in progress.counts.items():
         print(f"  - {table}: {count}")
 
 
@@ -0,0 +1,75 @@
+"""
+Merge the shard databases of a sharded crawl (craw-all.py --shard i/n) into jobs.db.
+
+Usage:
+  python merge-shards.py                          # Every jobs.shard-*-of-*.db next to jobs.db
+  python merge-shards.py a.db b.db c.db --db /tmp/jobs.db
+  python merge-shards.py --dedup                  # Also recompute canonical_id over the merged jobs
+  python merge-shards.py --search-index           # Keep a search index (jobs_fts) in jobs.db
+
+Each shard is ATTACHed and copied with one INSERT ... SELECT upsert: a URL
+present in several shards, or already in jobs.db, keeps the copy with the
+latest crawled_at. Shards holding at least as many jobs as jobs.db are
+merged with its indexes and triggers dropped, then rebuilt once. The
+search index is left out of jobs.db unless --search-index is given:
+publish.py does not copy it into the app's copy.
+"""
+import argparse
+import glob
+import os
+import sys
+
+from crawler import DB_FILE
+from crawler.logs import setup_logging
+from crawler.shard import merge_shards
+
+
+def find_shards(db_file: str) -> list[str]:
+    """jobs.shard-*-of-*.db files next to `db_file`, by shard number"""
+    directory, name = os.path.split(db_file)
+    stem, dot, suffix = name.partition('.')
+    paths = glob.glob(os.path.join(directory, f'{stem}.shard-*-of-*{dot}{suffix}'))
+    return sorted(paths, key=lambda path: int(path.rsplit('.shard-', 1)[1].split('-')[0]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge shard databases into jobs.db')
+    parser.add_argument('shards', nargs='*', help='Shard databases (default: every jobs.shard-*-of-*.db)')
+    parser.add_argument('--db', default=DB_FILE, help='Database to merge into')
+    parser.add_argument('--dedup', action='store_true',
+                        help='Recompute near-duplicate clusters over the merged jobs (slow)')
+    parser.add_argument('--search-index', action='store_true',
+                        help='Build the search index (jobs_fts) in the merged database, once at the end')
+    parser.add_argument('--log-level', default='info', choices=['debug', 'info', 'warning', 'error'])
+    args = parser.parse_args()
+    setup_logging(args.log_level)
+
+    shards = args.shards or find_shards(args.db)
+    if not shards:
+        print(f"[ERROR] No shard databases found next to {args.db}")
+        sys.exit(1)
+    if os.path.abspath(args.db) in map(os.path.abspath, shards):
+        print(f"[ERROR] {args.db} is both a shard and the target")
+        sys.exit(1)
+
+    print(f"[MERGE] {len(shards)} shards -> {args.db}")
+    try:
+        result = merge_shards(shards, args.db, args.dedup, args.search_index)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    for path, count in result['shards'].items():
+        print(f"  [SHARD] {path}: {count} rows written")
+    print(f"\n[DONE] {result['incoming']} shard rows in {result['seconds']:.1f}s "
+          f"({'bulk, indexes rebuilt' if result['bulk'] else 'incremental'}): "
+          f"{result['inserted']} new, {result['updated']} updated, "
+          f"{result['skipped']} older or equal copies skipped; {result['after']} jobs in {args.db}")
+    if not result['search_index']:
+        print(f"[SEARCH] No search index in {args.db} (--search-index builds one)")
+    if result['duplicates'] is not None:
+        print(f"[DEDUP] {result['duplicates']} near-duplicate jobs")
+    print("[NEXT] python publish.py   # update public/data/jobs.db for the web app")
+
+
+if __name__ == '__main__':
+    main()
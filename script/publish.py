@@ -0,0 +1,98 @@
+"""
+Build the read-only database the web app downloads (public/data/jobs.db)
+from the working database the crawler writes (script/jobs.db).
+
+Usage:
+  python publish.py                       # jobs.db -> ../public/data/jobs.db
+  python publish.py --page-size 4096      # Fixed page size instead of the smallest file
+  python publish.py --src /tmp/jobs.db --out /tmp/site.db
+  python publish.py --chunked             # Also split into chunks/ for HTTP range requests
+  python publish.py --search-index        # Ship the FTS5 search index (needs an FTS5 sql.js build)
+
+Crawl-only columns (raw_data, fingerprint) are left out, rows are stored
+newest first, indexes cover crawled_at, category and url, statistics are
+fresh (ANALYZE) and the file is written with VACUUM INTO, so it has no free
+pages.
+
+Each run is a new version: next to the database it writes
+deltas/<from>-<to>.ndjson.gz (the jobs changed since the previous version)
+and manifest.json, which the web app reads to download only the deltas it is
+missing. The working database records each published version (publish_log)
+and drops the change log the delta was built from.
+
+The search index (jobs_fts) is left out unless --search-index: the sql.js
+build the app loads from sql.js.org has no FTS5 and searches with LIKE.
+
+--chunked fixes the page size (CHUNKED_PAGE_SIZE) and splits the file into
+chunks/jobs.db.000, ... with a sql.js-httpvfs config.json, so the app can
+query a large database without downloading it; python -m bench.pages shows
+how many pages each of the app's queries reads.
+"""
+import argparse
+import gzip
+import shutil
+
+from crawler import DB_FILE, PUBLISH_DB_FILE, PUBLISH_PAGE_SIZES, CHUNKED_PAGE_SIZE, CHUNK_SIZE
+from crawler.publish import publish
+
+
+def gzipped_size(path: str) -> int:
+    """Bytes on the wire when the web server compresses the file"""
+    class Counter:
+        size = 0
+
+        def write(self, data):
+            self.size += len(data)
+
+    counter = Counter()
+    with open(path, 'rb') as f, gzip.GzipFile(fileobj=counter, mode='wb') as out:
+        shutil.copyfileobj(f, out)
+    return counter.size
+
+
+def kb(n: int) -> str:
+    return f"{n / 1024:,.0f} KB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the read-only jobs.db for the web app')
+    parser.add_argument('--src', default=DB_FILE, help='Working database written by the crawler')
+    parser.add_argument('--out', default=PUBLISH_DB_FILE, help='Published database')
+    parser.add_argument('--page-size', type=int, default=None,
+                        help=f'SQLite page size (default: smallest of {PUBLISH_PAGE_SIZES})')
+    parser.add_argument('--chunked', action='store_true',
+                        help=f'Also write chunks for HTTP range requests (page size {CHUNKED_PAGE_SIZE})')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Bytes per chunk file')
+    parser.add_argument('--search-index', action='store_true',
+                        help='Include the FTS5 search index (jobs_fts), for an app served with an FTS5 sql.js build')
+    args = parser.parse_args()
+
+    if args.page_size:
+        page_sizes = [args.page_size]
+    else:
+        page_sizes = [CHUNKED_PAGE_SIZE] if args.chunked else PUBLISH_PAGE_SIZES
+    report = publish(args.src, args.out, page_sizes, args.chunk_size if args.chunked else None,
+                     args.search_index)
+    print(f"[PUBLISH] Version {report['version']}: {report['jobs']} jobs, tables: {', '.join(['jobs'] + report['tables'])}")
+    for page_size, size in report['page_sizes'].items():
+        print(f"  page_size {page_size:5}: {kb(size):>10}{'  <- kept' if page_size == report['page_size'] else ''}")
+    saved = report['saved_bytes'] / report['src_bytes'] * 100
+    print(f"[PUBLISH] {report['src']} {kb(report['src_bytes'])} -> {report['dest']} {kb(report['dest_bytes'])} "
+          f"(saved {kb(report['saved_bytes'])}, {saved:.0f}%)")
+    print(f"[PUBLISH] gzip transfer: {kb(gzipped_size(report['src']))} -> {kb(gzipped_size(report['dest']))}")
+    chunks = report['chunks']
+    if chunks:
+        count = -(-chunks['databaseLengthBytes'] // chunks['serverChunkSize'])
+        print(f"[CHUNKS] {count} x {kb(chunks['serverChunkSize'])} in chunks/, "
+              f"{chunks['requestChunkSize']}-byte range requests")
+    delta = report['delta']
+    if delta:
+        print(f"[DELTA] {delta['file']}: {delta['upserts']} upserts, {delta['deletes']} deletes, "
+              f"{kb(delta['bytes'])} instead of {kb(report['dest_bytes'])}")
+    else:
+        print("[DELTA] None: first version or changed schema, clients download the full file")
+    print(f"[PUBLISH] Done in {report['seconds']:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Re-parse saved job detail pages with the current parser, on all CPU cores,
+and store the results in SQLite. No network access.
+
+Usage:
+  python reparse.py <dir>                 # Every *.html under <dir>
+  python reparse.py page1.html page2.html
+  python reparse.py <dir> --workers 8 --db /tmp/jobs.db
+  python reparse.py --archive             # Last fetch of every job page in archive/
+  python reparse.py --archive /data/archive --force
+
+The job URL is taken from the page's <link rel="canonical">, falling back
+to the file path. Jobs already in the database keep their listing
+fingerprint and their created_at/crawled_at; only parsed fields change.
+
+With --archive, pages are streamed out of the HTML archive the crawlers
+write (see crawler/archive.py). Results are cached by (page hash,
+PARSER_VERSION): pages already parsed by this parser version are not
+parsed again, so bump PARSER_VERSION in crawler/parser.py after changing
+the parser. --force parses every page anyway.
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+
+from crawler import (ARCHIVE_DIR, DB_FILE, PARSER_VERSION, HtmlArchive, JobWriter, ParsePipeline,
+                     canonical_url, make_job_id)
+from crawler.logs import setup_logging
+
+CANONICAL = re.compile(r'<link[^>]+rel="canonical"[^>]+href="([^"]+)"')
+
+
+def iter_pages(paths: list[str]):
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(path.rglob('*.html'))
+        else:
+            yield path
+
+
+def reparse_files(paths: list[str], pipeline: ParsePipeline):
+    for path in iter_pages(paths):
+        html = path.read_text(encoding='utf-8', errors='replace')
+        match = CANONICAL.search(html)
+        pipeline.put(match.group(1) if match else path.resolve().as_uri(), html)
+
+
+def reparse_archive(archive: HtmlArchive, pipeline: ParsePipeline, writer: JobWriter, force: bool) -> int:
+    """Queue every archived job page not parsed by this parser version; returns the cache hits"""
+    hits = 0
+    for url, digest in archive.latest('job'):
+        job = None if force else archive.cached_parse(digest, PARSER_VERSION)
+        if job:
+            # The same HTML may have been fetched under another URL
+            job.update(id=make_job_id(url), url=canonical_url(url))
+            writer.add(job)
+            hits += 1
+        else:
+            pipeline.put(url, archive.get(digest), {'content_hash': digest})
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-parse saved HTML pages into SQLite')
+    parser.add_argument('paths', nargs='*', help='HTML files or directories')
+    parser.add_argument('--archive', nargs='?', const=ARCHIVE_DIR, default=None,
+                        help=f'Re-parse the HTML archive instead (default directory: {ARCHIVE_DIR})')
+    parser.add_argument('--force', action='store_true', help='Ignore parse results cached in the archive')
+    parser.add_argument('--workers', '-w', type=int, default=None, help='Parser processes (default: all cores)')
+    parser.add_argument('--db', default=DB_FILE, help='SQLite database to write to')
+    args = parser.parse_args()
+    if not args.paths and not args.archive:
+        parser.error('give HTML files/directories or --archive')
+    setup_logging()
+    
+    start = time.perf_counter()
+    writer = JobWriter(args.db, reparse=True)
+    archive = HtmlArchive(args.archive) if args.archive else None
+    
+    def store(job):
+        # Runs on the pipeline's writer thread
+        digest = job.pop('content_hash', None)
+        if digest:
+            archive.cache_parse(digest, PARSER_VERSION, job)
+        writer.add(job)
+    
+    hits = 0
+    with ParsePipeline(store, args.workers) as pipeline:
+        print(f"[REPARSE] {pipeline.workers} parser processes")
+        if archive:
+            hits = reparse_archive(archive, pipeline, writer, args.force)
+        reparse_files(args.paths, pipeline)
+    writer.close()
+    if archive:
+        archive.close()
+    
+    elapsed = time.perf_counter() - start
+    if archive:
+        print(f"[CACHE] {hits} pages already parsed by parser version {PARSER_VERSION}")
+    print(f"[DONE] {pipeline.parsed} parsed, {pipeline.failed} failed, {writer.written} stored "
+          f"in {elapsed:.1f}s ({pipeline.parsed / elapsed:.1f} pages/s)")
+
+
+if __name__ == '__main__':
+    main()
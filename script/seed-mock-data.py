@@ -0,0 +1,445 @@
+"""
+Seed a database with generated data for load testing: jobs plus every table
+insert_mock_data.py creates (instructors, stories, companies, posts,
+practice_questions), at production scale.
+
+Rows are generated in batches from a seeded random generator and streamed
+into SQLite with executemany, so memory does not grow with the row count.
+Dates count back from --now (default SEED_NOW, not the clock), so the same
+--seed and --now build the same database:
+  - jobs: titles from CATEGORY_KEYWORDS, categories and employers skewed
+    (a few of them post most jobs), salaries log-normal around a per-category
+    median and growing with experience, a share of reposts that point at
+    their original through canonical_id. Normalized columns are filled the
+    way the crawler fills them, source is 'seed'
+  - companies: the employers jobs are drawn from
+  - instructors, stories, posts, practice_questions: vocabulary and quizzes
+    from mock_data_template.json; posts and stories belong to instructors
+    (popular instructors post more), posts take their author's category
+
+jobs are loaded with their indexes, triggers and search index dropped and
+rebuilt once at the end (crawler.database.bulk_load); every table is
+written in one transaction with the journal off, so the target must be a
+new file. The FTS5 search index is about half of that
+build; --no-fts leaves it out (publish.py does not copy it into the app's copy).
+
+Usage:
+  python seed-mock-data.py                                # 1M jobs -> jobs-seed.db
+  python seed-mock-data.py --db /tmp/big.db --jobs 5000000 --posts 2000000
+  python seed-mock-data.py --seed 7 --overwrite
+  python seed-mock-data.py --no-fts --now 2026-06-01      # no search index; dates up to 1 June 2026
+  python publish.py --src jobs-seed.db --out /tmp/jobs.db  # the app's copy of it
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from itertools import accumulate
+
+import insert_mock_data as mock
+from crawler.config import CATEGORY_KEYWORDS, DEFAULT_BACKGROUNDS
+from crawler.database import JOB_COLUMNS, bulk_load, connect
+from crawler.logs import setup_logging
+from crawler.matcher import fold
+from crawler.normalize import normalize_job
+
+SEED_DB_FILE = 'jobs-seed.db'
+# Generated dates end here unless --now says otherwise
+SEED_NOW = datetime(2026, 1, 1)
+BATCH_SIZE = 10_000
+PROFILES = 2048  # Sampled salary/experience combinations per category
+DUPLICATE_SHARE = 0.03
+
+LOCATIONS = {
+    'Hồ Chí Minh (mới)': 36, 'Hà Nội': 32, 'Đà Nẵng (mới)': 5, 'Bình Dương': 5, 'Đồng Nai (mới)': 4,
+    'Hải Phòng (mới)': 4, 'Bắc Ninh (mới)': 3, 'Cần Thơ (mới)': 2, 'Khánh Hòa (mới)': 2,
+    'Hà Nội,Hồ Chí Minh (mới)': 4, 'Hà Nội&2 nơi khác': 3,
+}
+EXPERIENCE = {
+    'Không yêu cầu': (16, 0), 'Dưới 1 năm': (14, 0), '1 năm': (20, 1), '2 năm': (18, 2),
+    '3 năm': (13, 3), '4 năm': (5, 4), '5 năm': (6, 5), 'Trên 5 năm': (8, 6),
+}
+# Median monthly salary in million VND at 1 year of experience; 12 for the rest
+SALARY_MEDIAN = {
+    'IT': 22, 'Senior': 35, 'Ngân hàng': 16, 'Kỹ sư xây dựng': 17, 'Bất động sản': 15,
+    'Lao động phổ thông': 8, 'Telesales': 9, 'Chăm sóc khách hàng': 9, 'Giáo dục': 11,
+}
+# Salary text shape -> weight
+SALARY_FORMS = {'range': 55, 'negotiable': 25, 'up_to': 9, 'from': 6, 'usd': 5}
+
+TITLE_PREFIXES = ['Nhân viên', 'Chuyên viên', 'Trưởng nhóm', 'Thực tập sinh', 'Trợ lý', 'Giám sát']
+TITLE_SUFFIXES = ['', '', ' - Thu nhập hấp dẫn', ' - Lương cứng + hoa hồng', ' (Không yêu cầu kinh nghiệm)',
+                  ' - Làm việc tại {city}', ' - Part-time', ' - Thu nhập 15 - 30 triệu']
+DESCRIPTION_SENTENCES = [
+    'Phụ trách mảng {kw} của công ty, báo cáo trực tiếp cho trưởng phòng.',
+    'Tìm kiếm, tư vấn và chăm sóc khách hàng có nhu cầu về {kw}.',
+    'Lập kế hoạch và triển khai các hoạt động {kw} theo tuần, tháng.',
+    'Phối hợp với các phòng ban liên quan để hoàn thành chỉ tiêu được giao.',
+    'Theo dõi, tổng hợp số liệu và lập báo cáo định kỳ.',
+    'Tham gia các buổi đào tạo nội bộ về {kw} và kỹ năng mềm.',
+    'Đề xuất giải pháp cải tiến quy trình làm việc của bộ phận.',
+    'Quản lý hồ sơ, tài liệu liên quan đến {kw}.',
+    'Hỗ trợ trưởng nhóm trong các dự án {kw} trọng điểm.',
+    'Làm việc từ thứ 2 đến thứ 6, nghỉ thứ 7 và chủ nhật.',
+    'Thực hiện các công việc khác theo sự phân công của quản lý.',
+    'Được đào tạo bài bản, có lộ trình thăng tiến rõ ràng.',
+]
+TAGS = ['Hỗ trợ chỗ ở', 'Thưởng tháng 13', 'Du lịch hằng năm', 'Bảo hiểm đầy đủ', 'Đào tạo', 'Làm việc từ xa']
+# job_row stores the tags, comma-joined, in requirements
+TAG_PAIRS = [f'{a},{b}' for a in TAGS for b in TAGS if a != b]
+
+COMPANY_FORMS = {'Công ty TNHH': 45, 'Công ty Cổ phần': 35, 'Tập đoàn': 6, 'Ngân hàng TMCP': 3, 'Chi nhánh Công ty': 11}
+COMPANY_SYLLABLES = ['Việt', 'Phú', 'Hưng', 'Thịnh', 'An', 'Minh', 'Tân', 'Đại', 'Sao', 'Hoàng', 'Nam', 'Á',
+                     'Long', 'Phát', 'Thành', 'Kim', 'Bảo', 'Gia', 'Trường', 'Hải', 'Sơn', 'Quốc', 'Đông', 'Tín']
+COMPANY_TRADES = ['Công nghệ', 'Thương mại', 'Đầu tư', 'Xây dựng', 'Dịch vụ', 'Giáo dục', 'Bất động sản',
+                  'Sản xuất', 'Logistics', 'Truyền thông', 'Tài chính', 'Dược phẩm']
+COMPANY_SIZES = {'1-9': 15, '10-24': 20, '25-99': 28, '100-499': 22, '500-1000': 9, '1000+': 6}
+
+SURNAMES = {'Nguyễn': 38, 'Trần': 11, 'Lê': 9, 'Phạm': 7, 'Hoàng': 5, 'Huỳnh': 5, 'Phan': 4, 'Vũ': 4,
+            'Võ': 4, 'Đặng': 2, 'Bùi': 2, 'Đỗ': 2, 'Hồ': 2, 'Ngô': 2, 'Dương': 1}
+MIDDLE_NAMES = ['Văn', 'Thị', 'Minh', 'Thanh', 'Ngọc', 'Quang', 'Hữu', 'Thu', 'Đức', 'Hoài', 'Bảo']
+GIVEN_NAMES = ['An', 'Bình', 'Chi', 'Dũng', 'Hà', 'Hạnh', 'Hùng', 'Lan', 'Linh', 'Long', 'Mai', 'Nam',
+               'Phương', 'Quân', 'Sơn', 'Trang', 'Tuấn', 'Vy', 'Khoa', 'Thảo', 'Huy', 'Nhung']
+
+
+def cumulative(weights) -> list[float]:
+    return list(accumulate(weights))
+
+
+def zipf(n: int, s: float = 1.0) -> list[float]:
+    """Cumulative weights of n ranks where rank k is drawn in proportion to 1/k^s"""
+    return cumulative(1 / (k ** s) for k in range(1, n + 1))
+
+
+def slug(text: str) -> str:
+    return '-'.join(''.join(c if c.isalnum() else ' ' for c in fold(text)).split())
+
+
+class Timeline:
+    """`n` increasing timestamps (epoch seconds) spread over the `days` days before `now`"""
+
+    def __init__(self, n: int, days: int, rng: random.Random, now: datetime):
+        self.end = now.timestamp()
+        self.start = self.end - days * 86400
+        self.step = (self.end - self.start) / max(n, 1)
+        self.rng = rng
+
+    def at(self, i: int) -> float:
+        return self.start + self.step * i + self.rng.random() * 60
+
+
+def salary_text(form: str, median: float, rng: random.Random) -> str:
+    low = max(3, round(rng.lognormvariate(0, 0.35) * median))
+    high = low + max(2, round(low * rng.uniform(0.2, 0.8)))
+    if form == 'negotiable':
+        return 'Thoả thuận'
+    if form == 'up_to':
+        return f'Tới {high} triệu'
+    if form == 'from':
+        return f'Từ {low} triệu'
+    if form == 'usd':
+        low_usd = round(low * 40, -2)
+        return f'{low_usd:,} - {round(high * 40, -2) + 500:,} USD'
+    return f'{low} - {high} triệu'
+
+
+def job_profiles(category: str, rng: random.Random) -> list[tuple]:
+    """PROFILES (salary, experience, *normalized columns) samples for a category"""
+    experience = list(EXPERIENCE)
+    experience_cw = cumulative(weight for weight, _ in EXPERIENCE.values())
+    forms, forms_cw = list(SALARY_FORMS), cumulative(SALARY_FORMS.values())
+    profiles = []
+    # Salary texts repeat: normalize each combination once
+    parsed = {}
+    for _ in range(PROFILES):
+        level = rng.choices(experience, cum_weights=experience_cw)[0]
+        years = EXPERIENCE[level][1]
+        median = SALARY_MEDIAN.get(category, 12) * (0.85 + 0.15 * years)
+        salary = salary_text(rng.choices(forms, cum_weights=forms_cw)[0], median, rng)
+        if (salary, level) not in parsed:
+            parsed[salary, level] = (*normalize_job({'salary': salary, 'experience': level}).values(),)
+        profiles.append((salary, level, *parsed[salary, level]))
+    return profiles
+
+
+def job_titles(category: str, cities: list[str]) -> list[tuple[str, str]]:
+    """(title, URL slug) combinations for a category"""
+    titles = []
+    for keyword in CATEGORY_KEYWORDS[category]:
+        role = keyword[0].upper() + keyword[1:]
+        for prefix in TITLE_PREFIXES:
+            for suffix in TITLE_SUFFIXES:
+                title = f'{prefix} {role}' + suffix.format(city=cities[len(titles) % len(cities)])
+                titles.append((title, slug(title)))
+    return titles
+
+
+def descriptions(category: str, rng: random.Random, n: int = 256) -> list[str]:
+    keywords = CATEGORY_KEYWORDS[category]
+    texts = []
+    for _ in range(n):
+        sentences = rng.sample(DESCRIPTION_SENTENCES, rng.randint(3, 7))
+        texts.append(' '.join(s.format(kw=rng.choice(keywords)) for s in sentences)[:500])
+    return texts
+
+
+def company_names(n: int, rng: random.Random) -> list[tuple[str, str]]:
+    """(name, industry) of n distinct employers"""
+    forms, forms_cw = list(COMPANY_FORMS), cumulative(COMPANY_FORMS.values())
+    companies = {}
+    while len(companies) < n:
+        trade = rng.choice(COMPANY_TRADES)
+        brand = ' '.join(rng.sample(COMPANY_SYLLABLES, rng.choice((2, 2, 3))))
+        name = f'{rng.choices(forms, cum_weights=forms_cw)[0]} {trade} {brand}'
+        if name in companies:
+            name = f'{name} {len(companies)}'
+        companies[name] = trade
+    return list(companies.items())
+
+
+def generate_jobs(n: int, companies: list[str], rng: random.Random, days: int, now: datetime):
+    """Batches of rows in JOB_COLUMNS order"""
+    categories = list(CATEGORY_KEYWORDS)
+    # Categories in CATEGORY_KEYWORDS order, the first (sales) the most common
+    categories_cw = zipf(len(categories), 0.8)
+    companies_cw = zipf(len(companies), 0.8)
+    cities = list(LOCATIONS)
+    cities_cw = cumulative(LOCATIONS.values())
+    profiles = {c: job_profiles(c, rng) for c in categories}
+    titles = {c: job_titles(c, cities[:9]) for c in categories}
+    texts = {c: descriptions(c, rng) for c in categories}
+    timeline = Timeline(n, days, rng, now)
+    rand = rng.random
+    fromtimestamp = datetime.fromtimestamp
+    for start in range(0, n, BATCH_SIZE):
+        size = min(BATCH_SIZE, n - start)
+        picked = zip(rng.choices(categories, cum_weights=categories_cw, k=size),
+                     rng.choices(companies, cum_weights=companies_cw, k=size),
+                     rng.choices(cities, cum_weights=cities_cw, k=size))
+        rows = []
+        previous = None
+        for i, (category, company, location) in enumerate(picked, start=start):
+            if previous and rand() < DUPLICATE_SHARE:
+                # A repost of the previous job under a new URL
+                category, title, title_slug, company, canonical_id = previous
+            else:
+                options = titles[category]
+                title, title_slug = options[int(rand() * len(options))]
+                canonical_id = None
+            salary, level, *normalized = profiles[category][int(rand() * PROFILES)]
+            # Generated URLs are canonical: the id is make_job_id(url) without re-parsing it
+            url = f'https://www.topcv.vn/viec-lam/{title_slug}/{2_000_000 + i}.html'
+            job_id = hashlib.md5(url.encode()).hexdigest()[:12]
+            crawled = timeline.at(i)
+            descs = texts[category]
+            fingerprint = hashlib.md5(f'{title}|{salary}|{location}'.encode()).hexdigest()[:12]
+            canonical_id = canonical_id or job_id
+            rows.append((
+                job_id, title, company, location, salary, level, category, int(rand() < 0.08),
+                descs[int(rand() * len(descs))], TAG_PAIRS[int(rand() * len(TAG_PAIRS))], url, 'seed',
+                DEFAULT_BACKGROUNDS[i % len(DEFAULT_BACKGROUNDS)],
+                fromtimestamp(crawled - rand() * 259200).isoformat(), None, fromtimestamp(crawled).isoformat(),
+                fingerprint, *normalized, canonical_id, None,
+            ))
+            previous = (category, title, title_slug, company, canonical_id)
+        yield rows
+
+
+def generate_companies(companies: list[tuple[str, str]], rng: random.Random, now: datetime):
+    sizes, sizes_cw = list(COMPANY_SIZES), cumulative(COMPANY_SIZES.values())
+    cities = list(LOCATIONS)[:9]
+    now = now.isoformat()
+    rows = [(f'company-{i}', name, None, industry, rng.choices(sizes, cum_weights=sizes_cw)[0],
+             rng.choice(cities), now)
+            for i, (name, industry) in enumerate(companies, start=1)]
+    for start in range(0, len(rows), BATCH_SIZE):
+        yield rows[start:start + BATCH_SIZE]
+
+
+def generate_instructors(n: int, template: dict, rng: random.Random, now: datetime) -> list[tuple]:
+    """(id, name, username, avatar, category, verified, created_at); kept for posts and stories"""
+    categories = sorted({item['category'] for item in template['instructors'] if item.get('category')})
+    avatars = sorted({item['avatar'] for item in template['instructors'] if item.get('avatar')})
+    surnames, surnames_cw = list(SURNAMES), cumulative(SURNAMES.values())
+    now = now.isoformat()
+    instructors = []
+    for i in range(1, n + 1):
+        surname = rng.choices(surnames, cum_weights=surnames_cw)[0]
+        given = rng.choice(GIVEN_NAMES)
+        name = f'{surname} {rng.choice(MIDDLE_NAMES)} {given}'
+        instructors.append((i, name, f'{slug(given)}.{slug(surname)}{i}', rng.choice(avatars),
+                            rng.choice(categories), int(rng.random() < 0.15), now))
+    return instructors
+
+
+def generate_stories(n: int, instructors: list[tuple], rng: random.Random, now: datetime):
+    authors_cw = zipf(len(instructors), 0.8)
+    now = now.isoformat()
+    for start in range(0, n, BATCH_SIZE):
+        size = min(BATCH_SIZE, n - start)
+        authors = rng.choices(instructors, cum_weights=authors_cw, k=size)
+        yield [(i, author[1], author[2], author[3], int(rng.random() < 0.7), now)
+               for i, author in enumerate(authors, start=start + 1)]
+
+
+def relative_time(minutes: int) -> str:
+    if minutes < 60:
+        return f'{minutes} phút trước'
+    if minutes < 24 * 60:
+        return f'{minutes // 60} giờ trước'
+    return f'{minutes // (24 * 60)} ngày trước'
+
+
+def generate_posts(n: int, instructors: list[tuple], template: dict, rng: random.Random, days: int,
+                   now: datetime):
+    """Posts by instructors (Zipf: popular instructors post more), in their author's category"""
+    # Each template post as (content, tags JSON, quiz_question, options JSON, correct id, explanation,
+    # category): serialized once, not once per generated post
+    bases = [(post['content'], json.dumps(post.get('tags', []), ensure_ascii=False), post.get('quiz_question'),
+              json.dumps(post.get('quiz_options', []), ensure_ascii=False), post.get('quiz_correct_id'),
+              post.get('quiz_explanation'), post.get('category')) for post in template['posts']]
+    by_category = {}
+    for base in bases:
+        by_category.setdefault(base[-1], []).append(base)
+    paragraphs = [p for base in bases for p in base[0].split('\n\n')]
+    images = sorted({post['image'] for post in template['posts'] if post.get('image')})
+    authors_cw = zipf(len(instructors), 0.8)
+    timeline = Timeline(n, days, rng, now)
+    end = now.timestamp()
+    rand = rng.random
+    fromtimestamp = datetime.fromtimestamp
+    for start in range(0, n, BATCH_SIZE):
+        size = min(BATCH_SIZE, n - start)
+        authors = rng.choices(instructors, cum_weights=authors_cw, k=size)
+        rows = []
+        for i, author in enumerate(authors, start=start + 1):
+            # A post on the author's topic when the template has one
+            candidates = by_category.get(author[4], bases)
+            content, tags, quiz, options, correct, explanation, _ = candidates[int(rand() * len(candidates))]
+            if rand() < 0.5:
+                content += '\n\n' + paragraphs[int(rand() * len(paragraphs))]
+            created = timeline.at(i)
+            likes = int(rng.paretovariate(1.2) * 20)
+            rows.append((
+                i, author[0], relative_time(int((end - created) // 60)), content,
+                images[int(rand() * len(images))] if rand() < 0.6 else None, tags, likes,
+                int(likes * rand() * 0.02), author[4], quiz, options, correct, explanation,
+                fromtimestamp(created).isoformat(),
+            ))
+        yield rows
+
+
+def generate_questions(n: int, template: dict, rng: random.Random, now: datetime):
+    bases = template['practice_questions']
+    now = now.isoformat()
+    for start in range(0, n, BATCH_SIZE):
+        rows = []
+        for i in range(start + 1, min(start + BATCH_SIZE, n) + 1):
+            base = bases[int(rng.random() * len(bases))]
+            # Option ids are per question: p1-a -> p<i>-a
+            options = [{**option, 'id': f"p{i}-{option['id'].rsplit('-', 1)[-1]}"} for option in base['options']]
+            correct = f"p{i}-{base['correct_option_id'].rsplit('-', 1)[-1]}"
+            rows.append((f'practice-{i}', base['topic'], base['title'], base['question'],
+                         json.dumps(options, ensure_ascii=False), correct, base['explanation'],
+                         base.get('image'), now))
+        yield rows
+
+
+def load(conn, table: str, columns: tuple, batches, total: int) -> int:
+    """executemany every batch into `table`, with progress; returns the row count"""
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    count = 0
+    started = time.perf_counter()
+    reported = 0
+    for rows in batches:
+        conn.executemany(sql, rows)
+        count += len(rows)
+        if count - reported >= max(total // 10, BATCH_SIZE) or count == total:
+            reported = count
+            elapsed = time.perf_counter() - started
+            print(f"  [SEED] {table}: {count:,}/{total:,} ({count / elapsed:,.0f} rows/s)")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a new database with generated data for load testing')
+    parser.add_argument('--db', default=SEED_DB_FILE, help=f'Database to create (default: {SEED_DB_FILE})')
+    parser.add_argument('--overwrite', action='store_true', help='Replace --db if it exists')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed builds the same data')
+    parser.add_argument('--jobs', type=int, default=1_000_000)
+    parser.add_argument('--companies', type=int, default=20_000)
+    parser.add_argument('--instructors', type=int, default=5_000)
+    parser.add_argument('--stories', type=int, default=2_000)
+    parser.add_argument('--posts', type=int, default=200_000)
+    parser.add_argument('--questions', type=int, default=10_000)
+    parser.add_argument('--days', type=int, default=180, help='Crawl/post dates spread over the N days before --now')
+    parser.add_argument('--now', type=datetime.fromisoformat, default=SEED_NOW,
+                        help=f'End of the generated dates, YYYY-MM-DD[THH:MM] (default: {SEED_NOW.date()})')
+    parser.add_argument('--no-fts', action='store_true',
+                        help='Do not build the search index (jobs_fts), about half of the index build time')
+    args = parser.parse_args()
+    setup_logging()
+
+    if os.path.exists(args.db):
+        if not args.overwrite:
+            print(f"[ERROR] {args.db} exists; seeding needs a new file (--overwrite replaces it)")
+            sys.exit(1)
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+
+    started = time.perf_counter()
+    rng = random.Random(args.seed)
+    with open(mock.DEFAULT_JSON, encoding='utf-8') as f:
+        template = json.load(f)
+
+    print(f"[SEED] Creating {args.db} (seed {args.seed}, dates up to {args.now:%Y-%m-%d %H:%M})")
+    conn = connect(args.db)
+    mock.create_tables(conn)
+    # A new file that is thrown away on failure: no journal, no fsync
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA cache_size = -256000')
+    conn.execute('BEGIN')
+    companies = company_names(args.companies, rng)
+    instructors = generate_instructors(args.instructors, template, rng, args.now)
+    counts = {
+        'companies': load(conn, 'companies', ('id', 'name', 'logo', 'industry', 'size', 'location', 'created_at'),
+                          generate_companies(companies, rng, args.now), len(companies)),
+        'instructors': load(conn, 'instructors',
+                            ('id', 'name', 'username', 'avatar', 'category', 'verified', 'created_at'),
+                            [instructors], len(instructors)),
+        'stories': load(conn, 'stories', ('id', 'user_name', 'user_username', 'image', 'has_unseen', 'created_at'),
+                        generate_stories(args.stories, instructors, rng, args.now), args.stories),
+        'posts': load(conn, 'posts', ('id', 'author_id', 'time', 'content', 'image', 'tags', 'likes', 'comments',
+                                      'category', 'quiz_question', 'quiz_options', 'quiz_correct_id',
+                                      'quiz_explanation', 'created_at'),
+                      generate_posts(args.posts, instructors, template, rng, args.days, args.now), args.posts),
+        'practice_questions': load(conn, 'practice_questions',
+                                   ('id', 'topic', 'title', 'question', 'options', 'correct_option_id',
+                                    'explanation', 'image', 'created_at'),
+                                   generate_questions(args.questions, template, rng, args.now), args.questions),
+    }
+    with bulk_load(conn, search_index=not args.no_fts):
+        counts['jobs'] = load(conn, 'jobs', JOB_COLUMNS,
+                              generate_jobs(args.jobs, [name for name, _ in companies], rng, args.days, args.now),
+                              args.jobs)
+        index_started = time.perf_counter()
+    conn.execute('COMMIT')
+    built = 'Indexes' if args.no_fts else 'Indexes and search index'
+    print(f"  [SEED] {built} built in {time.perf_counter() - index_started:.1f}s")
+    conn.execute('PRAGMA journal_mode = DELETE')
+    conn.close()
+
+    print(f"\n[DONE] {sum(counts.values()):,} rows in {time.perf_counter() - started:.1f}s, "
+          f"{os.path.getsize(args.db) / 1024 / 1024:,.0f} MB:")
+    for table, count in counts.items():
+        print(f"  - {table}: {count:,}")
+
+
+if __name__ == '__main__':
+    main()
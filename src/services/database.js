@@ -9,6 +9,160 @@ import initSqlJs from 'sql.js'
 let db = null
 let sqlPromise = null
 
+// ============ CACHE & DELTAS ============
+// The last downloaded jobs.db is kept in IndexedDB with its version; on the
+// next visit only the deltas published since then are fetched and applied
+// (see script/crawler/publish.py for the manifest and delta format).
+
+const CACHE_DB = 'job-tinder'
+const CACHE_STORE = 'database'
+
+function openCache() {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(CACHE_DB, 1)
+    request.onupgradeneeded = () => request.result.createObjectStore(CACHE_STORE)
+    request.onsuccess = () => resolve(request.result)
+    request.onerror = () => reject(request.error)
+  })
+}
+
+async function cacheRequest(mode, call) {
+  const cache = await openCache()
+  return new Promise((resolve, reject) => {
+    const request = call(cache.transaction(CACHE_STORE, mode).objectStore(CACHE_STORE))
+    request.onsuccess = () => resolve(request.result)
+    request.onerror = () => reject(request.error)
+  }).finally(() => cache.close())
+}
+
+const readCache = () => cacheRequest('readonly', store => store.get('jobs'))
+const writeCache = entry => cacheRequest('readwrite', store => store.put(entry, 'jobs'))
+
+async function fetchJson(url) {
+  const response = await fetch(url)
+  return response.ok ? response.json() : null
+}
+
+// Deltas are gzipped; the server may already have decoded them (Content-Encoding)
+async function fetchLines(url) {
+  const response = await fetch(url)
+  if (!response.ok) throw new Error(`${url}: ${response.status}`)
+  let bytes = new Uint8Array(await response.arrayBuffer())
+  if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+    const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'))
+    bytes = new Uint8Array(await new Response(stream).arrayBuffer())
+  }
+  return new TextDecoder().decode(bytes).split('\n').filter(Boolean).map(line => JSON.parse(line))
+}
+
+// Deltas from `version` to the manifest's version, or null when the full file is cheaper
+function deltaChain(manifest, version) {
+  const chain = []
+  for (const delta of manifest.deltas) {
+    if (delta.from === version) {
+      chain.push(delta)
+      version = delta.to
+    }
+  }
+  if (version !== manifest.version) return null
+  const bytes = chain.reduce((sum, delta) => sum + delta.bytes, 0)
+  return bytes < manifest.db_bytes ? chain : null
+}
+
+// Whether this sql.js build has FTS5; without it the search triggers of
+// jobs.db fail on every write, so they are dropped before applying deltas
+let fts5 = null
+function hasFts5(SQL) {
+  if (fts5 === null) {
+    const probe = new SQL.Database()
+    try {
+      probe.run('CREATE VIRTUAL TABLE probe USING fts5(text)')
+      fts5 = true
+    } catch {
+      fts5 = false
+    } finally {
+      probe.close()
+    }
+  }
+  return fts5
+}
+
+function dropSearchTriggers(database, search) {
+  for (const name of search?.triggers || []) {
+    database.run(`DROP TRIGGER IF EXISTS "${name.replace(/"/g, '""')}"`)
+  }
+}
+
+async function applyDelta(database, file) {
+  const [[, , to, columns], ...changes] = await fetchLines(`/data/${file}`)
+  const upsert = database.prepare(`
+    INSERT INTO jobs (${columns.join(', ')}) VALUES (${columns.map(() => '?').join(', ')})
+    ON CONFLICT(id) DO UPDATE SET ${columns.slice(1).map(c => `${c} = excluded.${c}`).join(', ')}
+  `)
+  const remove = database.prepare('DELETE FROM jobs WHERE id = ?')
+  database.run('BEGIN')
+  try {
+    for (const [op, ...values] of changes) {
+      if (op === 'u') upsert.run(values)
+      else remove.run(values)
+    }
+    database.run('UPDATE publish_info SET version = ?', [to])
+    database.run('COMMIT')
+  } catch (error) {
+    database.run('ROLLBACK')
+    throw error
+  } finally {
+    upsert.free()
+    remove.free()
+  }
+}
+
+async function fetchDatabase(SQL) {
+  const response = await fetch('/data/jobs.db')
+  if (!response.ok) return null
+  return new SQL.Database(new Uint8Array(await response.arrayBuffer()))
+}
+
+async function loadDatabase(SQL) {
+  const [manifest, cached] = await Promise.all([
+    fetchJson('/data/manifest.json').catch(() => null),
+    readCache().catch(() => null),
+  ])
+  if (!manifest) {
+    // No manifest: an older deployment, always the full file
+    return fetchDatabase(SQL)
+  }
+  if (cached?.version === manifest.version) {
+    console.log(`Loaded database v${manifest.version} from cache`)
+    return new SQL.Database(cached.bytes)
+  }
+  const chain = cached && deltaChain(manifest, cached.version)
+  let database = null
+  if (chain) {
+    database = new SQL.Database(cached.bytes)
+    try {
+      if (manifest.search?.module === 'fts5' && !hasFts5(SQL)) {
+        // Search already falls back to LIKE on this build (see prepareSearch)
+        dropSearchTriggers(database, manifest.search)
+      }
+      for (const delta of chain) await applyDelta(database, delta.file)
+      console.log(`Updated database v${cached.version} -> v${manifest.version} with ${chain.length} delta(s)`)
+    } catch (error) {
+      console.warn('Could not apply deltas, downloading the full database:', error)
+      database.close()
+      database = null
+    }
+  }
+  if (!database) {
+    database = await fetchDatabase(SQL)
+    if (!database) return null
+    console.log(`Loaded database v${manifest.version} from server`)
+  }
+  writeCache({ version: manifest.version, bytes: database.export() })
+    .catch(error => console.warn('Could not cache database:', error))
+  return database
+}
+
 /**
  * Initialize sql.js and load the database
  */
@@ -24,12 +178,8 @@ async function initDatabase() {
   const SQL = await sqlPromise
 
   try {
-    const response = await fetch('/data/jobs.db')
-    if (response.ok) {
-      const buffer = await response.arrayBuffer()
-      db = new SQL.Database(new Uint8Array(buffer))
-      console.log('Loaded database from server')
-    } else {
+    db = await loadDatabase(SQL)
+    if (!db) {
       db = new SQL.Database()
       console.log('Created new empty database')
     }
@@ -56,26 +206,54 @@ function queryToArray(results) {
 
 // ============ JOBS ============
 
+function toJob(row) {
+  return {
+    id: row.id,
+    title: row.title,
+    company: row.company,
+    location: row.location || 'Chưa rõ',
+    salary: row.salary || 'Thỏa thuận',
+    type: row.job_type || 'Toàn thời gian',
+    remote: Boolean(row.remote),
+    description: row.description || '',
+    requirements: row.requirements ? row.requirements.split(',') : [],
+    backgroundImage: row.background_image,
+    url: row.url,
+    source: row.source,
+    category: row.category || row.job_type || 'Khác',
+    // Parsed by the crawler (script/crawler/normalize.py); null when unknown or open-ended
+    salaryMinVnd: row.salary_min_vnd ?? null,
+    salaryMaxVnd: row.salary_max_vnd ?? null,
+    salaryCurrency: row.salary_currency ?? null,
+    negotiable: Boolean(row.salary_negotiable),
+    experienceMinYears: row.exp_min_years ?? null,
+    experienceMaxYears: row.exp_max_years ?? null,
+  }
+}
+
 export async function getJobs(limit = 100, offset = 0) {
   const database = await initDatabase()
   const results = database.exec(`
     SELECT * FROM jobs ORDER BY crawled_at DESC LIMIT ${limit} OFFSET ${offset}
   `)
-  return queryToArray(results).map(job => ({
-    id: job.id,
-    title: job.title,
-    company: job.company,
-    location: job.location || 'Chưa rõ',
-    salary: job.salary || 'Thỏa thuận',
-    type: job.job_type || 'Toàn thời gian',
-    remote: Boolean(job.remote),
-    description: job.description || '',
-    requirements: job.requirements ? job.requirements.split(',') : [],
-    backgroundImage: job.background_image,
-    url: job.url,
-    source: job.source,
-    category: job.category || job.job_type || 'Khác',
-  }))
+  return queryToArray(results).map(toJob)
+}
+
+// Jobs that can pay at least `minVnd` a month, newest first. Both salary
+// bounds are indexed, and publish runs ANALYZE, so SQLite seeks them when
+// few jobs qualify instead of parsing salary text for every row
+export async function getJobsBySalary(minVnd, limit = 100) {
+  const database = await initDatabase()
+  try {
+    const results = database.exec(`
+      SELECT * FROM jobs WHERE salary_max_vnd >= $min OR salary_min_vnd >= $min
+      ORDER BY crawled_at DESC LIMIT $limit
+    `, { $min: minVnd, $limit: limit })
+    return queryToArray(results).map(toJob)
+  } catch {
+    // Older jobs.db without the salary columns
+    return []
+  }
 }
 
 export async function getJobCount() {
@@ -84,8 +262,36 @@ export async function getJobCount() {
   return results[0]?.values[0]?.[0] || 0
 }
 
-export async function searchJobs(keyword) {
-  const database = await initDatabase()
+// Every word must match as a prefix; quoting keeps FTS5 operators out of user input.
+// đ is indexed as d (see script/crawler/database.py), so "dao tao" finds "Đào tạo".
+function ftsQuery(keyword) {
+  return keyword
+    .replace(/đ/g, 'd').replace(/Đ/g, 'D')
+    .split(/\s+/)
+    .filter(Boolean)
+    .map(word => `"${word.replace(/"/g, '""')}"*`)
+    .join(' ')
+}
+
+function prepareSearch(database, keyword) {
+  const query = ftsQuery(keyword)
+  if (query) {
+    try {
+      // Full-text index built by the crawler, best match first; rank and
+      // limit on the index alone, then fetch only the 50 job rows
+      const stmt = database.prepare(`
+        SELECT jobs.* FROM (
+          SELECT rowid, bm25(jobs_fts, 10.0, 5.0, 1.0) AS score
+          FROM jobs_fts WHERE jobs_fts MATCH ? ORDER BY score LIMIT 50
+        ) AS hit JOIN jobs ON jobs.rowid = hit.rowid
+        ORDER BY hit.score
+      `)
+      stmt.bind([query])
+      return stmt
+    } catch {
+      // jobs.db published without --search-index, or a sql.js build without FTS5
+    }
+  }
   const searchTerm = `%${keyword}%`
   const stmt = database.prepare(`
     SELECT * FROM jobs 
@@ -93,25 +299,16 @@ export async function searchJobs(keyword) {
     ORDER BY crawled_at DESC LIMIT 50
   `)
   stmt.bind([searchTerm, searchTerm, searchTerm])
+  return stmt
+}
+
+export async function searchJobs(keyword) {
+  const database = await initDatabase()
+  const stmt = prepareSearch(database, keyword)
   
   const jobs = []
   while (stmt.step()) {
-    const row = stmt.getAsObject()
-    jobs.push({
-      id: row.id,
-      title: row.title,
-      company: row.company,
-      location: row.location || 'Chưa rõ',
-      salary: row.salary || 'Thỏa thuận',
-      type: row.job_type || 'Toàn thời gian',
-      remote: Boolean(row.remote),
-      description: row.description || '',
-      requirements: row.requirements ? row.requirements.split(',') : [],
-      backgroundImage: row.background_image,
-      url: row.url,
-      source: row.source,
-      category: row.category || row.job_type || 'Khác',
-    })
+    jobs.push(toJob(stmt.getAsObject()))
   }
   stmt.free()
   return jobs
@@ -247,6 +444,7 @@ export const formatNumber = (num) => {
 
 export default {
   getJobs,
+  getJobsBySalary,
   getJobCount,
   searchJobs,
   isDatabaseAvailable,